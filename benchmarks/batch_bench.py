@@ -0,0 +1,42 @@
+"""Checking many small files one process per file, in one process, and in a
+process pool.
+
+Run with: poetry run python -m benchmarks.batch_bench
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from compiler.batch import check_files
+from benchmarks.common import generate_program
+
+
+def main() -> None:
+    files = 1000
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(files):
+            path = os.path.join(directory, f'{i}.src')
+            with open(path, 'w') as f:
+                f.write(generate_program(20, seed=i))
+            paths.append(path)
+
+        # A process per file, timed on a sample.
+        sample = paths[:20]
+        start = time.perf_counter()
+        for path in sample:
+            subprocess.run([sys.executable, '-m', 'compiler', 'interpret', '--no-cache', path],
+                           check=True, stdout=subprocess.DEVNULL)
+        per_file = (time.perf_counter() - start) / len(sample)
+        print(f'process per file     {1 / per_file:8.0f} files/s (estimated from {len(sample)} files)')
+
+        for workers in [1, 2, 4, os.cpu_count() or 1]:
+            report = check_files(paths, workers)
+            assert not report.failed
+            print(f'{workers:2d} workers           {files / report.seconds:8.0f} files/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Checking a program from source against loading it from the compile cache.
+
+Run with: poetry run python -m benchmarks.cache_bench
+"""
+import tempfile
+
+from compiler.cache import CompileCache
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import best_of, generate_program
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CompileCache(directory)
+        for statements in [100, 1000, 10000]:
+            source = generate_program(statements)
+
+            def check() -> object:
+                expr = parse(tokenize(source))
+                typecheck(expr)
+                return expr
+
+            key = cache.key(source)
+            cache.store(key, check())
+            check_time, _ = best_of(check, repeat=3)
+            load_time, _ = best_of(lambda: cache.load(key), repeat=3)
+            print(f'{statements:6d} statements   parse and typecheck {check_time * 1000:8.1f} ms   '
+                  f'cache hit {load_time * 1000:7.1f} ms   speedup {check_time / load_time:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
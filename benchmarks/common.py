@@ -0,0 +1,78 @@
+import random
+import time
+from typing import Callable, TypeVar
+
+T = TypeVar('T')
+
+
+def generate_program(statements: int, seed: int = 0) -> str:
+    """Generates a valid program with roughly `statements` top level statements."""
+    rng = random.Random(seed)
+    lines = ['var total = 0;']
+    for i in range(statements):
+        kind = rng.randrange(4)
+        if kind == 0:
+            lines.append(f'var x{i} = {rng.randrange(1000)} + {rng.randrange(1000)} * {rng.randrange(1, 100)};')
+        elif kind == 1:
+            lines.append(f'// comment number {i}')
+            lines.append(f'total = total + {rng.randrange(1000)} % {rng.randrange(1, 100)};')
+        elif kind == 2:
+            lines.append(f'if total >= {rng.randrange(1000)} and not false then {{ total = total - 1; }} else {{ print_int(total); }}')
+        else:
+            lines.append(f'{{ var i = 0; while i < {rng.randrange(10)} do {{ i = i + 1; total = total + i; }} }}')
+    return '\n'.join(lines) + '\n'
+
+
+def best_of(func: Callable[[], T], repeat: int = 5) -> tuple[float, T]:
+    """Runs `func` `repeat` times, returns the fastest wall time and the last result."""
+    best = float('inf')
+    result = func()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def chain_program(operands: int) -> str:
+    """One long, well-typed arithmetic expression."""
+    operators = ['+', '*', '-', '/', '%']
+    parts = ['var x = 1']
+    for i in range(1, operands):
+        parts.append(f'{operators[i % len(operators)]} {i}')
+    return ' '.join(parts) + ';\n'
+
+
+def nested_program(depth: int) -> str:
+    """Blocks and ifs nested `depth` levels deep, each with a variable."""
+    opening = ''.join(f'{{ var a{i} = {i}; if a{i} < {depth} then ' for i in range(depth))
+    return opening + 'print_int(1)' + ' }' * depth + '\n'
+
+
+def variables_program(count: int) -> str:
+    """`count` top level variables, each computed from the one before."""
+    lines = ['var v0 = 1;']
+    lines += [f'var v{i} = v{i - 1} % 1000 + {i};' for i in range(1, count)]
+    return '\n'.join(lines) + '\n'
+
+
+def loop_program(iterations: int) -> str:
+    """A hot loop with an accumulator and a branch."""
+    return f"""
+        var i = 0;
+        var total = 0;
+        while i < {iterations} do {{
+            if total < 1000 then {{ total = total + i % 7; }} else {{ total = 0; }}
+            i = i + 1;
+        }}
+    """
+
+
+# Synthetic program generators by name, taking a size.
+PROGRAM_SHAPES: dict[str, Callable[[int], str]] = {
+    'chain': chain_program,
+    'nesting': nested_program,
+    'variables': variables_program,
+    'loop': loop_program,
+    'mixed': generate_program,
+}
@@ -0,0 +1,63 @@
+"""A generated 10k-statement program with errors in it: finding them one run
+per error, as without diagnostics, against one run that reports them all.
+
+Run with: poetry run python -m benchmarks.diagnostics_bench
+"""
+import time
+
+from compiler.diagnostics import CompileError, Diagnostics
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import generate_program
+
+
+def with_errors(source: str, count: int) -> tuple[list[str], list[str]]:
+    """The lines of `source` with `count` declarations broken, half of them
+    with a parse error and half with a type error, and the original lines."""
+    lines = source.split('\n')
+    broken = list(lines)
+    rows = [row for row, line in enumerate(lines) if line.startswith('var x')]
+    step = len(rows) // count
+    for i, row in enumerate(rows[::step][:count]):
+        name = lines[row].split()[1]
+        broken[row] = f'var {name} = ;' if i % 2 == 0 else f'var {name}: Bool = 1;'
+    return broken, lines
+
+
+def fix_one_at_a_time(lines: list[str], fixed: list[str]) -> tuple[float, int]:
+    """Runs until the program is clean, fixing the error each run stops at."""
+    lines = list(lines)
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        runs += 1
+        try:
+            typecheck(parse(tokenize('\n'.join(lines))))
+            return time.perf_counter() - start, runs
+        except CompileError as error:
+            assert error.location is not None
+            lines[error.location.row] = fixed[error.location.row]
+
+
+def report_all(lines: list[str]) -> tuple[float, int]:
+    start = time.perf_counter()
+    diagnostics = Diagnostics()
+    root = parse(tokenize('\n'.join(lines)), diagnostics=diagnostics)
+    typecheck(root, diagnostics=diagnostics)
+    return time.perf_counter() - start, len(diagnostics.errors)
+
+
+def main() -> None:
+    source = generate_program(10_000)
+    for count in [1, 10, 50]:
+        broken, fixed = with_errors(source, count)
+        one_at_a_time, runs = fix_one_at_a_time(broken, fixed)
+        all_at_once, errors = report_all(broken)
+        assert errors == count and runs == count + 1
+        print(f'{count:3d} errors   {runs:3d} runs {one_at_a_time * 1000:9.1f} ms   '
+              f'one run {all_at_once * 1000:7.1f} ms   {one_at_a_time / all_at_once:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
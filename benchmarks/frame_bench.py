@@ -0,0 +1,33 @@
+"""A tight counter loop in the tree-walking interpreter, with the counter
+declared outside more and more nested blocks. Variables are slots of a
+preallocated frame, so the time per iteration does not depend on the depth.
+
+Run with: poetry run python -m benchmarks.frame_bench
+"""
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import best_of
+
+ITERATIONS = 50_000
+
+
+def counter_loop(depth: int) -> str:
+    opening = ''.join(f'{{ var a{i} = {i}; ' for i in range(depth))
+    return (f'{{ var i = 0; {opening}while i < {ITERATIONS} do i = i + 1; '
+            + '} ' * depth + 'i }')
+
+
+def main() -> None:
+    for depth in [0, 5, 20, 50]:
+        expr = parse(tokenize(counter_loop(depth)))
+        typecheck(expr)
+        seconds, result = best_of(lambda: interpret(expr), repeat=3)
+        assert result == ITERATIONS
+        print(f'counter loop in {depth:3d} blocks   {seconds * 1000:8.1f} ms   '
+              f'{seconds / ITERATIONS * 1e9:6.0f} ns/iteration')
+
+
+if __name__ == '__main__':
+    main()
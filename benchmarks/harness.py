@@ -0,0 +1,187 @@
+"""Times every phase of the compiler on synthetic programs and stores the
+results as JSON, so that commits can be compared.
+
+Run with: poetry run python -m benchmarks.harness [options]
+
+    --size=SIZE         'small', 'medium' (default) or 'large'.
+    --shapes=A,B        Only these program shapes (see PROGRAM_SHAPES).
+    --warmup=N          Untimed runs of each phase first. Defaults to 1.
+    --repeat=N          Timed runs of each phase. Defaults to 5.
+    --output=FILE       Writes the results as JSON.
+    --compare=FILE      Compares with results written earlier, and fails
+                        if any phase got slower by more than --threshold.
+    --threshold=PCT     Defaults to 10.
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+from compiler.interpreter import interpret
+from compiler.optimizer import count_nodes
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import PROGRAM_SHAPES
+
+# The size passed to each shape's generator, by the --size option.
+SIZES = {
+    'small': {'chain': 1_000, 'nesting': 100, 'variables': 1_000, 'loop': 1_000, 'mixed': 100},
+    'medium': {'chain': 10_000, 'nesting': 1_000, 'variables': 10_000, 'loop': 10_000, 'mixed': 1_000},
+    'large': {'chain': 100_000, 'nesting': 10_000, 'variables': 100_000, 'loop': 100_000, 'mixed': 10_000},
+}
+
+
+@dataclass
+class Result:
+    shape: str
+    size: int
+    phase: str
+    best_seconds: float
+    median_seconds: float
+    peak_bytes: int
+    tokens: int
+    nodes: int
+
+    def __str__(self) -> str:
+        # How long a program runs does not depend on its size.
+        if self.phase == 'interpret':
+            rate = f'{"":17s}'
+        elif self.phase == 'tokenize':
+            rate = f'{self.tokens / self.best_seconds:10.0f} tokens/s'
+        else:
+            rate = f'{self.nodes / self.best_seconds:10.0f} nodes/s '
+        return (f'{self.shape:10s} {self.size:7d}  {self.phase:10s} {self.best_seconds * 1000:9.2f} ms '
+                f'(median {self.median_seconds * 1000:9.2f} ms)  {rate}  peak {self.peak_bytes / 1024:9.0f} KiB')
+
+
+def measure(func: Callable[[], object], warmup: int, repeat: int) -> tuple[float, float, int]:
+    """The best and median wall time of `func`, and its peak memory, which is
+    traced in a separate run because tracing slows it down."""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), statistics.median(times), peak
+
+
+def run_shape(shape: str, size: int, warmup: int, repeat: int) -> list[Result]:
+    source = PROGRAM_SHAPES[shape](size)
+    tokens = tokenize(source)
+    root = parse(tokens)
+    typecheck(root)
+    nodes = count_nodes(root)
+
+    def run() -> object:
+        # Programs print, which is not what is measured.
+        with contextlib.redirect_stdout(io.StringIO()):
+            return interpret(root)
+
+    phases: dict[str, Callable[[], object]] = {
+        'tokenize': lambda: tokenize(source),
+        'parse': lambda: parse(tokens),
+        'typecheck': lambda: typecheck(root),
+        'interpret': run,
+    }
+    results = []
+    for phase, func in phases.items():
+        best, median, peak = measure(func, warmup, repeat)
+        results.append(Result(shape, size, phase, best, median, peak, len(tokens), nodes))
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[Result], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Prints the change of each phase against `baseline`, and returns the
+    ones that got slower by more than `threshold` percent."""
+    old = {(r['shape'], r['size'], r['phase']): r['best_seconds'] for r in baseline['results']}
+    regressions = []
+    print(f'\ncompared with {baseline.get("commit") or "earlier results"}:')
+    for result in results:
+        before = old.get((result.shape, result.size, result.phase))
+        if before is None:
+            continue
+        change = (result.best_seconds / before - 1) * 100
+        name = f'{result.shape} {result.size} {result.phase}'
+        slower = change > threshold
+        print(f'{name:32s} {before * 1000:9.2f} ms -> {result.best_seconds * 1000:9.2f} ms  '
+              f'{change:+6.1f}%{"  REGRESSION" if slower else ""}')
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    size = 'medium'
+    shapes = list(PROGRAM_SHAPES)
+    warmup = 1
+    repeat = 5
+    output: str | None = None
+    baseline_file: str | None = None
+    threshold = 10.0
+    for arg in sys.argv[1:]:
+        if arg.startswith('--size='):
+            size = arg.removeprefix('--size=')
+        elif arg.startswith('--shapes='):
+            shapes = arg.removeprefix('--shapes=').split(',')
+        elif arg.startswith('--warmup='):
+            warmup = int(arg.removeprefix('--warmup='))
+        elif arg.startswith('--repeat='):
+            repeat = int(arg.removeprefix('--repeat='))
+        elif arg.startswith('--output='):
+            output = arg.removeprefix('--output=')
+        elif arg.startswith('--compare='):
+            baseline_file = arg.removeprefix('--compare=')
+        elif arg.startswith('--threshold='):
+            threshold = float(arg.removeprefix('--threshold='))
+        else:
+            print(__doc__, file=sys.stderr)
+            return 1
+
+    results = []
+    for shape in shapes:
+        for result in run_shape(shape, SIZES[size][shape], warmup, repeat):
+            print(result)
+            results.append(result)
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'size': size,
+                'results': [asdict(result) for result in results],
+            }, f, indent=2)
+    if baseline_file is not None:
+        with open(baseline_file) as f:
+            if compare(results, json.load(f), threshold):
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""Single character edits of a large program, parsed in full and
+incrementally.
+
+Run with: poetry run python -m benchmarks.incremental_bench
+"""
+import random
+import time
+
+from compiler.incremental import IncrementalParser
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from benchmarks.common import best_of, generate_program
+
+
+def main() -> None:
+    rng = random.Random(0)
+    for statements in [1000, 10000]:
+        source = generate_program(statements)
+        parser = IncrementalParser(source)
+        parser.parse()
+        full_time, _ = best_of(lambda: parse(tokenize(parser.source)), repeat=3)
+
+        # Each edit changes a digit, so the program stays valid.
+        digits = [i for i, c in enumerate(source) if c.isdigit()]
+        edits = 200
+        reparsed = 0
+        start = time.perf_counter()
+        for _ in range(edits):
+            parser.edit(rng.choice(digits), 1, str(rng.randrange(1, 10)))
+            assert not parser.stats.full_parse
+            reparsed += parser.stats.reparsed_tokens
+        edit_time = (time.perf_counter() - start) / edits
+        print(f'{statements:6d} statements   {len(parser.tokens):7d} tokens   full {full_time * 1000:7.1f} ms   '
+              f'edit {edit_time * 1000:6.3f} ms ({reparsed / edits:4.1f} tokens parsed)   '
+              f'speedup {full_time / edit_time:6.0f}x')
+
+
+if __name__ == '__main__':
+    main()
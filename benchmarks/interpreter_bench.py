@@ -0,0 +1,57 @@
+"""Tree-walking interpreter against the closure-compiling engine on loops.
+
+Run with: poetry run python -m benchmarks.interpreter_bench
+"""
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import best_of
+
+PROGRAMS = {
+    'counter loop, 200k iterations': """
+        var i = 0;
+        var total = 0;
+        while i < 200000 do {
+            i = i + 1;
+            total = total + i;
+        }
+    """,
+    'nested loops, 300 x 300': """
+        var i = 0;
+        var total = 0;
+        while i < 300 do {
+            var j = 0;
+            while j < 300 do {
+                total = total + j;
+                j = j + 1;
+            }
+            i = i + 1;
+        }
+    """,
+    'loop with branches, 100k iterations': """
+        var i = 0;
+        var total = 0;
+        while i < 100000 do {
+            if total < 1000 then {
+                total = total + i;
+            } else {
+                total = 0;
+            }
+            i = i + 1;
+        }
+    """,
+}
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        expr = parse(tokenize(source))
+        typecheck(expr)
+        tree_time, _ = best_of(lambda: interpret(expr, engine='tree'), repeat=3)
+        closures_time, _ = best_of(lambda: interpret(expr, engine='closures'), repeat=3)
+        print(f'{name:38s} tree {tree_time * 1000:8.1f} ms   closures {closures_time * 1000:8.1f} ms   speedup {tree_time / closures_time:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
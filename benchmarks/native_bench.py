@@ -0,0 +1,38 @@
+"""Native executables against the interpreters on loop-heavy programs.
+
+The native time includes starting the process. Needs the `as` and `ld`
+programs.
+
+Run with: poetry run python -m benchmarks.native_bench
+"""
+import os
+import subprocess
+import tempfile
+
+from compiler.assembler import assemble
+from compiler.assembly_generator import generate_assembly
+from compiler.interpreter import interpret
+from compiler.ir_generator import generate_ir
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import best_of
+from benchmarks.vm_bench import PROGRAMS
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, source in PROGRAMS.items():
+            expr = parse(tokenize(source))
+            typecheck(expr)
+            executable = os.path.join(workdir, name)
+            assemble(generate_assembly(generate_ir(expr)), executable)
+            tree_time, _ = best_of(lambda: interpret(expr, engine='tree'), repeat=3)
+            closures_time, _ = best_of(lambda: interpret(expr, engine='closures'), repeat=3)
+            native_time, _ = best_of(lambda: subprocess.run([executable], check=True), repeat=3)
+            print(f'{name:12s} tree {tree_time * 1000:8.1f} ms   closures {closures_time * 1000:7.1f} ms   '
+                  f'native {native_time * 1000:6.2f} ms   native speedup over tree {tree_time / native_time:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
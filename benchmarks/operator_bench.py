@@ -0,0 +1,47 @@
+"""Cost of each operator in the tree-walking interpreter.
+
+Every program runs the same loop, which evaluates one operator expression
+per iteration; the 'none' row evaluates a plain variable instead, so the
+difference to it is the cost of the operator.
+
+Run with: poetry run python -m benchmarks.operator_bench
+"""
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import best_of
+
+ITERATIONS = 20000
+
+EXPRESSIONS = {
+    'none': 'a',
+    '+': 'a + b', '-': 'a - b', '*': 'a * b', '/': 'a / b', '%': 'a % b',
+    '<': 'a < b', '<=': 'a <= b', '>': 'a > b', '>=': 'a >= b',
+    '==': 'a == b', '!=': 'a != b',
+    'and': 't and f', 'or': 'f or t',
+    'unary -': '- a', 'not': 'not t',
+}
+
+
+def main() -> None:
+    baseline = 0.0
+    for name, expression in EXPRESSIONS.items():
+        source = f"""
+            var a = 7; var b = 3; var t = true; var f = false; var i = 0;
+            while i < {ITERATIONS} do {{
+                {expression};
+                i = i + 1;
+            }}
+        """
+        expr = parse(tokenize(source))
+        typecheck(expr)
+        time, _ = best_of(lambda: interpret(expr), repeat=3)
+        per_iteration = time / ITERATIONS * 1e9
+        if name == 'none':
+            baseline = per_iteration
+        print(f'{name:8s} {per_iteration:7.0f} ns per iteration   {per_iteration - baseline:+6.0f} ns for the operator')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""The closure compiler and the VM with and without constant folding, on a loop full of
+constant expressions.
+
+Run with: poetry run python -m benchmarks.optimizer_bench
+"""
+from typing import Callable
+
+from compiler import ast
+from compiler.bytecode import compile_bytecode
+from compiler.interpreter import interpret
+from compiler.optimizer import FoldStats, fold_constants
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from compiler.vm import run_vm
+from benchmarks.common import best_of
+
+SOURCE = """
+    var i = 0;
+    var total = 0;
+    while i < 20000 do {
+        if true then total = total + (3 + 4 * 2) * 1 else total = total - 1;
+        if 10 / 3 == 3 and not false then total = total + i + 0;
+        while false do total = 0;
+        i = i + 1;
+    }
+"""
+
+
+def main() -> None:
+    plain = parse(tokenize(SOURCE))
+    typecheck(plain)
+    folded = parse(tokenize(SOURCE))
+    typecheck(folded)
+    stats = FoldStats()
+    folded = fold_constants(folded, stats)
+    print(stats)
+    engines: dict[str, Callable[[ast.Expression], object]] = {
+        'closures': lambda program: interpret(program, 'closures'),
+        'vm': lambda program: run_vm(compile_bytecode(program)),
+    }
+    for engine, run in engines.items():
+        plain_time, _ = best_of(lambda: run(plain), repeat=3)
+        folded_time, _ = best_of(lambda: run(folded), repeat=3)
+        print(f'{engine:9s} unfolded {plain_time * 1000:8.1f} ms   folded {folded_time * 1000:8.1f} ms   '
+              f'speedup {plain_time / folded_time:4.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Parser throughput on long operator chains and deeply nested programs.
+
+Run with: poetry run python -m benchmarks.parser_bench
+"""
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from benchmarks.common import generate_program, best_of
+
+
+def arithmetic_chain(operands: int) -> str:
+    operators = ['+', '*', '-', '/', '%', '<', '==', 'and', 'or']
+    parts = ['1']
+    for i in range(1, operands):
+        parts.append(f'{operators[i % len(operators)]} {i}')
+    return ' '.join(parts) + ';'
+
+
+def nested_parentheses(depth: int) -> str:
+    return '(' * depth + '1' + ' + 1)' * depth + ';'
+
+
+def nested_blocks(depth: int) -> str:
+    return '{ var x = 1; ' * depth + 'x' + ' }' * depth
+
+
+def main() -> None:
+    programs = [
+        ('arithmetic chain, 100k operands', arithmetic_chain(100_000)),
+        ('nested parentheses, depth 90', nested_parentheses(90)),
+        ('nested blocks, depth 90', nested_blocks(90)),
+        ('generated program, 20k statements', generate_program(20_000)),
+    ]
+    for name, source in programs:
+        tokens = tokenize(source)
+        elapsed, _ = best_of(lambda: parse(tokens), repeat=3)
+        print(f'{name:36s} {len(tokens):8d} tokens {elapsed * 1000:9.2f} ms {len(tokens) / elapsed:10.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
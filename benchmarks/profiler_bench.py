@@ -0,0 +1,29 @@
+"""The tree-walking interpreter with and without an ExecutionProfile, and
+with the profile's report.
+
+Run with: poetry run python -m benchmarks.profiler_bench
+"""
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.profiler import ExecutionProfile
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import best_of
+from benchmarks.interpreter_bench import PROGRAMS
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        expr = parse(tokenize(source))
+        typecheck(expr)
+        plain_time, _ = best_of(lambda: interpret(expr), repeat=3)
+        profiled_time, _ = best_of(lambda: interpret(expr, profile=ExecutionProfile()), repeat=3)
+        print(f'{name:38s} plain {plain_time * 1000:8.1f} ms   profiled {profiled_time * 1000:8.1f} ms   '
+              f'overhead {profiled_time / plain_time:5.1f}x')
+    profile = ExecutionProfile()
+    interpret(expr, profile=profile)
+    print(f'\n{name}:\n{profile.report(5)}')
+
+
+if __name__ == '__main__':
+    main()
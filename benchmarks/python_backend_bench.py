@@ -0,0 +1,32 @@
+"""Python source backend against the other engines.
+
+Run with: poetry run python -m benchmarks.python_backend_bench
+"""
+from compiler.bytecode import compile_bytecode
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.python_backend import run_python
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from compiler.vm import run_vm
+from benchmarks.common import best_of
+from benchmarks.vm_bench import PROGRAMS
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        expr = parse(tokenize(source))
+        typecheck(expr)
+        program = compile_bytecode(expr)
+        tree_time, _ = best_of(lambda: interpret(expr, engine='tree'), repeat=3)
+        closures_time, _ = best_of(lambda: interpret(expr, engine='closures'), repeat=3)
+        vm_time, _ = best_of(lambda: run_vm(program), repeat=3)
+        # Includes generating the source; the code object comes from the cache.
+        python_time, _ = best_of(lambda: run_python(expr), repeat=3)
+        print(f'{name:12s} tree {tree_time * 1000:8.1f} ms   closures {closures_time * 1000:7.1f} ms   '
+              f'vm {vm_time * 1000:7.1f} ms   python {python_time * 1000:6.1f} ms   '
+              f'python speedup over tree {tree_time / python_time:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
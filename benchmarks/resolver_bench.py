@@ -0,0 +1,34 @@
+"""Typechecking and running programs that read variables from deep inside
+nested blocks.
+
+Each program declares variables at the top and reads them in a loop from
+inside DEPTH nested blocks, so scope lookups dominate.
+
+Run with: poetry run python -m benchmarks.resolver_bench
+"""
+from compiler.bytecode import compile_bytecode
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from compiler.vm import run_vm
+from benchmarks.common import best_of
+
+
+def nested_program(depth: int, reads: int) -> str:
+    body = ' '.join(f'total = total + a + b + c;' for _ in range(reads))
+    return ('var a = 1; var b = 2; var c = 3; var total = 0; '
+            + '{ ' * depth + body + ' }' * depth)
+
+
+def main() -> None:
+    for depth in [10, 100, 1000, 5000]:
+        source = nested_program(depth, reads=2000)
+        expr = parse(tokenize(source))
+        typecheck_time, _ = best_of(lambda: typecheck(expr), repeat=3)
+        vm_time, _ = best_of(lambda: run_vm(compile_bytecode(expr)), repeat=3)
+        print(f'depth {depth:5d}   typecheck {typecheck_time * 1000:8.1f} ms   '
+              f'vm (compile and run) {vm_time * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
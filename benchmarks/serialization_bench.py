@@ -0,0 +1,35 @@
+"""Size and load time of serialized ASTs, compared with pickle.
+
+Run with: poetry run python -m benchmarks.serialization_bench
+"""
+import os
+import pickle
+import tempfile
+
+from compiler.parser import parse
+from compiler.serialization import dump_ast, load_ast, read_ast_file, write_ast_file
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from benchmarks.common import best_of, generate_program
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.ast')
+        for statements in [100, 1000, 10000]:
+            expr = parse(tokenize(generate_program(statements)))
+            typecheck(expr)
+            pickled = pickle.dumps(expr, pickle.HIGHEST_PROTOCOL)
+            dumped = dump_ast(expr)
+            write_ast_file(path, expr)
+
+            pickle_time, _ = best_of(lambda: pickle.loads(pickled), repeat=3)
+            load_time, _ = best_of(lambda: load_ast(dumped), repeat=3)
+            mmap_time, _ = best_of(lambda: read_ast_file(path), repeat=3)
+            print(f'{statements:6d} statements   pickle {len(pickled):9d} B {pickle_time * 1000:7.1f} ms   '
+                  f'binary {len(dumped):8d} B {load_time * 1000:7.1f} ms   '
+                  f'mmap {mmap_time * 1000:7.1f} ms   size {len(pickled) / len(dumped):4.1f}x smaller')
+
+
+if __name__ == '__main__':
+    main()
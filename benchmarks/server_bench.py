@@ -0,0 +1,50 @@
+"""Latency of a command run by a fresh compiler process (cold) and forwarded
+to a running compile server by the client (warm).
+
+Run with: poetry run python -m benchmarks.server_bench
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from compiler.client import request
+from benchmarks.common import best_of, generate_program
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.src')
+        with open(path, 'w') as f:
+            f.write(generate_program(20))
+        socket_path = os.path.join(directory, 'server.sock')
+        env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+        server = subprocess.Popen([sys.executable, '-m', 'compiler', 'serve', f'--socket={socket_path}'], env=env)
+        try:
+            while not os.path.exists(socket_path):
+                time.sleep(0.01)
+            for command in ['typecheck', 'interpret']:
+                argv = [command, '--no-cache', path]
+
+                def cold() -> object:
+                    return subprocess.run([sys.executable, '-m', 'compiler', *argv],
+                                          env=env, check=True, stdout=subprocess.DEVNULL)
+
+                def warm() -> object:
+                    return subprocess.run([sys.executable, '-m', 'compiler.client', *argv],
+                                          env={**env, 'COMPILER_SERVER': socket_path},
+                                          check=True, stdout=subprocess.DEVNULL)
+
+                cold_time, _ = best_of(cold, repeat=10)
+                warm_time, _ = best_of(warm, repeat=10)
+                request_time, _ = best_of(lambda: request(argv, socket_path=socket_path), repeat=10)
+                print(f'{command:10s}   cold {cold_time * 1000:6.1f} ms   warm client {warm_time * 1000:6.1f} ms   '
+                      f'request alone {request_time * 1000:5.1f} ms   speedup {cold_time / warm_time:4.1f}x')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
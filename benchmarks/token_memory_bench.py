@@ -0,0 +1,32 @@
+"""Memory held by the tokens of a large program.
+
+Run with: poetry run python -m benchmarks.token_memory_bench
+"""
+import tracemalloc
+from typing import Callable, Sized
+from compiler.tokenizer import tokenize, tokenize_buffer
+from benchmarks.common import generate_program
+
+
+def retained_memory(func: Callable[[], Sized]) -> tuple[int, int]:
+    """Returns the number of tokens and the bytes they keep allocated."""
+    tracemalloc.start()
+    tokens = func()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(tokens), retained
+
+
+def main() -> None:
+    source = generate_program(50_000)
+    tokenizers: list[tuple[str, Callable[[], Sized]]] = [
+        ('list[Token]', lambda: tokenize(source)),
+        ('TokenBuffer', lambda: tokenize_buffer(source)),
+    ]
+    for name, func in tokenizers:
+        count, retained = retained_memory(func)
+        print(f'{name}: {count} tokens, {retained / 1e6:7.2f} MB, {retained / count:6.1f} bytes/token')
+
+
+if __name__ == '__main__':
+    main()
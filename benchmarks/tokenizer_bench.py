@@ -0,0 +1,22 @@
+"""Tokens per second of tokenize() against the original tokenizer.
+
+Run with: poetry run python -m benchmarks.tokenizer_bench
+"""
+from compiler.tokenizer import tokenize, tokenize_legacy
+from benchmarks.common import generate_program, best_of
+
+
+def main() -> None:
+    for statements in [1_000, 10_000, 50_000]:
+        source = generate_program(statements)
+        legacy_time, legacy_tokens = best_of(lambda: tokenize_legacy(source), repeat=3)
+        new_time, tokens = best_of(lambda: tokenize(source), repeat=3)
+        assert tokens == legacy_tokens
+        print(f'{len(source) / 1e6:6.2f} MB, {len(tokens):8d} tokens: '
+              f'legacy {len(tokens) / legacy_time:10.0f} tokens/s, '
+              f'tokenize {len(tokens) / new_time:10.0f} tokens/s, '
+              f'speedup {legacy_time / new_time:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
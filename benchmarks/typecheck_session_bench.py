@@ -0,0 +1,44 @@
+"""Typechecking a large program after single character edits, in full and
+with a TypecheckSession.
+
+Run with: poetry run python -m benchmarks.typecheck_session_bench
+"""
+import random
+import time
+
+from compiler.incremental import IncrementalParser
+from compiler.optimizer import count_nodes
+from compiler.resolver import resolve
+from compiler.typechecker import TypecheckSession, typecheck
+from benchmarks.common import best_of, generate_program
+
+
+def main() -> None:
+    rng = random.Random(0)
+    for statements in [1000, 10000]:
+        source = generate_program(statements)
+        parser = IncrementalParser(source)
+        root = parser.parse()
+        session = TypecheckSession()
+        typecheck(root, session=session)
+        full_time, _ = best_of(lambda: typecheck(parser.parse()), repeat=3)
+        resolve_time, _ = best_of(lambda: resolve(parser.parse()), repeat=3)
+
+        digits = [i for i, c in enumerate(source) if c.isdigit()]
+        edits = 100
+        checked_nodes = 0
+        session_time = 0.0
+        for _ in range(edits):
+            root = parser.edit(rng.choice(digits), 1, str(rng.randrange(1, 10)))
+            start = time.perf_counter()
+            typecheck(root, session=session)
+            session_time += time.perf_counter() - start
+            checked_nodes += session.checked_nodes
+        session_time /= edits
+        print(f'{statements:6d} statements   {count_nodes(root):7d} nodes   full {full_time * 1000:7.1f} ms   '
+              f'session {session_time * 1000:6.1f} ms ({checked_nodes / edits:5.1f} nodes checked, '
+              f'resolving takes {resolve_time * 1000:5.1f} ms)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Bytecode VM against the tree-walking and closure-compiling interpreters.
+
+Run with: poetry run python -m benchmarks.vm_bench
+"""
+from compiler.bytecode import compile_bytecode
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from compiler.vm import run_vm
+from benchmarks.common import best_of
+
+PROGRAMS = {
+    'loops': """
+        var i = 0;
+        var total = 0;
+        while i < 300 do {
+            var j = 0;
+            while j < 300 do {
+                total = total + j;
+                j = j + 1;
+            }
+            i = i + 1;
+        }
+    """,
+    'arithmetic': """
+        var i = 0;
+        var total = 0;
+        while i < 30000 do {
+            total = total + (i + 1) + (i + 2) + (i + 3) + (i + 4) + (i + 5) + (i + 6) + (i + 7);
+            i = i + 1;
+        }
+    """,
+    'branching': """
+        var i = 0;
+        var total = 0;
+        while i < 100000 do {
+            if total < 1000 then {
+                if i < 50000 then total = total + i else total = total + 1;
+            } else {
+                total = 0;
+            }
+            i = i + 1;
+        }
+    """,
+}
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        expr = parse(tokenize(source))
+        typecheck(expr)
+        program = compile_bytecode(expr)
+        tree_time, _ = best_of(lambda: interpret(expr, engine='tree'), repeat=3)
+        closures_time, _ = best_of(lambda: interpret(expr, engine='closures'), repeat=3)
+        vm_time, _ = best_of(lambda: run_vm(program), repeat=3)
+        print(f'{name:12s} tree {tree_time * 1000:8.1f} ms   closures {closures_time * 1000:7.1f} ms   '
+              f'vm {vm_time * 1000:7.1f} ms   vm speedup over tree {tree_time / vm_time:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,7 @@
 #!/bin/bash
 set -euo pipefail
+if [ -S "${COMPILER_SERVER:-}" ]; then
+    # The client only needs the standard library, so it skips Poetry too.
+    PYTHONPATH="$(dirname "${0}")/src" exec python3 -m compiler.client "$@"
+fi
 exec poetry run main "$@"
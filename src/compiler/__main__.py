@@ -1,52 +1,357 @@
+import asyncio
+import contextlib
+import cProfile
+import pstats
 import sys
+from typing import ContextManager
+from compiler import ast
+from compiler.assembler import assemble
+from compiler.assembly_generator import generate_assembly
+from compiler.batch import check_files, expand_paths
+from compiler.bytecode import compile_bytecode, compile_ir
+from compiler.cache import CompileCache, default_cache_dir
+from compiler.client import default_socket_path
+from compiler.diagnostics import CompileErrors, Diagnostics
+from compiler.interpreter import interpret, interpret_lower
+from compiler.ir import Instruction
+from compiler.ir_generator import generate_ir
+from compiler.optimizer import FoldStats, count_nodes, fold_constants
+from compiler.parser import parse
+from compiler.passes import default_passes
+from compiler.profiler import ExecutionProfile
+from compiler.python_backend import run_python
+from compiler.server import serve
+from compiler.timings import PhaseTiming, Timings
+from compiler.tokenizer import Readable, tokenize, tokenize_stream
+from compiler.typechecker import typecheck, typecheck_lower
+from compiler.vm import run_vm
 
 # TODO(student): add more commands as needed
 usage = f"""
 Usage: {sys.argv[0]} <command> [source_code_file]
 
+Commands 'tokenize', 'parse' and 'typecheck':
+    Print the tokens, the AST or the type of source code.
+
+All commands print every parse and type error of source code, by location,
+before failing.
+
 Command 'interpret':
     Runs the interpreter on source code.
 
+    --engine=ENGINE         'tree' (default) walks the AST, 'closures'
+                            compiles it to Python closures first, 'ir' runs
+                            the optimized IR.
+    --profile-program       Prints how often each source row, loop and binary
+                            operation was evaluated and how long it took,
+                            hottest first, to standard error. Only with the
+                            tree engine, which it slows down about four times.
+
+Command 'vm':
+    Compiles source code to bytecode and runs it on the bytecode VM.
+
+    --from-ir               Compiles the optimized IR instead of the AST.
+
+Command 'pyexec':
+    Translates source code to Python and runs it with CPython.
+
+Command 'ir':
+    Prints the optimized IR generated for source code.
+
+Command 'asm':
+    Prints the x86-64 assembly generated for source code.
+
+Command 'compile':
+    Compiles source code to a native executable with `as` and `ld`.
+
+    --output=FILE           The executable to write. Defaults to 'a.out'.
+
+Command 'batch' <file, directory or glob>...:
+    Typechecks many source files in parallel, and prints the result of each
+    and the total throughput. Fails if any file fails.
+
+    --jobs=N                The number of worker processes. Defaults to the
+                            number of CPUs.
+    --run                   Also runs each program, with --engine, and prints
+                            what it printed.
+
+Command 'serve':
+    Keeps a process with the compiler loaded answering the commands that
+    `python -m compiler.client <command> ...` forwards to it, which skips
+    starting and importing the compiler for every command. compiler.sh uses
+    the client when $COMPILER_SERVER names the server's socket.
+
+    --socket=PATH           The Unix domain socket to listen on. Defaults to
+                            $COMPILER_SERVER or compiler-UID.sock in the
+                            temporary directory.
+    --jobs=N                The number of worker processes, which is how many
+                            commands run at once. Defaults to the number of
+                            CPUs.
+
 Common arguments:
+    --optimize              Folds constants in the typechecked program.
+    --pass-report           Prints what constant folding eliminated, and the
+                            time and instruction count change of each IR
+                            pass, to standard error.
+    --no-cache              Always compiles the source instead of reusing the
+                            typechecked program from an earlier run. Standard
+                            input is never cached.
+    --cache-dir=DIR         Where to cache programs. Defaults to
+                            $COMPILER_CACHE_DIR or ~/.cache/compiler.
+    --cache-stats           Prints the cache hit and miss counts of all runs
+                            to standard error.
+    --timings[=json]        Prints the wall time, the memory blocks left
+                            allocated and the peak memory of each phase, with
+                            counts of tokens, AST nodes, nodes checked,
+                            symbol table lookups and nodes evaluated, to
+                            standard error, as text or JSON. Tracing memory and
+                            counting slow the phases down several times, so
+                            compare their wall times with each other. The
+                            source is tokenized before parsing instead of
+                            while it is read, and evaluations are only
+                            counted with --engine=tree.
+    --profile[=FILE]        Runs the command under cProfile, and prints the
+                            functions that took the most time to standard
+                            error, or writes the statistics to FILE for pstats.
     source_code_file        Optional. Defaults to standard input if missing.
  """.strip() + "\n"
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     command: str | None = None
-    input_file: str | None = None
-    for arg in sys.argv[1:]:
+    input_files: list[str] = []
+    engine = 'tree'
+    output_file = 'a.out'
+    from_ir = False
+    pass_report = False
+    optimize = False
+    use_cache = True
+    cache_dir = default_cache_dir()
+    cache_stats = False
+    jobs: int | None = None
+    batch_run = False
+    socket_path = default_socket_path()
+    timings: Timings | None = None
+    timings_format = 'text'
+    profile = False
+    profile_file: str | None = None
+    program_profile: ExecutionProfile | None = None
+    for arg in sys.argv[1:] if argv is None else argv:
         if arg in ['-h', '--help']:
             print(usage)
             return 0
+        elif arg.startswith('--engine='):
+            engine = arg.removeprefix('--engine=')
+        elif arg.startswith('--output='):
+            output_file = arg.removeprefix('--output=')
+        elif arg == '--from-ir':
+            from_ir = True
+        elif arg == '--pass-report':
+            pass_report = True
+        elif arg == '--optimize':
+            optimize = True
+        elif arg == '--no-cache':
+            use_cache = False
+        elif arg.startswith('--cache-dir='):
+            cache_dir = arg.removeprefix('--cache-dir=')
+        elif arg == '--cache-stats':
+            cache_stats = True
+        elif arg.startswith('--jobs='):
+            jobs = int(arg.removeprefix('--jobs='))
+        elif arg == '--run':
+            batch_run = True
+        elif arg.startswith('--socket='):
+            socket_path = arg.removeprefix('--socket=')
+        elif arg in ['--timings', '--timings=text', '--timings=json']:
+            timings = Timings()
+            timings_format = arg.removeprefix('--timings').removeprefix('=') or 'text'
+        elif arg == '--profile-program':
+            program_profile = ExecutionProfile()
+        elif arg == '--profile':
+            profile = True
+        elif arg.startswith('--profile='):
+            profile = True
+            profile_file = arg.removeprefix('--profile=')
         elif arg.startswith('-'):
             raise Exception(f"Unknown argument: {arg}")
         elif command is None:
             command = arg
-        elif input_file is None:
-            input_file = arg
         else:
-            raise Exception("Multiple input files not supported")
+            input_files.append(arg)
+    if len(input_files) > 1 and command != 'batch':
+        raise Exception("Multiple input files not supported")
+    input_file = input_files[0] if input_files else None
+    # Parse and type errors are collected, and reported together.
+    diagnostics = Diagnostics()
 
-    def read_source_code() -> str:
+    def phase(name: str, count: dict[str, list] | None = None) -> ContextManager[PhaseTiming | None]:
+        return timings.phase(name, count) if timings is not None else contextlib.nullcontext()
+
+    def read_source() -> str:
         if input_file is not None:
             with open(input_file) as f:
                 return f.read()
         else:
             return sys.stdin.read()
 
+    def parse_source(source: str) -> ast.Expression:
+        with phase('tokenize') as timing:
+            tokens = tokenize(source)
+        if timing is not None:
+            timing.counters['tokens'] = len(tokens)
+        with phase('parse') as timing:
+            root = parse(tokens, diagnostics=diagnostics)
+        if timing is not None:
+            timing.counters['ast_nodes'] = count_nodes(root)
+        return root
+
+    def parse_stream(source: Readable) -> ast.Expression:
+        if timings is not None:
+            return parse_source(source.read(-1))
+        # The source is tokenized while it is read, so large inputs are never
+        # held in memory as a whole.
+        return parse(tokenize_stream(source), diagnostics=diagnostics)
+
+    def parse_source_code() -> ast.Expression:
+        if input_file is not None:
+            with open(input_file) as f:
+                return parse_stream(f)
+        else:
+            return parse_stream(sys.stdin)
+
+    def check(root: ast.Expression) -> ast.Expression:
+        with phase('typecheck', {'nodes_checked': [typecheck_lower]}) as timing:
+            typecheck(root, diagnostics=diagnostics)
+        diagnostics.raise_errors()
+        if timing is not None:
+            # The resolver looks every identifier up once, and the checker
+            # and the engines use the slot it found.
+            timing.counters['symbol_lookups'] = count_nodes(root, ast.Identifier)
+        if optimize:
+            stats = FoldStats()
+            with phase('optimize'):
+                root = fold_constants(root, stats)
+            if pass_report:
+                print(stats, file=sys.stderr)
+        return root
+
+    cache = CompileCache(cache_dir) if use_cache else None
+
+    def check_source_code() -> ast.Expression:
+        # Standard input can be read only once, so its hash would only be
+        # known after parsing it, when a hit saves next to nothing.
+        if cache is None or input_file is None:
+            return check(parse_source_code())
+        option = f'optimize={optimize}'
+        # The file is hashed a chunk at a time, and read again on a miss.
+        with phase('cache load'):
+            with open(input_file) as f:
+                root = cache.load(cache.key_of_file(f, option))
+        if root is not None:
+            return root
+        # Stored under the key of what was parsed, in case the file changed.
+        with open(input_file) as f:
+            reader = cache.reader(f, option)
+            root = parse_stream(reader)
+        root = check(root)
+        key = reader.key()
+        with phase('cache store'):
+            cache.store(key, root)
+        return root
+
+    def optimized_ir(root: ast.Expression) -> list[Instruction]:
+        passes = default_passes()
+        instructions = passes.run(generate_ir(root))
+        if pass_report:
+            print(passes.report(), file=sys.stderr)
+        return instructions
+
     if command is None:
         print(f"Error: command argument missing\n\n{usage}", file=sys.stderr)
         return 1
 
-    if command == 'interpret':
-        source_code = read_source_code()
-        ...  # TODO(student)
-    else:
-        print(f"Error: unknown command: {command}\n\n{usage}", file=sys.stderr)
-        return 1
-    return 0
+    def run_command() -> int:
+        if command == 'batch':
+            report = check_files(expand_paths(input_files), jobs, batch_run, engine)
+            for result in report.results:
+                print(result)
+                print(result.output, end='')
+            print(report)
+            return 1 if report.failed else 0
+        elif command == 'serve':
+            try:
+                asyncio.run(serve(socket_path, main, jobs))
+            except KeyboardInterrupt:
+                pass
+            return 0
+        elif command == 'tokenize':
+            source = read_source()
+            with phase('tokenize') as timing:
+                tokens = tokenize(source)
+            if timing is not None:
+                timing.counters['tokens'] = len(tokens)
+            for token in tokens:
+                print(token)
+        elif command == 'parse':
+            root = parse_source_code()
+            diagnostics.raise_errors()
+            print(root)
+        elif command == 'typecheck':
+            print(check_source_code().type)
+        elif command == 'interpret':
+            root = check_source_code()
+            counted: dict[str, list] | None = {'nodes_evaluated': [interpret_lower]} if engine == 'tree' else None
+            with phase('interpret', counted):
+                interpret(root, engine, program_profile)
+            if program_profile is not None:
+                print(program_profile.report(), file=sys.stderr)
+        elif command == 'vm':
+            root = check_source_code()
+            with phase('vm'):
+                run_vm(compile_ir(optimized_ir(root)) if from_ir else compile_bytecode(root))
+        elif command == 'pyexec':
+            root = check_source_code()
+            with phase('pyexec'):
+                run_python(root)
+        elif command == 'ir':
+            root = check_source_code()
+            with phase('ir'):
+                instructions = optimized_ir(root)
+            for instruction in instructions:
+                print(instruction)
+        elif command in ['asm', 'compile']:
+            root = check_source_code()
+            with phase(command):
+                asm_code = generate_assembly(optimized_ir(root))
+                if command == 'compile':
+                    assemble(asm_code, output_file)
+            if command == 'asm':
+                print(asm_code, end='')
+        else:
+            print(f"Error: unknown command: {command}\n\n{usage}", file=sys.stderr)
+            return 1
+        if cache is not None:
+            cache.save_stats()
+            if cache_stats:
+                print(cache.total_stats(), file=sys.stderr)
+        return 0
 
+    try:
+        if profile:
+            profiler = cProfile.Profile()
+            status = profiler.runcall(run_command)
+            if profile_file is not None:
+                profiler.dump_stats(profile_file)
+            else:
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(30)
+        else:
+            status = run_command()
+    except CompileErrors as errors:
+        print(errors, file=sys.stderr)
+        return 1
+    if timings is not None:
+        print(timings.to_json() if timings_format == 'json' else timings, file=sys.stderr)
+    return status
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import tempfile
+
+# The runtime linked into every executable. It talks to Linux with system
+# calls directly, so no C library is needed.
+runtime_assembly = """
+.global _start
+.global print_int
+.global print_bool
+.section .text
+
+_start:
+    call main
+    movq %rax, %rdi
+    movq $60, %rax          # exit
+    syscall
+
+# Prints %rdi as a decimal integer and a newline.
+print_int:
+    pushq %rbp
+    movq %rsp, %rbp
+    subq $32, %rsp
+    movq %rdi, %rax
+    movq %rdi, %r8
+    # Digits are written backwards from the end of the buffer. Negating
+    # -2^63 gives 2^63 as an unsigned number, so divq handles it too.
+    leaq -1(%rbp), %rsi
+    movb $10, (%rsi)
+    testq %rax, %rax
+    jns 1f
+    negq %rax
+1:
+    movq $10, %rcx
+    xorq %rdx, %rdx
+    divq %rcx
+    addb $48, %dl
+    decq %rsi
+    movb %dl, (%rsi)
+    testq %rax, %rax
+    jnz 1b
+    testq %r8, %r8
+    jns 2f
+    decq %rsi
+    movb $45, (%rsi)
+2:
+    movq %rbp, %rdx
+    subq %rsi, %rdx
+    movq $1, %rdi           # stdout
+    movq $1, %rax           # write
+    syscall
+    movq %rbp, %rsp
+    popq %rbp
+    ret
+
+# Prints "true" or "false" and a newline.
+print_bool:
+    testq %rdi, %rdi
+    jz 1f
+    leaq true_text(%rip), %rsi
+    movq $5, %rdx
+    jmp 2f
+1:
+    leaq false_text(%rip), %rsi
+    movq $6, %rdx
+2:
+    movq $1, %rdi           # stdout
+    movq $1, %rax           # write
+    syscall
+    ret
+
+.section .rodata
+true_text:
+    .ascii "true\\n"
+false_text:
+    .ascii "false\\n"
+"""
+
+def assemble(assembly_code: str, output_file: str) -> None:
+    """Assembles and links code from generate_assembly() with the runtime
+    into a static Linux executable, using the `as` and `ld` programs."""
+    with tempfile.TemporaryDirectory() as workdir:
+        source_file = os.path.join(workdir, 'program.s')
+        object_file = os.path.join(workdir, 'program.o')
+        with open(source_file, 'w') as f:
+            f.write(runtime_assembly)
+            f.write(assembly_code)
+        for command in [
+            ['as', '-g', '-o', object_file, source_file],
+            ['ld', '-static', '-o', output_file, object_file],
+        ]:
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise Exception(f'{command[0]} failed:\n{result.stderr}')
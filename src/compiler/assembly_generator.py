@@ -0,0 +1,163 @@
+from typing import Callable, TypeAlias
+
+from compiler import ir
+
+# An operator compiled inline: gets the stack locations of its arguments and
+# of its result, and returns the instructions.
+Intrinsic: TypeAlias = Callable[[list[str], str], list[str]]
+
+def _arithmetic(instruction: str) -> Intrinsic:
+    def emit(args: list[str], dest: str) -> list[str]:
+        return [f'movq {args[0]}, %rax', f'{instruction} {args[1]}, %rax', f'movq %rax, {dest}']
+    return emit
+
+def _division(result_register: str) -> Intrinsic:
+    def emit(args: list[str], dest: str) -> list[str]:
+        return [f'movq {args[0]}, %rax', 'cqto', f'idivq {args[1]}', f'movq {result_register}, {dest}']
+    return emit
+
+def _comparison(setcc: str) -> Intrinsic:
+    def emit(args: list[str], dest: str) -> list[str]:
+        return [
+            'xorq %rax, %rax',
+            f'movq {args[0]}, %rdx',
+            f'cmpq {args[1]}, %rdx',
+            f'{setcc} %al',
+            f'movq %rax, {dest}',
+        ]
+    return emit
+
+def _unary(instruction: str) -> Intrinsic:
+    def emit(args: list[str], dest: str) -> list[str]:
+        return [f'movq {args[0]}, %rax', instruction, f'movq %rax, {dest}']
+    return emit
+
+intrinsics: dict[str, Intrinsic] = {
+    '+': _arithmetic('addq'),
+    '-': _arithmetic('subq'),
+    '*': _arithmetic('imulq'),
+    '/': _division('%rax'),
+    '%': _division('%rdx'),
+    '<': _comparison('setl'),
+    '<=': _comparison('setle'),
+    '>': _comparison('setg'),
+    '>=': _comparison('setge'),
+    '==': _comparison('sete'),
+    '!=': _comparison('setne'),
+    'unary_-': _unary('negq %rax'),
+    'not': _unary('xorq $1, %rax'),
+}
+
+# Builtins implemented in the runtime (see compiler.assembler).
+runtime_functions = ['print_int', 'print_bool']
+
+class Locals:
+    """Stack locations of the IR variables, relative to %rbp."""
+
+    def __init__(self, variables: list[ir.IRVar]) -> None:
+        self._var_to_location: dict[ir.IRVar, str] = {}
+        for i, var in enumerate(variables):
+            self._var_to_location[var] = f'-{8 * (i + 1)}(%rbp)'
+        # Keeps %rsp 16-byte aligned for calls.
+        self.stack_used = (8 * len(variables) + 15) // 16 * 16
+
+    def get_ref(self, var: ir.IRVar) -> str:
+        return self._var_to_location[var]
+
+def get_all_ir_variables(instructions: list[ir.Instruction]) -> list[ir.IRVar]:
+    result_list: list[ir.IRVar] = []
+    result_set: set[ir.IRVar] = set()
+
+    def add(var: ir.IRVar) -> None:
+        if var not in result_set:
+            result_set.add(var)
+            result_list.append(var)
+
+    for insn in instructions:
+        match insn:
+            case ir.LoadIntConst() | ir.LoadBoolConst():
+                add(insn.dest)
+            case ir.Copy():
+                add(insn.source)
+                add(insn.dest)
+            case ir.Call():
+                for arg in insn.args:
+                    add(arg)
+                add(insn.dest)
+            case ir.CondJump():
+                add(insn.cond)
+    return result_list
+
+def generate_assembly(instructions: list[ir.Instruction]) -> str:
+    """Generates x86-64 assembly (AT&T syntax) for the function `main`.
+
+    Every IR variable lives in its own stack slot; operators are compiled
+    inline and builtins are called in the runtime."""
+    lines: list[str] = []
+
+    def emit(line: str) -> None:
+        lines.append(f'    {line}')
+
+    def emit_label(name: str) -> None:
+        lines.append(f'{name}:')
+
+    locals = Locals(get_all_ir_variables(instructions))
+
+    lines.append('.global main')
+    lines.append('.type main, @function')
+    lines.append('.section .text')
+    emit_label('main')
+    emit('pushq %rbp')
+    emit('movq %rsp, %rbp')
+    emit(f'subq ${locals.stack_used}, %rsp')
+
+    for insn in instructions:
+        emit(f'# {insn}')
+        match insn:
+            case ir.Label():
+                emit_label(f'.{insn.name}')
+
+            case ir.LoadIntConst():
+                if -2**31 <= insn.value < 2**31:
+                    emit(f'movq ${insn.value}, {locals.get_ref(insn.dest)}')
+                else:
+                    emit(f'movabsq ${insn.value}, %rax')
+                    emit(f'movq %rax, {locals.get_ref(insn.dest)}')
+
+            case ir.LoadBoolConst():
+                emit(f'movq ${int(insn.value)}, {locals.get_ref(insn.dest)}')
+
+            case ir.Copy():
+                emit(f'movq {locals.get_ref(insn.source)}, %rax')
+                emit(f'movq %rax, {locals.get_ref(insn.dest)}')
+
+            case ir.Jump():
+                emit(f'jmp .{insn.label.name}')
+
+            case ir.CondJump():
+                emit(f'cmpq $0, {locals.get_ref(insn.cond)}')
+                emit(f'jne .{insn.then_label.name}')
+                emit(f'jmp .{insn.else_label.name}')
+
+            case ir.Call():
+                args = [locals.get_ref(arg) for arg in insn.args]
+                dest = locals.get_ref(insn.dest)
+                if insn.fun.name in intrinsics:
+                    for line in intrinsics[insn.fun.name](args, dest):
+                        emit(line)
+                elif insn.fun.name in runtime_functions:
+                    emit(f'movq {args[0]}, %rdi')
+                    emit(f'call {insn.fun.name}')
+                    emit(f'movq %rax, {dest}')
+                else:
+                    raise Exception(f'{insn.location}: Unknown function "{insn.fun.name}".')
+
+            case _:
+                raise Exception(f'{insn.location}: Unexpected instruction {insn}.')
+
+    emit('movq $0, %rax')
+    emit('movq %rbp, %rsp')
+    emit('popq %rbp')
+    emit('ret')
+
+    return ''.join(f'{line}\n' for line in lines)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from typing import Any, Callable
 from compiler.objs.location import Location
 from compiler.objs.types import Type, Unit
 
@@ -16,6 +17,8 @@ class Literal(Expression):
 @dataclass
 class Identifier(Expression):
     name: str
+    # The frame slot of the variable, set by compiler.resolver.
+    slot: int | None = field(kw_only=True, default=None, compare=False)
 
 @dataclass
 class TypeExpr:
@@ -29,6 +32,10 @@ class BinaryOp(Expression):
     left: Expression
     op: str
     right: Expression
+    # Set by compiler.resolver: the function of the operator, or for `and`
+    # and `or` the value of the left operand that decides the result.
+    function: Callable[[Any, Any], Any] | None = field(kw_only=True, default=None, compare=False, repr=False)
+    short_circuit: bool | None = field(kw_only=True, default=None, compare=False, repr=False)
 
 @dataclass
 class IfThenElse(Expression):
@@ -46,6 +53,8 @@ class FunctionNode(Expression):
 class UnaryOp(Expression):
     op: str
     element: Expression
+    # The function of the operator, set by compiler.resolver.
+    function: Callable[[Any], Any] | None = field(kw_only=True, default=None, compare=False, repr=False)
 
 @dataclass
 class Block(Expression):
@@ -68,6 +77,11 @@ class Assignment(Expression):
     left: Expression
     right: Expression
 
+@dataclass
+class ErrorExpression(Expression):
+    """Stands in for code that did not parse, when the parser collects
+    diagnostics (see compiler.diagnostics)."""
+
 
 
 
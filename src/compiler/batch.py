@@ -0,0 +1,112 @@
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+
+from compiler.diagnostics import Diagnostics
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+
+@dataclass
+class FileResult:
+    path: str
+    # The error message, or None if the file checked (and ran) fine.
+    error: str | None = None
+    # What the program printed, when it was run.
+    output: str = ''
+    lines: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        # The errors come last, as there may be many lines of them.
+        status = 'ok' if self.error is None else 'error'
+        errors = '' if self.error is None else f': {self.error}'
+        return f'{self.path}: {status} ({self.seconds * 1000:.1f} ms){errors}'
+
+@dataclass
+class BatchReport:
+    results: list[FileResult] = field(default_factory=list)
+    workers: int = 1
+    seconds: float = 0.0
+
+    @property
+    def failed(self) -> list[FileResult]:
+        return [result for result in self.results if result.error is not None]
+
+    def __str__(self) -> str:
+        files = len(self.results)
+        lines = sum(result.lines for result in self.results)
+        seconds = self.seconds or float('inf')
+        return (f'{files} files, {len(self.failed)} failed, {lines} lines in {self.seconds:.2f} s '
+                f'with {self.workers} workers ({files / seconds:.0f} files/s, {lines / seconds:.0f} lines/s)')
+
+def expand_paths(patterns: list[str]) -> list[str]:
+    """The files named by `patterns`: files as they are, every file under
+    directories, and the matches of glob patterns, which may use `**`."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                paths += [os.path.join(root, name) for name in sorted(files)]
+        elif any(c in pattern for c in '*?['):
+            paths += sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        else:
+            paths.append(pattern)
+    return paths
+
+def check_file(path: str, run: bool = False, engine: str = 'tree') -> FileResult:
+    """Tokenizes, parses and typechecks a file, and runs it if `run` is set.
+    Errors are reported in the result rather than raised, all the errors of
+    the program one per line."""
+    result = FileResult(path)
+    start = time.perf_counter()
+    try:
+        with open(path) as f:
+            source = f.read()
+        result.lines = source.count('\n') + 1
+        diagnostics = Diagnostics()
+        root = parse(tokenize(source), diagnostics=diagnostics)
+        typecheck(root, diagnostics=diagnostics)
+        diagnostics.raise_errors()
+        if run:
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    interpret(root, engine)
+            finally:
+                result.output = output.getvalue()
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    result.seconds = time.perf_counter() - start
+    return result
+
+def check_files(paths: list[str], workers: int | None = None, run: bool = False,
+                engine: str = 'tree') -> BatchReport:
+    """Checks files with check_file() in a pool of `workers` processes,
+    defaulting to one per CPU, and returns the results in the order of
+    `paths`. The files are handed to the workers in chunks, so that small
+    files do not cost a round trip each."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    report = BatchReport(workers=workers)
+    start = time.perf_counter()
+    check = partial(check_file, run=run, engine=engine)
+    if workers == 1:
+        # Not worth starting a process for.
+        report.results = [check(path) for path in paths]
+    else:
+        # About four chunks per worker balances the load when some files
+        # take longer than others.
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(workers) as executor:
+            report.results = list(executor.map(check, paths, chunksize=chunksize))
+    report.seconds = time.perf_counter() - start
+    return report
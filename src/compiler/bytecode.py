@@ -0,0 +1,268 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Any
+
+from compiler import ast, ir
+from compiler.resolver import resolve
+from compiler.runtime import Value, builtin_functions, int_div, int_rem
+from compiler.trampoline import Step, run
+
+# Opcodes. An instruction is its opcode followed by its operands, if any.
+# Every expression leaves exactly one value on the stack.
+LOAD_CONST = 0        # index into constants
+LOAD_LOCAL = 1        # slot
+STORE_LOCAL = 2       # slot; pops the value
+DUP = 3
+POP = 4
+ADD = 5
+SUB = 6
+MUL = 7
+LT = 8
+LE = 9
+GT = 10
+GE = 11
+EQ = 12
+NE = 13
+BINARY = 14           # index into binary_functions
+NEG = 15
+NOT = 16
+JUMP = 17             # target
+JUMP_IF_FALSE = 18    # target; pops the condition
+JUMP_IF_FALSE_OR_POP = 19  # target; keeps the condition if jumping
+JUMP_IF_TRUE_OR_POP = 20   # target; keeps the condition if jumping
+CALL = 21             # argument count; the function is below the arguments
+RETURN = 22
+
+opcode_names = [
+    'LOAD_CONST', 'LOAD_LOCAL', 'STORE_LOCAL', 'DUP', 'POP', 'ADD', 'SUB',
+    'MUL', 'LT', 'LE', 'GT', 'GE', 'EQ', 'NE', 'BINARY', 'NEG', 'NOT', 'JUMP',
+    'JUMP_IF_FALSE', 'JUMP_IF_FALSE_OR_POP', 'JUMP_IF_TRUE_OR_POP', 'CALL',
+    'RETURN',
+]
+
+operand_counts = [1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 1, 1, 1, 1, 1, 0]
+
+# Operators with their own opcode. The rest go through BINARY.
+binary_opcodes = {
+    '+': ADD, '-': SUB, '*': MUL, '<': LT, '<=': LE, '>': GT, '>=': GE,
+    '==': EQ, '!=': NE,
+}
+binary_functions = [int_div, int_rem]
+binary_function_indices = {'/': 0, '%': 1}
+
+@dataclass
+class Bytecode:
+    """A compiled program for the VM in compiler.vm."""
+    code: array = field(default_factory=lambda: array('q'))
+    constants: list[Any] = field(default_factory=list)
+    local_count: int = 0
+    constant_indices: dict[tuple[type, Any], int] = field(default_factory=dict, repr=False)
+
+    def add_constant(self, value: Any) -> int:
+        """Returns the index of a constant, adding it if needed."""
+        # Keyed by type too, so that 1 and True stay separate constants.
+        key = (type(value), value)
+        if key not in self.constant_indices:
+            self.constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_indices[key]
+
+def compile_bytecode(node: ast.Expression) -> Bytecode:
+    """Compiles a typechecked program into bytecode.
+
+    Variables are local slots numbered by the resolver, one per declaration;
+    builtins are constants."""
+    # The resolver puts the builtins first, but the VM has no slots for them.
+    builtins = list(builtin_functions.values())
+    program = Bytecode(local_count=resolve(node) - len(builtins))
+    code = program.code
+    constant = program.add_constant
+
+    def emit(*words: int) -> None:
+        code.extend(words)
+
+    def emit_jump(opcode: int) -> int:
+        # Returns the position of the target, to be patched later.
+        code.extend((opcode, -1))
+        return len(code) - 1
+
+    def patch(position: int) -> None:
+        code[position] = len(code)
+
+    def local_slot(node: ast.Identifier) -> int:
+        assert node.slot is not None
+        return node.slot - len(builtins)
+
+    def emit_variable(node: ast.Identifier) -> None:
+        if node.slot is None:
+            raise Exception(f'{node.location}: Variable "{node.name}" not defined.')
+        elif node.slot < len(builtins):
+            emit(LOAD_CONST, constant(builtins[node.slot]))
+        else:
+            emit(LOAD_LOCAL, local_slot(node))
+
+    def compile_node(node: ast.Expression) -> Step[None]:
+        # A step (see compiler.trampoline), so deep programs compile without
+        # recursion. The VM itself never recurses.
+        match node:
+            case ast.Literal():
+                emit(LOAD_CONST, constant(node.value))
+
+            case ast.Identifier():
+                emit_variable(node)
+
+            case ast.BinaryOp():
+                yield compile_node(node.left)
+                if node.op in ['and', 'or']:
+                    jump = emit_jump(JUMP_IF_FALSE_OR_POP if node.op == 'and' else JUMP_IF_TRUE_OR_POP)
+                    yield compile_node(node.right)
+                    patch(jump)
+                    return
+                yield compile_node(node.right)
+                if node.op in binary_opcodes:
+                    emit(binary_opcodes[node.op])
+                elif node.op in binary_function_indices:
+                    emit(BINARY, binary_function_indices[node.op])
+                else:
+                    raise Exception(f'{node.location}: Unknown operator "{node.op}".')
+
+            case ast.UnaryOp():
+                yield compile_node(node.element)
+                emit(NEG if node.op == '-' else NOT)
+
+            case ast.IfThenElse():
+                yield compile_node(node.condition)
+                else_jump = emit_jump(JUMP_IF_FALSE)
+                yield compile_node(node.then_branch)
+                end_jump = emit_jump(JUMP)
+                patch(else_jump)
+                if node.else_branch is None:
+                    emit(LOAD_CONST, constant(None))
+                else:
+                    yield compile_node(node.else_branch)
+                patch(end_jump)
+
+            case ast.VarDec():
+                yield compile_node(node.value)
+                emit(DUP, STORE_LOCAL, local_slot(node.name))
+
+            case ast.Assignment():
+                if not isinstance(node.left, ast.Identifier):
+                    raise Exception(f'{node.location}: Can only assign to a variable.')
+                if node.left.slot is None:
+                    raise Exception(f'{node.location}: "{node.left.name}" has not been declared.')
+                yield compile_node(node.right)
+                emit(DUP, STORE_LOCAL, local_slot(node.left))
+
+            case ast.Block():
+                for exp in node.expressions:
+                    yield compile_node(exp)
+                    if isinstance(exp, (ast.VarDec, ast.Assignment)):
+                        # The value of the store is not needed: drop its DUP
+                        # instead of emitting a POP.
+                        del code[-3]
+                    else:
+                        emit(POP)
+                yield compile_node(node.result)
+
+            case ast.Loop():
+                start = len(code)
+                yield compile_node(node.while_exp)
+                end_jump = emit_jump(JUMP_IF_FALSE)
+                yield compile_node(node.do_exp)
+                emit(POP, JUMP, start)
+                patch(end_jump)
+                emit(LOAD_CONST, constant(None))
+
+            case ast.FunctionNode():
+                emit_variable(node.function)
+                for argument in node.arguments:
+                    yield compile_node(argument)
+                emit(CALL, len(node.arguments))
+
+            case _:
+                raise Exception(f'{node.location}: Unexpected node.')
+
+    run(compile_node(node))
+    emit(RETURN)
+    return program
+
+def compile_ir(instructions: list[ir.Instruction]) -> Bytecode:
+    """Compiles IR instructions into bytecode, one local slot per IR variable.
+
+    The IR does not keep the value of the program, so the bytecode returns
+    None."""
+    program = Bytecode()
+    code = program.code
+    constant = program.add_constant
+    slots: dict[ir.IRVar, int] = {}
+    label_positions: dict[str, int] = {}
+    # Positions of jump targets, by the label they jump to.
+    jumps: list[tuple[int, str]] = []
+
+    def slot(var: ir.IRVar) -> int:
+        if var not in slots:
+            slots[var] = len(slots)
+        return slots[var]
+
+    def emit_jump(opcode: int, label: ir.Label) -> None:
+        code.extend((opcode, -1))
+        jumps.append((len(code) - 1, label.name))
+
+    slot(ir.IRVar('unit'))
+    unary_opcodes = {'unary_-': NEG, 'not': NOT}
+    for i, insn in enumerate(instructions):
+        match insn:
+            case ir.Label():
+                label_positions[insn.name] = len(code)
+            case ir.LoadIntConst() | ir.LoadBoolConst():
+                code.extend((LOAD_CONST, constant(insn.value), STORE_LOCAL, slot(insn.dest)))
+            case ir.Copy():
+                code.extend((LOAD_LOCAL, slot(insn.source), STORE_LOCAL, slot(insn.dest)))
+            case ir.Call():
+                name = insn.fun.name
+                if name in builtin_functions:
+                    code.extend((LOAD_CONST, constant(builtin_functions[name])))
+                for arg in insn.args:
+                    code.extend((LOAD_LOCAL, slot(arg)))
+                if name in builtin_functions:
+                    code.extend((CALL, len(insn.args)))
+                elif name in binary_opcodes:
+                    code.append(binary_opcodes[name])
+                elif name in binary_function_indices:
+                    code.extend((BINARY, binary_function_indices[name]))
+                elif name in unary_opcodes:
+                    code.append(unary_opcodes[name])
+                else:
+                    raise Exception(f'{insn.location}: Unknown function "{name}".')
+                code.extend((STORE_LOCAL, slot(insn.dest)))
+            case ir.Jump():
+                emit_jump(JUMP, insn.label)
+            case ir.CondJump():
+                code.extend((LOAD_LOCAL, slot(insn.cond)))
+                emit_jump(JUMP_IF_FALSE, insn.else_label)
+                if instructions[i + 1:i + 2] != [insn.then_label]:
+                    emit_jump(JUMP, insn.then_label)
+            case _:
+                raise Exception(f'{insn.location}: Unexpected instruction {insn}.')
+    for position, name in jumps:
+        code[position] = label_positions[name]
+    code.extend((LOAD_CONST, constant(None), RETURN))
+    program.local_count = len(slots)
+    return program
+
+def disassemble(program: Bytecode) -> str:
+    lines = []
+    code = program.code
+    pc = 0
+    while pc < len(code):
+        opcode = code[pc]
+        operands = list(code[pc+1:pc+1+operand_counts[opcode]])
+        line = f'{pc:6d} {opcode_names[opcode]}'
+        if operands:
+            line += f' {operands[0]}'
+        if opcode == LOAD_CONST:
+            line += f' ({program.constants[operands[0]]!r})'
+        lines.append(line)
+        pc += 1 + len(operands)
+    return '\n'.join(lines)
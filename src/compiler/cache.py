@@ -0,0 +1,215 @@
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any
+
+from compiler.tokenizer import Readable
+
+# Files being written, which are not entries yet.
+TEMP_PREFIX = '.tmp-'
+
+def default_cache_dir() -> str:
+    """$COMPILER_CACHE_DIR, or a `compiler` directory in the user's cache."""
+    if 'COMPILER_CACHE_DIR' in os.environ:
+        return os.environ['COMPILER_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'compiler')
+
+@lru_cache(maxsize=None)
+def compiler_version() -> str:
+    """A hash of the names, sizes and modification times of the compiler's
+    own source files, so that any change to the compiler invalidates what
+    older versions cached. The files are not read, as this runs every time."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(package_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                digest.update(f'{os.path.relpath(path, package_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\0'.encode())
+    return digest.hexdigest()
+
+class HashingReader:
+    """Reads a file object for tokenize_stream() and hashes what was read,
+    so that a source that is streamed gets its cache key too."""
+
+    def __init__(self, source: Readable, prefix: bytes) -> None:
+        self.source = source
+        self._digest = hashlib.sha256(prefix)
+
+    def read(self, size: int = -1) -> str:
+        text = self.source.read(size)
+        self._digest.update(text.encode())
+        return text
+
+    def key(self) -> str:
+        """The key of what has been read so far, like CompileCache.key()."""
+        return self._digest.hexdigest()
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f'{self.hits / lookups:.0%}' if lookups else '-'
+        return (f'cache: {self.hits} hits, {self.misses} misses ({rate} hit rate), '
+                f'{self.stores} stores, {self.evictions} evictions')
+
+class CompileCache:
+    """A content-addressed cache of compiled programs in a directory.
+
+    Entries are keyed by a hash of the source, the compiler version and the
+    options that affect the result, and hold a compressed pickle. When the
+    entries grow past `max_bytes`, the least recently used ones are deleted.
+    Statistics accumulate across runs in the directory too."""
+
+    def __init__(self, directory: str, max_bytes: int = 64 << 20) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Counts for this process; the totals are in the stats file.
+        self.stats = CacheStats()
+
+    def _prefix(self, options: tuple[str, ...]) -> bytes:
+        return compiler_version().encode() + b''.join(b'\0' + option.encode() for option in options) + b'\0'
+
+    def key(self, source: str, *options: str) -> str:
+        return hashlib.sha256(self._prefix(options) + source.encode()).hexdigest()
+
+    def reader(self, source: Readable, *options: str) -> HashingReader:
+        """Wraps `source` to compute its key while it is read."""
+        return HashingReader(source, self._prefix(options))
+
+    def key_of_file(self, source: Readable, *options: str, chunk_size: int = 1 << 16) -> str:
+        """The key of the rest of `source`, read a chunk at a time."""
+        reader = self.reader(source, *options)
+        while reader.read(chunk_size):
+            pass
+        return reader.key()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def load(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            self.stats.misses += 1
+            return None
+        # The modification time orders entries for eviction. Another run may
+        # have evicted the entry since, which does not matter.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats.hits += 1
+        return value
+
+    def store(self, key: str, value: Any) -> None:
+        try:
+            data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), 1)
+        except RecursionError:
+            # Extremely deep trees cannot be pickled; they are not cached.
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path, data)
+        self.stats.stores += 1
+        # The size of the entries of all runs is estimated in a file, so the
+        # entries are only listed when they may not fit anymore. Replacing an
+        # entry counts it twice, until the next listing.
+        with self._locked():
+            size = self._read_size()
+            if size is None or size + len(data) > self.max_bytes:
+                self.evict()
+            else:
+                self._write(os.path.join(self.directory, 'size'), str(size + len(data)).encode())
+
+    def _write(self, path: str, data: bytes) -> None:
+        # Written under a temporary name first, so concurrent runs never
+        # read half a file. evict() leaves files with the prefix alone.
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TEMP_PREFIX)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Lets concurrent runs take turns updating the size and the stats."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_size(self) -> int | None:
+        try:
+            with open(os.path.join(self.directory, 'size')) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _entries(self) -> list[os.DirEntry]:
+        entries = []
+        for subdir in os.scandir(self.directory):
+            if subdir.is_dir():
+                entries += [entry for entry in os.scandir(subdir.path)
+                            if entry.is_file() and not entry.name.startswith(TEMP_PREFIX)]
+        return entries
+
+    def evict(self) -> None:
+        """Deletes the least recently used entries until the rest fit, and
+        records the size of the rest."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                # Evicted by another run since it was listed.
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.stats.evictions += 1
+        self._write(os.path.join(self.directory, 'size'), str(total).encode())
+
+    def total_stats(self) -> CacheStats:
+        """Statistics of all runs that saved theirs with save_stats()."""
+        try:
+            with open(os.path.join(self.directory, 'stats.json')) as f:
+                return CacheStats(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return CacheStats()
+
+    def save_stats(self) -> None:
+        """Adds the statistics of this process to the totals.
+
+        Concurrent runs take turns with a lock, so no run's counts are lost,
+        and the file is replaced atomically, so it is never read half written."""
+        with self._locked():
+            total = self.total_stats()
+            for name, value in asdict(self.stats).items():
+                setattr(total, name, getattr(total, name) + value)
+            self._write(os.path.join(self.directory, 'stats.json'), json.dumps(asdict(total)).encode())
+        self.stats = CacheStats()
@@ -0,0 +1,76 @@
+"""Forwards a command line to a compile server (see compiler.server).
+
+Run with: python -m compiler.client <command> [options] [files]
+
+This module only imports the standard library, so that it starts faster
+than the compiler itself would."""
+import json
+import os
+import socket
+import struct
+import sys
+from typing import Any
+
+# Messages in both directions are a 4 byte big-endian length followed by that
+# many bytes of UTF-8 JSON. A request is {"argv": [...], "stdin": "..."}, and
+# its response {"status": 0, "stdout": "...", "stderr": "..."}.
+HEADER = struct.Struct('>I')
+
+def default_socket_path() -> str:
+    """$COMPILER_SERVER, or a socket in the temporary directory."""
+    if 'COMPILER_SERVER' in os.environ:
+        return os.environ['COMPILER_SERVER']
+    # Imported here, as it takes longer than the rest of the client.
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f'compiler-{os.getuid()}.sock')
+
+def encode_message(message: dict[str, Any]) -> bytes:
+    data = json.dumps(message).encode()
+    return HEADER.pack(len(data)) + data
+
+def _read_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError('The compile server closed the connection.')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def request(argv: list[str], stdin: str = '', socket_path: str | None = None) -> dict[str, Any]:
+    """Runs `argv` as the arguments of the compiler in the server."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(encode_message({'argv': argv, 'stdin': stdin}))
+        size, = HEADER.unpack(_read_exactly(sock, HEADER.size))
+        response: dict[str, Any] = json.loads(_read_exactly(sock, size))
+        return response
+
+def server_argv(args: list[str]) -> list[str]:
+    """The arguments with paths made absolute, as the server runs elsewhere."""
+    argv = []
+    for i, arg in enumerate(args):
+        if arg.startswith('--output='):
+            arg = '--output=' + os.path.abspath(arg.removeprefix('--output='))
+        elif arg.startswith('--cache-dir='):
+            arg = '--cache-dir=' + os.path.abspath(arg.removeprefix('--cache-dir='))
+        elif not arg.startswith('-') and any(not a.startswith('-') for a in args[:i]):
+            # Everything after the command is a file.
+            arg = os.path.abspath(arg)
+        argv.append(arg)
+    return argv
+
+def main() -> int:
+    args = sys.argv[1:]
+    # Programs without a file read standard input, so it is sent along.
+    reads_stdin = sum(not arg.startswith('-') for arg in args) == 1 and not sys.stdin.isatty()
+    response = request(server_argv(args), sys.stdin.read() if reads_stdin else '')
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    status: int = response['status']
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
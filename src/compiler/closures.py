@@ -0,0 +1,151 @@
+from operator import itemgetter
+from typing import Any, Callable, TypeAlias
+
+from compiler import ast
+from compiler.resolver import resolve
+from compiler.runtime import Value, binary_operators, unary_operators, builtin_functions
+
+# A compiled expression: evaluates the expression in a frame that holds the
+# values of all variables of the program, one slot per declaration.
+Evaluator: TypeAlias = Callable[[list[Any]], Any]
+
+def compile_closures(node: ast.Expression) -> Callable[[], Value]:
+    """Compiles a typechecked program into nested Python closures.
+
+    The AST is walked only once: operators are looked up and builtins are
+    found at compile time, and variables use the slots from the resolver, so
+    running the program does no dispatching on node types or names. Calling
+    the result runs the program in a fresh frame and returns its value.
+
+    Evaluation recurses as deeply as the program nests, so extremely deep
+    programs should be run with the tree-walking interpreter instead."""
+    slot_count = resolve(node)
+    # The frame starts with the builtins (see compiler.resolver).
+    builtins = list(builtin_functions.values())
+
+    def compile_identifier(node: ast.Identifier) -> Evaluator:
+        if node.slot is None:
+            raise Exception(f'{node.location}: Variable "{node.name}" not defined.')
+        return itemgetter(node.slot)
+
+    def compile_binary_op(node: ast.BinaryOp) -> Evaluator:
+        left = compile_node(node.left)
+        right = compile_node(node.right)
+        if node.op == 'and':
+            return lambda frame: left(frame) and right(frame)
+        if node.op == 'or':
+            return lambda frame: left(frame) or right(frame)
+
+        op = binary_operators.get(node.op)
+        if op is None:
+            raise Exception(f'{node.location}: Unknown operator "{node.op}".')
+        # Variables and constants are read in place instead of through
+        # another closure, which covers most operands in loops.
+        left_slot = _slot_of(node.left)
+        if isinstance(node.right, ast.Literal):
+            constant = node.right.value
+            if left_slot is not None:
+                return lambda frame: op(frame[left_slot], constant)
+            return lambda frame: op(left(frame), constant)
+        right_slot = _slot_of(node.right)
+        if left_slot is not None and right_slot is not None:
+            return lambda frame: op(frame[left_slot], frame[right_slot])
+        return lambda frame: op(left(frame), right(frame))
+
+    def compile_if(node: ast.IfThenElse) -> Evaluator:
+        condition = compile_node(node.condition)
+        then_branch = compile_node(node.then_branch)
+        if node.else_branch is None:
+            return lambda frame: then_branch(frame) if condition(frame) else None
+        else_branch = compile_node(node.else_branch)
+        return lambda frame: then_branch(frame) if condition(frame) else else_branch(frame)
+
+    def compile_var_dec(node: ast.VarDec) -> Evaluator:
+        value = compile_node(node.value)
+        slot = node.name.slot
+        assert slot is not None
+        def run_var_dec(frame: list[Any]) -> Any:
+            frame[slot] = result = value(frame)
+            return result
+        return run_var_dec
+
+    def compile_assignment(node: ast.Assignment) -> Evaluator:
+        if not isinstance(node.left, ast.Identifier):
+            raise Exception(f'{node.location}: Can only assign to a variable.')
+        slot = node.left.slot
+        if slot is None:
+            raise Exception(f'{node.location}: "{node.left.name}" has not been declared.')
+        value = compile_node(node.right)
+        def run_assignment(frame: list[Any]) -> Any:
+            frame[slot] = result = value(frame)
+            return result
+        return run_assignment
+
+    def compile_block(node: ast.Block) -> Evaluator:
+        expressions = tuple(compile_node(exp) for exp in node.expressions)
+        result = compile_node(node.result)
+        def run_block(frame: list[Any]) -> Any:
+            for expression in expressions:
+                expression(frame)
+            return result(frame)
+        return run_block
+
+    def compile_loop(node: ast.Loop) -> Evaluator:
+        condition = compile_node(node.while_exp)
+        body = compile_node(node.do_exp)
+        def run_loop(frame: list[Any]) -> None:
+            while condition(frame):
+                body(frame)
+        return run_loop
+
+    def compile_function_call(node: ast.FunctionNode) -> Evaluator:
+        arguments = [compile_node(argument) for argument in node.arguments]
+        slot = node.function.slot
+        if slot is not None and slot < len(builtins):
+            builtin = builtins[slot]
+            if len(arguments) == 1:
+                argument = arguments[0]
+                return lambda frame: builtin(argument(frame))
+            return lambda frame: builtin(*[argument(frame) for argument in arguments])
+        function = compile_identifier(node.function)
+        return lambda frame: function(frame)(*[argument(frame) for argument in arguments])
+
+    def compile_node(node: ast.Expression) -> Evaluator:
+        match node:
+            case ast.Literal():
+                value = node.value
+                return lambda frame: value
+            case ast.Identifier():
+                return compile_identifier(node)
+            case ast.BinaryOp():
+                return compile_binary_op(node)
+            case ast.UnaryOp():
+                op = unary_operators[node.op]
+                element = compile_node(node.element)
+                return lambda frame: op(element(frame))
+            case ast.IfThenElse():
+                return compile_if(node)
+            case ast.VarDec():
+                return compile_var_dec(node)
+            case ast.Assignment():
+                return compile_assignment(node)
+            case ast.Block():
+                return compile_block(node)
+            case ast.Loop():
+                return compile_loop(node)
+            case ast.FunctionNode():
+                return compile_function_call(node)
+        raise Exception(f'{node.location}: Unexpected node.')
+
+    evaluate = compile_node(node)
+    initial_frame = builtins + [None] * (slot_count - len(builtins))
+
+    def run_program() -> Value:
+        return evaluate(initial_frame.copy())
+
+    return run_program
+
+def _slot_of(node: ast.Expression) -> int | None:
+    if isinstance(node, ast.Identifier):
+        return node.slot
+    return None
@@ -0,0 +1,41 @@
+from dataclasses import dataclass, field
+
+from compiler.objs.location import Location
+
+class CompileError(Exception):
+    """An error in a program, at `location`."""
+
+    def __init__(self, location: Location | None, message: str) -> None:
+        super().__init__(f'{location}: {message}')
+        self.location = location
+        self.message = message
+
+class CompileErrors(Exception):
+    """All the errors found in a program, one per line."""
+
+    def __init__(self, errors: list[CompileError]) -> None:
+        super().__init__('\n'.join(map(str, errors)))
+        self.errors = errors
+
+@dataclass
+class Diagnostics:
+    """Collects the errors of a program, so that one pass reports all of
+    them. The parser and the typechecker raise the first error instead when
+    they are not given one."""
+    errors: list[CompileError] = field(default_factory=list)
+
+    def report(self, error: CompileError) -> None:
+        self.errors.append(error)
+
+    def sorted_errors(self) -> list[CompileError]:
+        """The errors by location. Errors without one come first."""
+        return sorted(self.errors, key=lambda error: (error.location.row, error.location.column)
+                      if error.location is not None else (-1, -1))
+
+    def raise_errors(self) -> None:
+        """Raises CompileErrors with the errors by location, if there are any."""
+        if self.errors:
+            raise CompileErrors(self.sorted_errors())
+
+    def __str__(self) -> str:
+        return '\n'.join(map(str, self.sorted_errors()))
@@ -0,0 +1,153 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+from compiler import ast
+from compiler.objs.tokenclass import Token
+from compiler.parser import parse
+from compiler.tokenizer import _tokenize_segment
+
+@dataclass
+class EditStats:
+    """How much of the source the last edit tokenized and parsed again."""
+    relexed_tokens: int = 0
+    reparsed_tokens: int = 0
+    reused_expressions: int = 0
+    full_parse: bool = False
+
+class IncrementalParser:
+    """Keeps the tokens and AST of a source up to date while it is edited.
+
+    An edit tokenizes only the rows it touches, since no token continues past
+    a newline, and the tokens after them keep their objects with the row
+    moved. Only the top level expressions with changed tokens are parsed
+    again, and the others are reused as they are. The AST is updated in
+    place: the Locations of reused nodes are those of their tokens."""
+
+    def __init__(self, source: str = '') -> None:
+        self.source = source
+        self.tokens: list[Token] = []
+        # The offset of the first character of each row.
+        self.row_starts = [0] + [i + 1 for i, c in enumerate(source) if c == '\n']
+        # The top level expressions and the index range of their tokens, or
+        # None until the source has parsed.
+        self.items: list[ast.Expression] | None = None
+        self.spans: list[tuple[int, int]] = []
+        self.root: ast.Expression | None = None
+        self.stats = EditStats()
+        self.tokens, _ = _tokenize_segment(source, len(source), 0)
+
+    def parse(self) -> ast.Expression:
+        """The AST of the current source, which is only parsed in full if the
+        last parse failed."""
+        if self.root is None:
+            self._parse_all()
+        assert self.root is not None
+        return self.root
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> ast.Expression:
+        """Replaces `deleted` characters at `offset` with `inserted`, and
+        returns the new AST. Parse errors are raised as parse() raises them."""
+        old = self.source
+        if not 0 <= offset <= offset + deleted <= len(old):
+            raise Exception(f'Edit of {deleted} characters at {offset} is outside the source.')
+        self.source = new = old[:offset] + inserted + old[offset + deleted:]
+        self.stats = EditStats()
+
+        # The damaged rows, from the row of the edit to the row where the
+        # deleted text ended, are tokenized again.
+        row_starts = self.row_starts
+        first_row = bisect_right(row_starts, offset) - 1
+        last_row = bisect_right(row_starts, offset + deleted) - 1
+        at_end = last_row + 1 == len(row_starts)
+        start = row_starts[first_row]
+        new_end = (len(old) if at_end else row_starts[last_row + 1]) + len(inserted) - deleted
+        new_rows = [
+            start + i + 1 for i, c in enumerate(new[start:new_end])
+            if c == '\n' and (at_end or start + i + 1 < new_end)
+        ]
+        row_starts[first_row + 1:last_row + 1] = new_rows
+        if len(inserted) != deleted:
+            for i in range(first_row + 1 + len(new_rows), len(row_starts)):
+                row_starts[i] += len(inserted) - deleted
+        row_delta = len(new_rows) - (last_row - first_row)
+
+        region_tokens, _ = _tokenize_segment(new[start:new_end], new_end - start, first_row)
+        first = bisect_left(self.tokens, first_row, key=lambda token: token.loc.row)
+        end = bisect_right(self.tokens, last_row, key=lambda token: token.loc.row)
+        if row_delta:
+            for token in self.tokens[end:]:
+                token.loc.row += row_delta
+        self.tokens[first:end] = region_tokens
+        self.stats.relexed_tokens = len(region_tokens)
+
+        if self.items is None:
+            return self._parse_all()
+        try:
+            self._reparse(first, end, len(region_tokens) - (end - first))
+        except Exception:
+            # The edit may have joined expressions beyond the ones parsed
+            # again; a full parse settles it, or raises the real error.
+            return self._parse_all()
+        assert self.root is not None
+        return self.root
+
+    def _parse_all(self) -> ast.Expression:
+        self.items = None
+        self.root = None
+        spans: list[tuple[int, int]] = []
+        root = parse(self.tokens, spans)
+        self.stats.full_parse = True
+        self.stats.reparsed_tokens = len(self.tokens)
+        self.spans = spans
+        self.items = self._items_of(root, len(spans))
+        self.root = root
+        return root
+
+    def _items_of(self, root: ast.Expression, count: int) -> list[ast.Expression]:
+        if count == 1:
+            return [root]
+        assert isinstance(root, ast.Block)
+        return root.expressions
+
+    def _reparse(self, first: int, old_end: int, token_delta: int) -> None:
+        """Parses the top level expressions with tokens in the old range
+        [first, old_end) again, which are now `token_delta` more."""
+        assert self.items is not None
+        tokens = self.tokens
+        spans = self.spans
+        # The affected expressions are those with tokens in the old range,
+        # or the one the tokens were inserted in front of.
+        k0 = bisect_right(spans, first, key=lambda span: span[1])
+        k1 = bisect_left(spans, max(old_end, first + 1), key=lambda span: span[0])
+        # A `;` on both sides of the parsed range makes sure it parses as it
+        # would in the whole program: `{ ... }` could go on with an operator
+        # or an `else` from the other side.
+        while k0 > 0 and tokens[spans[k0 - 1][1] - 1].text != ';':
+            k0 -= 1
+        start = spans[k0][0] if k0 < len(spans) else len(tokens) - token_delta
+        end = (spans[k1 - 1][1] if k1 > k0 else start) + token_delta
+        while k1 < len(spans) and tokens[end - 1].text != ';':
+            k1 += 1
+            end = spans[k1 - 1][1] + token_delta
+
+        new_spans: list[tuple[int, int]] = []
+        root = parse(tokens[start:end], new_spans)
+        new_items = self._items_of(root, len(new_spans)) if new_spans else []
+        self.items[k0:k1] = new_items
+        spans[k0:k1] = [(start + a, start + b) for a, b in new_spans]
+        if token_delta:
+            for i in range(k0 + len(new_spans), len(spans)):
+                a, b = spans[i]
+                spans[i] = (a + token_delta, b + token_delta)
+        self.stats.reparsed_tokens = end - start
+        self.stats.reused_expressions = len(self.items) - len(new_items)
+
+        items = self.items
+        if len(items) == 1:
+            self.root = items[0]
+        else:
+            # The new root shares the list of expressions and the result with
+            # the old one, if it was a Block.
+            result = self.root.result if isinstance(self.root, ast.Block) else ast.Literal(None, None)
+            self.root = ast.Block(expressions=items, result=result,
+                                  location=items[0].location if items else None)
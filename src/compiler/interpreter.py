@@ -1,39 +1,118 @@
-from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import Any, TypeAlias, TypeVar
+from typing import Any, TypeAlias
 
 from compiler import ast
+from compiler.closures import compile_closures
+from compiler.ir_generator import generate_ir
+from compiler.ir_interpreter import run_ir
+from compiler.passes import default_passes
+from compiler.profiler import ExecutionProfile, run_profiled
+from compiler.resolver import resolve
+from compiler.runtime import Value, builtin_functions
+from compiler.trampoline import Step, run
 
-Value:TypeAlias = int | bool | None
+# The values of all variables of a running program, indexed by the slots
+# from compiler.resolver: the builtins first, then one slot per declaration.
+# Every declaration has a slot of its own, so blocks need no frames of their
+# own, and reading or writing a variable is indexing this list.
+Frame: TypeAlias = list[Any]
 
-@dataclass
-class SymTab:
-    locals: dict = field(default_factory=dict)
-    parent: SymTab | None = None
+def _slot(node: ast.Identifier) -> int:
+    if node.slot is None:
+        raise Exception(f'{node.location}: Variable "{node.name}" not defined.')
+    return node.slot
 
-def interpret(node: ast.Expression) -> Value:
+def interpret_lower(node: ast.Expression, frame: Frame) -> Step[Value]:
+    # A step (see compiler.trampoline): subexpressions are evaluated with
+    # `yield interpret_lower(...)` so deep nesting does not recurse.
     match node:
         case ast.Literal():
             return node.value
 
+        case ast.Identifier():
+            return frame[_slot(node)]
+
         case ast.BinaryOp():
-            a: Any = interpret(node.left)
-            b: Any = interpret(node.right)
-            if node.op == '+':
-                return a + b
-            elif node.op == '<':
-                return a < b
-            else:
-                raise Exception('exp')
-            
+            # The operator was looked up by compiler.resolver.
+            a: Any = yield interpret_lower(node.left, frame)
+            op = node.function
+            if op is not None:
+                return op(a, (yield interpret_lower(node.right, frame)))
+            # `and` and `or` only evaluate the right side when the left one
+            # does not decide the result.
+            if node.short_circuit is None:
+                raise Exception(f'{node.location}: Unknown operator "{node.op}".')
+            return a if bool(a) is node.short_circuit else (yield interpret_lower(node.right, frame))
+
+        case ast.UnaryOp():
+            unary_op = node.function
+            if unary_op is None:
+                raise Exception(f'{node.location}: Unknown operator "{node.op}".')
+            return unary_op((yield interpret_lower(node.element, frame)))
+
         case ast.IfThenElse():
-            if interpret(node.condition):
-                return interpret(node.then_branch)
+            if (yield interpret_lower(node.condition, frame)):
+                return (yield interpret_lower(node.then_branch, frame))
             else:
                 if isinstance(node.else_branch, ast.Expression):
-                    return interpret(node.else_branch)
+                    return (yield interpret_lower(node.else_branch, frame))
                 else:
                     return None
 
+        case ast.VarDec():
+            value = yield interpret_lower(node.value, frame)
+            frame[_slot(node.name)] = value
+            return value
+
+        case ast.Assignment():
+            if not isinstance(node.left, ast.Identifier):
+                raise Exception(f'{node.location}: Can only assign to a variable.')
+            value = yield interpret_lower(node.right, frame)
+            frame[_slot(node.left)] = value
+            return value
+
+        case ast.Block():
+            for exp in node.expressions:
+                yield interpret_lower(exp, frame)
+            return (yield interpret_lower(node.result, frame))
+
+        case ast.Loop():
+            while (yield interpret_lower(node.while_exp, frame)):
+                yield interpret_lower(node.do_exp, frame)
+            return None
+
+        case ast.FunctionNode():
+            function = frame[_slot(node.function)]
+            arguments = []
+            for argument in node.arguments:
+                arguments.append((yield interpret_lower(argument, frame)))
+            return function(*arguments)
+
 
     raise Exception('Unexpected node')
+
+def interpret(node: ast.Expression, engine: str = 'tree', profile: ExecutionProfile | None = None) -> Value:
+    """Runs a typechecked program.
+
+    The 'tree' engine walks the AST. The 'closures' engine first compiles the
+    AST into nested Python closures (see compiler.closures), which is much
+    faster for loops but recurses as deeply as the program nests. The 'ir'
+    engine runs the optimized IR; it returns None, as the IR does not keep
+    the value of the program.
+
+    With a profile, the tree engine records where the program spends its
+    time in it (see compiler.profiler)."""
+    if profile is not None and engine != 'tree':
+        raise Exception(f'Programs can only be profiled with the tree engine, not "{engine}".')
+    if engine == 'tree':
+        slot_count = resolve(node)
+        frame: Frame = [*builtin_functions.values()]
+        frame += [None] * (slot_count - len(frame))
+        step = interpret_lower(node, frame)
+        return run(step) if profile is None else run_profiled(step, profile)
+    elif engine == 'closures':
+        return compile_closures(node)()
+    elif engine == 'ir':
+        run_ir(default_passes().run(generate_ir(node)))
+        return None
+    else:
+        raise Exception(f'Unknown interpreter engine "{engine}".')
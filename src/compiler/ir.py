@@ -0,0 +1,68 @@
+from dataclasses import dataclass, fields
+from typing import Any
+
+from compiler.objs.location import Location
+
+@dataclass(frozen=True)
+class IRVar:
+    """A variable of the IR. Operators and builtins are IRVars too."""
+    name: str
+
+    def __str__(self) -> str:
+        return self.name
+
+@dataclass
+class Instruction:
+    """Base class for IR instructions."""
+    location: Location | None
+
+    def __str__(self) -> str:
+        def format_value(value: Any) -> str:
+            if isinstance(value, list):
+                return f'[{", ".join(format_value(v) for v in value)}]'
+            return str(value)
+        arguments = [format_value(getattr(self, f.name)) for f in fields(self) if f.name != 'location']
+        return f'{type(self).__name__}({", ".join(arguments)})'
+
+@dataclass
+class Label(Instruction):
+    """A jump target."""
+    name: str
+
+@dataclass
+class LoadIntConst(Instruction):
+    value: int
+    dest: IRVar
+
+@dataclass
+class LoadBoolConst(Instruction):
+    value: bool
+    dest: IRVar
+
+@dataclass
+class Copy(Instruction):
+    source: IRVar
+    dest: IRVar
+
+@dataclass
+class Call(Instruction):
+    """Calls an operator or a builtin function."""
+    fun: IRVar
+    args: list[IRVar]
+    dest: IRVar
+
+@dataclass
+class Jump(Instruction):
+    label: Label
+
+    def __str__(self) -> str:
+        return f'Jump({self.label.name})'
+
+@dataclass
+class CondJump(Instruction):
+    cond: IRVar
+    then_label: Label
+    else_label: Label
+
+    def __str__(self) -> str:
+        return f'CondJump({self.cond}, {self.then_label.name}, {self.else_label.name})'
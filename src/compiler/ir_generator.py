@@ -0,0 +1,176 @@
+from compiler import ast
+from compiler.resolver import resolve
+from compiler.ir import IRVar, Instruction, Label, LoadIntConst, LoadBoolConst, Copy, Call, Jump, CondJump
+from compiler.runtime import builtin_functions
+from compiler.trampoline import Step, run
+
+# Operators are called like functions in the IR. Unary minus gets its own
+# name so it is not mistaken for subtraction.
+unary_operator_names = {'-': 'unary_-', 'not': 'not'}
+
+def generate_ir(root: ast.Expression) -> list[Instruction]:
+    """Lowers a typechecked program into a linear list of IR instructions."""
+    instructions: list[Instruction] = []
+    var_unit = IRVar('unit')
+    builtin_count = len(builtin_functions)
+    resolve(root)
+    # The IRVars of declared variables, by frame slot.
+    variables: dict[int, IRVar] = {}
+    declared_vars: set[IRVar] = set()
+    next_var_number = 1
+    next_label_number = 1
+
+    def new_var() -> IRVar:
+        nonlocal next_var_number
+        var = IRVar(f'x{next_var_number}')
+        next_var_number += 1
+        return var
+
+    def new_label() -> Label:
+        nonlocal next_label_number
+        label = Label(None, f'L{next_label_number}')
+        next_label_number += 1
+        return label
+
+    def declare(node: ast.Identifier) -> IRVar:
+        assert node.slot is not None
+        var = variables[node.slot] = new_var()
+        declared_vars.add(var)
+        return var
+
+    def lookup(node: ast.Identifier) -> IRVar:
+        if node.slot is None:
+            raise Exception(f'{node.location}: Variable "{node.name}" not defined.')
+        if node.slot < builtin_count:
+            raise Exception(f'{node.location}: Builtin functions can only be called.')
+        return variables[node.slot]
+
+    def visit_operands(nodes: list[ast.Expression]) -> Step[list[IRVar]]:
+        # Operands are evaluated left to right. A variable read by an earlier
+        # operand is copied before an operand that might assign it.
+        results: list[IRVar] = []
+        for node in nodes:
+            if not isinstance(node, (ast.Literal, ast.Identifier)):
+                for i, var in enumerate(results):
+                    if var in declared_vars:
+                        results[i] = new_var()
+                        instructions.append(Copy(node.location, var, results[i]))
+            results.append((yield visit(node)))
+        return results
+
+    def visit(node: ast.Expression) -> Step[IRVar]:
+        # A step (see compiler.trampoline), so deep programs lower without
+        # recursion. Returns the variable holding the node's value.
+        loc = node.location
+        match node:
+            case ast.Literal():
+                if isinstance(node.value, bool):
+                    var = new_var()
+                    instructions.append(LoadBoolConst(loc, node.value, var))
+                    return var
+                if isinstance(node.value, int):
+                    var = new_var()
+                    instructions.append(LoadIntConst(loc, node.value, var))
+                    return var
+                return var_unit
+
+            case ast.Identifier():
+                return lookup(node)
+
+            case ast.BinaryOp():
+                if node.op in ['and', 'or']:
+                    l_right = new_label()
+                    l_skip = new_label()
+                    l_end = new_label()
+                    var_result = new_var()
+                    var_left = yield visit(node.left)
+                    if node.op == 'and':
+                        instructions.append(CondJump(loc, var_left, l_right, l_skip))
+                    else:
+                        instructions.append(CondJump(loc, var_left, l_skip, l_right))
+                    instructions.append(l_right)
+                    var_right = yield visit(node.right)
+                    instructions.append(Copy(loc, var_right, var_result))
+                    instructions.append(Jump(loc, l_end))
+                    instructions.append(l_skip)
+                    instructions.append(LoadBoolConst(loc, node.op == 'or', var_result))
+                    instructions.append(Jump(loc, l_end))
+                    instructions.append(l_end)
+                    return var_result
+                var_left, var_right = yield visit_operands([node.left, node.right])
+                var_result = new_var()
+                instructions.append(Call(loc, IRVar(node.op), [var_left, var_right], var_result))
+                return var_result
+
+            case ast.UnaryOp():
+                var_element = yield visit(node.element)
+                var_result = new_var()
+                instructions.append(Call(loc, IRVar(unary_operator_names[node.op]), [var_element], var_result))
+                return var_result
+
+            case ast.IfThenElse():
+                l_then = new_label()
+                l_else = new_label()
+                l_end = new_label()
+                var_cond = yield visit(node.condition)
+                var_result = new_var()
+                instructions.append(CondJump(loc, var_cond, l_then, l_else))
+                instructions.append(l_then)
+                var_then = yield visit(node.then_branch)
+                instructions.append(Copy(loc, var_then, var_result))
+                instructions.append(Jump(loc, l_end))
+                instructions.append(l_else)
+                if node.else_branch is None:
+                    # Like the interpreters: the then-value when taken, else unit.
+                    instructions.append(Copy(loc, var_unit, var_result))
+                else:
+                    var_else = yield visit(node.else_branch)
+                    instructions.append(Copy(loc, var_else, var_result))
+                instructions.append(l_end)
+                return var_result
+
+            case ast.VarDec():
+                var_value = yield visit(node.value)
+                var = declare(node.name)
+                instructions.append(Copy(loc, var_value, var))
+                return var
+
+            case ast.Assignment():
+                if not isinstance(node.left, ast.Identifier):
+                    raise Exception(f'{loc}: Can only assign to a variable.')
+                var = lookup(node.left)
+                var_value = yield visit(node.right)
+                instructions.append(Copy(loc, var_value, var))
+                return var
+
+            case ast.Block():
+                for exp in node.expressions:
+                    yield visit(exp)
+                return (yield visit(node.result))
+
+            case ast.Loop():
+                l_start = new_label()
+                l_body = new_label()
+                l_end = new_label()
+                instructions.append(l_start)
+                var_cond = yield visit(node.while_exp)
+                instructions.append(CondJump(loc, var_cond, l_body, l_end))
+                instructions.append(l_body)
+                yield visit(node.do_exp)
+                instructions.append(Jump(loc, l_start))
+                instructions.append(l_end)
+                return var_unit
+
+            case ast.FunctionNode():
+                name = node.function.name
+                if node.function.slot is None or node.function.slot >= builtin_count:
+                    raise Exception(f'{loc}: Only builtin functions can be called in compiled code.')
+                var_args = yield visit_operands(node.arguments)
+                var_result = new_var()
+                instructions.append(Call(loc, IRVar(name), var_args, var_result))
+                return var_result
+
+        raise Exception(f'{loc}: Unexpected node.')
+
+    run(visit(root))
+    return instructions
@@ -0,0 +1,37 @@
+from typing import Any, Callable
+
+from compiler.ir import IRVar, Instruction, Label, LoadIntConst, LoadBoolConst, Copy, Call, Jump, CondJump
+from compiler.runtime import binary_operators, unary_operators, builtin_functions
+
+# Everything an IR Call can call, by name.
+ir_functions: dict[str, Callable[..., Any]] = {
+    **binary_operators,
+    'unary_-': unary_operators['-'],
+    'not': unary_operators['not'],
+    **builtin_functions,
+}
+
+def run_ir(instructions: list[Instruction]) -> None:
+    """Runs IR instructions for their effects. The IR does not keep the value
+    of the program, so nothing is returned."""
+    label_positions = {insn.name: i for i, insn in enumerate(instructions) if isinstance(insn, Label)}
+    values: dict[IRVar, Any] = {IRVar('unit'): None}
+    pc = 0
+    while pc < len(instructions):
+        insn = instructions[pc]
+        pc += 1
+        match insn:
+            case LoadIntConst() | LoadBoolConst():
+                values[insn.dest] = insn.value
+            case Copy():
+                values[insn.dest] = values[insn.source]
+            case Call():
+                values[insn.dest] = ir_functions[insn.fun.name](*[values[arg] for arg in insn.args])
+            case Jump():
+                pc = label_positions[insn.label.name]
+            case CondJump():
+                pc = label_positions[(insn.then_label if values[insn.cond] else insn.else_label).name]
+            case Label():
+                pass
+            case _:
+                raise Exception(f'{insn.location}: Unexpected instruction {insn}.')
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class Location(object):
     """Location"""
     file: str = 'Null'
@@ -19,4 +19,4 @@ class Location(object):
     def __str__(self) -> str:
         return f'<Location:{self.file};{self.row};{self.column}>'
     
-L = Location(equal_to_all=True)
\ No newline at end of file
+L = Location(equal_to_all=True)
@@ -0,0 +1,52 @@
+import sys
+from array import array
+from typing import Iterator
+from compiler.objs.location import Location
+from compiler.objs.tokenclass import Token
+
+TOKEN_TYPES = ('identifier', 'int_literal', 'operator', 'punctuation', 'bool_literal')
+TOKEN_KINDS = {token_type: kind for kind, token_type in enumerate(TOKEN_TYPES)}
+INT_LITERAL = TOKEN_KINDS['int_literal']
+
+class TokenBuffer:
+    """Tokens stored as parallel integer columns instead of Token objects.
+
+    A token takes 20 bytes here: its kind (an index into TOKEN_TYPES), the
+    start and end offsets of its text in the source, and its row and column.
+    Token objects are created only when the buffer is indexed or iterated,
+    so the parser can read it like a list of tokens."""
+    __slots__ = ('source', 'kinds', 'starts', 'ends', 'rows', 'columns')
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.kinds = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.rows = array('i')
+        self.columns = array('i')
+
+    def append(self, kind: int, start: int, end: int, row: int, column: int) -> None:
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.rows.append(row)
+        self.columns.append(column)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def type(self, i: int) -> str:
+        return TOKEN_TYPES[self.kinds[i]]
+
+    def text(self, i: int) -> str:
+        text = self.source[self.starts[i]:self.ends[i]]
+        if self.kinds[i] != INT_LITERAL:
+            text = sys.intern(text)
+        return text
+
+    def __getitem__(self, i: int) -> Token:
+        return Token(self.text(i), self.type(i), Location(row=self.rows[i], column=self.columns[i]))
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(len(self.kinds)):
+            yield self[i]
@@ -4,7 +4,7 @@ from compiler.objs.location import Location, L
 #from .location import Location, L
 import typing
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     """Token"""
     text: str = ''
@@ -16,7 +16,7 @@ class Token:
         return as_string
     
     def __post_init__(self) -> None:
-        if self.loc == None:
+        if self.loc is None:
             self.loc = L
     
     def __eq__(self, other: object) -> bool:
@@ -1,23 +1,89 @@
-from dataclasses import dataclass
+from typing import Any, Iterable
 
 class Type:
-    """Base class for types"""
+    """Base class for types.
+
+    There is only one object of each type, so types are compared with `is`
+    and hashed by identity."""
 
 class IntegerType(Type):
     """Class for integers."""
 
+    # Types are compared by identity, so unpickling must give the same
+    # instance back.
+    def __reduce__(self) -> str:
+        return 'Int'
+
+    def __str__(self) -> str:
+        return 'Int'
+
 class BooleanType(Type):
     """Class for booleans."""
 
-@dataclass
+    def __reduce__(self) -> str:
+        return 'Bool'
+
+    def __str__(self) -> str:
+        return 'Bool'
+
 class FunType(Type):
-    """Class for functions."""
-    parameters: list[Type]
+    """Class for functions.
+
+    Function types are interned: FunType() returns the object made the first
+    time for the same parameters and result, so structurally equal function
+    types are the same object, and cannot be changed."""
+    __slots__ = ('parameters', 'result')
+    parameters: tuple[Type, ...]
     result: Type
 
+    # The parameters and result are interned themselves, so the key of a
+    # function type is hashed and compared by their identity. Programs use
+    # few distinct function types, so they are kept forever.
+    _interned: dict[tuple[tuple[Type, ...], Type], 'FunType'] = {}
+
+    def __new__(cls, parameters: Iterable[Type], result: Type) -> 'FunType':
+        key = (tuple(parameters), result)
+        fun_type = cls._interned.get(key)
+        if fun_type is None:
+            fun_type = super().__new__(cls)
+            object.__setattr__(fun_type, 'parameters', key[0])
+            object.__setattr__(fun_type, 'result', result)
+            cls._interned[key] = fun_type
+        return fun_type
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError('Function types cannot be changed.')
+
+    def __reduce__(self) -> tuple[type, tuple[tuple[Type, ...], Type]]:
+        return (FunType, (self.parameters, self.result))
+
+    def __repr__(self) -> str:
+        return f'FunType(parameters={self.parameters!r}, result={self.result!r})'
+
+    def __str__(self) -> str:
+        return f'({", ".join(map(str, self.parameters))}) => {self.result}'
+
 class UnitType(Type):
     """Class for unit."""
 
+    def __reduce__(self) -> str:
+        return 'Unit'
+
+    def __str__(self) -> str:
+        return 'Unit'
+
+class ErrorType(Type):
+    """The type of expressions with errors, when the typechecker collects
+    diagnostics. It is accepted wherever a type is expected, so that one
+    error is not reported again by every expression using it."""
+
+    def __reduce__(self) -> str:
+        return 'Error'
+
+    def __str__(self) -> str:
+        return '<error>'
+
 Int = IntegerType()
 Bool = BooleanType()
-Unit = UnitType()
\ No newline at end of file
+Unit = UnitType()
+Error = ErrorType()
\ No newline at end of file
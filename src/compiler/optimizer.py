@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+
+from compiler import ast
+from compiler.objs.types import Unit
+from compiler.runtime import binary_operators, unary_operators
+from compiler.trampoline import Step, run
+
+@dataclass
+class FoldStats:
+    """What fold_constants() did to a program."""
+    folded_operations: int = 0
+    simplified_operations: int = 0
+    pruned_ifs: int = 0
+    removed_loops: int = 0
+    removed_statements: int = 0
+    nodes_before: int = 0
+    nodes_after: int = 0
+
+    @property
+    def nodes_eliminated(self) -> int:
+        return self.nodes_before - self.nodes_after
+
+    def __str__(self) -> str:
+        return (f'constant folding: {self.nodes_eliminated} of {self.nodes_before} nodes eliminated '
+                f'({self.folded_operations} operations folded, {self.simplified_operations} simplified, '
+                f'{self.pruned_ifs} ifs pruned, {self.removed_loops} loops removed, '
+                f'{self.removed_statements} statements removed)')
+
+# Operations that return their left operand when the right one is the given
+# constant, like `x * 1`, and the same for the right operand and `1 * x`.
+left_identities = {'+': 0, '-': 0, '*': 1, '/': 1}
+right_identities = {'+': 0, '*': 1}
+
+def count_nodes(node: ast.Expression, kind: type[ast.Expression] = ast.Expression) -> int:
+    """The number of nodes of type `kind` in `node`, which does not include
+    the names of declarations."""
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, kind):
+            count += 1
+        match node:
+            case ast.BinaryOp():
+                stack += [node.left, node.right]
+            case ast.UnaryOp():
+                stack.append(node.element)
+            case ast.IfThenElse():
+                stack += [node.condition, node.then_branch]
+                if node.else_branch is not None:
+                    stack.append(node.else_branch)
+            case ast.VarDec():
+                stack.append(node.value)
+            case ast.Assignment():
+                stack += [node.left, node.right]
+            case ast.Block():
+                stack += node.expressions
+                stack.append(node.result)
+            case ast.Loop():
+                stack += [node.while_exp, node.do_exp]
+            case ast.FunctionNode():
+                stack.append(node.function)
+                stack += node.arguments
+    return count
+
+def _literal(value: int | bool | None, node: ast.Expression) -> ast.Literal:
+    return ast.Literal(node.location, value, type=node.type)
+
+def _unit(node: ast.Expression) -> ast.Literal:
+    # Not the type of `node`: an if without else has the type of its then
+    # branch, but is unit when not taken.
+    return ast.Literal(node.location, None, type=Unit)
+
+def _is_constant(node: ast.Expression, value: int | bool) -> bool:
+    # `type() is` keeps True from matching 1.
+    return isinstance(node, ast.Literal) and type(node.value) is type(value) and node.value == value
+
+def fold_constants(node: ast.Expression, stats: FoldStats | None = None) -> ast.Expression:
+    """Evaluates the parts of a typechecked program that only depend on
+    constants, and returns the new root.
+
+    Operators with literal operands become literals, except divisions by
+    zero, which are left to fail at run time. Ifs with a constant condition
+    are replaced by the branch taken, loops that never run by unit, and
+    statements without effects are removed from blocks. The tree is
+    rewritten in place."""
+    if stats is None:
+        stats = FoldStats()
+    stats.nodes_before += count_nodes(node)
+
+    def fold(node: ast.Expression) -> Step[ast.Expression]:
+        # A step (see compiler.trampoline), so deep programs fold without
+        # recursion. Returns the node to use in place of `node`.
+        match node:
+            case ast.BinaryOp():
+                node.left = yield fold(node.left)
+                if node.op in ['and', 'or'] and isinstance(node.left, ast.Literal):
+                    # `true and x` is x, `false and x` is false, and the
+                    # other way around for `or`.
+                    stats.folded_operations += 1
+                    if node.left.value == (node.op == 'and'):
+                        return (yield fold(node.right))
+                    return node.left
+                node.right = yield fold(node.right)
+                left, right = node.left, node.right
+                if isinstance(left, ast.Literal) and isinstance(right, ast.Literal) and node.op in binary_operators:
+                    if node.op in ['/', '%'] and right.value == 0:
+                        return node
+                    stats.folded_operations += 1
+                    return _literal(binary_operators[node.op](left.value, right.value), node)
+                if node.op in left_identities and _is_constant(right, left_identities[node.op]):
+                    stats.simplified_operations += 1
+                    return left
+                if node.op in right_identities and _is_constant(left, right_identities[node.op]):
+                    stats.simplified_operations += 1
+                    return right
+                return node
+
+            case ast.UnaryOp():
+                node.element = yield fold(node.element)
+                if isinstance(node.element, ast.Literal):
+                    stats.folded_operations += 1
+                    return _literal(unary_operators[node.op](node.element.value), node)
+                return node
+
+            case ast.IfThenElse():
+                node.condition = yield fold(node.condition)
+                if isinstance(node.condition, ast.Literal):
+                    stats.pruned_ifs += 1
+                    if node.condition.value:
+                        return (yield fold(node.then_branch))
+                    if node.else_branch is None:
+                        return _unit(node)
+                    return (yield fold(node.else_branch))
+                node.then_branch = yield fold(node.then_branch)
+                if node.else_branch is not None:
+                    node.else_branch = yield fold(node.else_branch)
+                return node
+
+            case ast.VarDec():
+                node.value = yield fold(node.value)
+                return node
+
+            case ast.Assignment():
+                node.right = yield fold(node.right)
+                return node
+
+            case ast.Block():
+                expressions = []
+                for exp in node.expressions:
+                    exp = yield fold(exp)
+                    if isinstance(exp, (ast.Literal, ast.Identifier)):
+                        stats.removed_statements += 1
+                    else:
+                        expressions.append(exp)
+                node.expressions = expressions
+                node.result = yield fold(node.result)
+                return node
+
+            case ast.Loop():
+                node.while_exp = yield fold(node.while_exp)
+                if _is_constant(node.while_exp, False):
+                    stats.removed_loops += 1
+                    return _unit(node)
+                node.do_exp = yield fold(node.do_exp)
+                return node
+
+            case ast.FunctionNode():
+                arguments = []
+                for argument in node.arguments:
+                    arguments.append((yield fold(argument)))
+                node.arguments = arguments
+                return node
+
+        return node
+
+    root = run(fold(node))
+    stats.nodes_after += count_nodes(root)
+    return root
@@ -1,9 +1,23 @@
 #from compiler.tokenizer import Token
+from typing import Callable, Iterable
+from compiler.trampoline import Step, run
 from compiler.objs.tokenclass import Token
+from compiler.diagnostics import CompileError, Diagnostics
 #from compiler.objs.location import Location
 import compiler.ast as ast
 
-def parse(tokens: list[Token]) -> ast.Expression:
+def parse(
+    tokens: Iterable[Token],
+    item_spans: list[tuple[int, int]] | None = None,
+    diagnostics: Diagnostics | None = None,
+) -> ast.Expression:
+    """Parses a program. If `item_spans` is given, the start and end index
+    of the tokens of each top level expression, including its `;`, are
+    appended to it (see compiler.incremental).
+
+    With `diagnostics`, errors are reported to it instead of raised: the
+    parser skips to the next `;` or `}` and goes on, and the code it skipped
+    becomes an ErrorExpression."""
     left_associative_binary_operators = [
         ['or'],
         ['and'],
@@ -14,16 +28,32 @@ def parse(tokens: list[Token]) -> ast.Expression:
     ]
     
     precedence_levels_binary_op = len(left_associative_binary_operators)
-    pos = 0
+    binding_powers = {
+        operator: level
+        for level, operators in enumerate(left_associative_binary_operators)
+        for operator in operators
+    }
+    
+    # Tokens are pulled from the iterable one at a time, so the parser only
+    # ever holds the current token and the one before it. This lets it consume
+    # tokenize_stream() without materializing the token list.
+    remaining_tokens = iter(tokens)
+    current: Token | None = next(remaining_tokens, None)
+    previous: Token | None = None
+    consumed = 0
+    # The number of blocks being parsed, and the number of tokens consumed
+    # when the last error was recovered from.
+    open_blocks = 0
+    recovered_at = -1
     
     def peek() -> Token:
-        if pos < len(tokens):
-            return tokens[pos]
+        if current is not None:
+            return current
         else:
-            if len(tokens) == 0:
+            if previous is None:
                 location = None
             else:
-                location = tokens[-1].loc
+                location = previous.loc
             return Token(
                 loc= location,
                 type='end',
@@ -31,8 +61,8 @@ def parse(tokens: list[Token]) -> ast.Expression:
             )
     
     def lookback() -> Token:
-        if pos > 0:
-            return tokens[pos-1]
+        if previous is not None:
+            return previous
         else:
             return Token(
                 loc = None,
@@ -43,239 +73,327 @@ def parse(tokens: list[Token]) -> ast.Expression:
     def consume(expected: str | list[str] | None = None) -> Token:
         token = peek()
         if isinstance(expected, str) and token.text != expected:
-            raise Exception(f'{token.loc}: expected "{expected}", got {token.text}')
+            raise CompileError(token.loc, f'expected "{expected}", got {token.text}')
         if isinstance(expected, list) and token.text not in expected:
             comma_separated = ", ".join([f'"{e}"' for e in expected])
-            raise Exception(f'{token.loc}: expected one of: {comma_separated}')
-        nonlocal pos
-        pos += 1
+            raise CompileError(token.loc, f'expected one of: {comma_separated}')
+        nonlocal current, previous, consumed
+        if current is not None:
+            previous = current
+            current = next(remaining_tokens, None)
+            consumed += 1
         return token
     
+    def recover(error: CompileError) -> ast.Expression:
+        """Reports `error`, or raises it without diagnostics, and skips the
+        tokens up to the `;` or `}` that ends the statement it is in. Braces
+        opened after the error are skipped with what is inside them, and so
+        are stray closing braces at the top level. Errors before any token
+        is consumed after a recovery follow from the first one, and are not
+        reported."""
+        nonlocal recovered_at
+        if diagnostics is None:
+            raise error
+        if recovered_at != consumed:
+            diagnostics.report(error)
+        location = peek().loc
+        depth = 0
+        while peek().type != 'end':
+            text = peek().text
+            if depth == 0 and (text == ';' or (text == '}' and open_blocks > 0)):
+                break
+            if text == '{':
+                depth += 1
+            elif text == '}' and depth > 0:
+                depth -= 1
+            consume()
+        recovered_at = consumed
+        return ast.ErrorExpression(location)
+
     def parse_bool_literal() -> ast.Literal:
         if peek().type != 'bool_literal':
-            raise Exception(f'{peek().loc}: expected a boolean literal')
+            raise CompileError(peek().loc, 'expected a boolean literal')
         token = consume()
         if token.text == 'true':
             value = True
         elif token.text == 'false':
             value = False
         else:
-            raise Exception(f'{token.loc}: Expected "true" or "false", got {token.text}.')
+            raise CompileError(token.loc, f'Expected "true" or "false", got {token.text}.')
         return ast.Literal(value=value, location=token.loc)
 
     def parse_int_literal() -> ast.Literal:
         if peek().type != 'int_literal':
-            raise Exception(f'{peek().loc}: expected an integer literal')
+            raise CompileError(peek().loc, 'expected an integer literal')
         token = consume()
         return ast.Literal(value=int(token.text), location=token.loc)
     
     def parse_identifier() -> ast.Identifier:
         if peek().type != 'identifier':
-            raise Exception(f'{peek().loc}: expected an identifier')
+            raise CompileError(peek().loc, 'expected an identifier')
         token = consume()
         return ast.Identifier(name=token.text, location=token.loc)
     
-    def parse_assignment(left: ast.Expression) -> ast.Expression:
+    # The functions that parse nested expressions are steps (see
+    # compiler.trampoline): `yield parse_x()` parses a subexpression without
+    # growing the Python call stack, so nesting depth is not limited by the
+    # recursion limit.
+    
+    def parse_assignment(left: ast.Expression) -> Step[ast.Expression]:
         
         if peek().text == '=':
             consume('=')
-            right = parse_assignment(parse_expression())
+            right = yield parse_assignment((yield parse_expression()))
         else:
             return left
         return ast.Assignment(location=left.location, left=left, right=right)
         #return ast.BinaryOp(left=left, op='=', right=right, location=left.location)
 
     
-    def parse_factor() -> ast.Expression:
-        if peek().text == '(':
-            return parse_parenthesized()
-        elif peek().text == '{':
-            return parse_block()
-        elif peek().text in ['-', 'not']:
-            return parse_unary()
-        elif peek().text == 'if':
-            return parse_control()
-        elif peek().text == 'while':
-            return parse_loop()
-        elif peek().type == 'int_literal':
-            return parse_int_literal()
-        elif peek().type == 'bool_literal':
-            return parse_bool_literal()
-        elif peek().type == 'identifier':
-            return parse_identifier()
-        else:
-            raise Exception(f'{peek().loc}: expected an integer literal or an identifier. Got {peek().type} "{peek().text}".')
+    def parse_simple_factor() -> ast.Expression:
+        # Factors with nested expressions are parsed by nested_factor_parsers
+        token = peek()
+        factor_parser = factor_parsers_by_type.get(token.type)
+        if factor_parser is None:
+            raise CompileError(token.loc, f'expected an integer literal or an identifier. Got {token.type} "{token.text}".')
+        return factor_parser()
     
-    def parse_unary() -> ast.Expression:
+    def parse_unary() -> Step[ast.Expression]:
         operator = peek().text
         not_token = consume(['-','not'])
-        element = parse_expression()
+        element = yield parse_expression()
         return ast.UnaryOp(op=operator, element=element, location=not_token.loc)
 
-    def parse_function_call(function: ast.Identifier) -> ast.Expression:
+    def parse_function_call(function: ast.Identifier) -> Step[ast.Expression]:
         consume('(')
         arguments = []
         if peek().text != ')':
-            arguments.append(parse_expression())
+            arguments.append((yield parse_expression()))
         while peek().text == ',':
             consume(',')
-            arguments.append(parse_expression())
+            arguments.append((yield parse_expression()))
         consume(')')
         return ast.FunctionNode(function=function, arguments=arguments, location=function.location)
 
-    def parse_control() -> ast.Expression:
+    def parse_control() -> Step[ast.Expression]:
         start_token = consume('if')
-        conditionr = parse_expression()
+        conditionr = yield parse_expression()
         consume('then')
-        then_branch = parse_expression()
+        then_branch = yield parse_expression()
         else_branch = None
         if peek().text == 'else':
             consume('else')
-            else_branch = parse_expression()
+            else_branch = yield parse_expression()
         return ast.IfThenElse(condition=conditionr, then_branch=then_branch, else_branch=else_branch, location=start_token.loc)
 
-    def parse_parenthesized() -> ast.Expression:
+    def parse_parenthesized() -> Step[ast.Expression]:
         consume('(')
-        expr = parse_expression()
+        expr = yield parse_expression()
         consume(')')
         return expr
     
-    def parse_var_declaration() -> ast.Expression:
+    def parse_var_declaration() -> Step[ast.Expression]:
         #assumed var x = y = z not allowed.
         start_token = consume('var')
         name = parse_identifier()
         var_type = None
-        if peek().text != '=':
-            consume(':')
-            var_type = parse_type_expression(name)
-        consume('=')
-        value = parse_expression()
-        
+        try:
+            if peek().text != '=':
+                consume(':')
+                var_type = yield parse_type_expression(name)
+            consume('=')
+            value = yield parse_expression()
+        except CompileError as error:
+            # The variable is still declared, so that its uses are not
+            # reported as undefined.
+            value = recover(error)
         
         return ast.VarDec(name=name, value=value, location=start_token.loc, dec_type=var_type)
     
-    def parse_type_expression(var: ast.Identifier) -> ast.TypeExpr:
+    def parse_type_expression(var: ast.Identifier) -> Step[ast.TypeExpr]:
         if peek().text in ['Int','Bool','Unit']:
             token = consume()
             return ast.SimpleType(var, token.loc ,token.text)
         elif peek().text == '(':
             params = []
             first = consume('(')
-            params.append(parse_type_expression(var))
+            params.append((yield parse_type_expression(var)))
             while peek().text == ',':
                 consume(',')
-                params.append(parse_type_expression(var))
+                params.append((yield parse_type_expression(var)))
             consume(')')
             consume('=')
             consume('>')
             
-            result = parse_type_expression(var)
+            result = yield parse_type_expression(var)
             return ast.TypeFunction(var, first.loc, params, result)
         else:
-            raise Exception(f'{peek().loc}: Could not parse type "{peek().text}".')
+            raise CompileError(peek().loc, f'Could not parse type "{peek().text}".')
 
         
     
-    def parse_loop() -> ast.Expression:
+    def parse_loop() -> Step[ast.Expression]:
         start_token = consume('while')
-        while_exp = parse_expression()
+        while_exp = yield parse_expression()
         consume('do')
-        do_exp = parse_expression()
+        do_exp = yield parse_expression()
         
         return ast.Loop(location=start_token.loc, while_exp=while_exp,do_exp=do_exp)
         
     
-    def parse_expression(level: int = 0) -> ast.Expression:
-        nonlocal precedence_levels_binary_op
-        nonlocal left_associative_binary_operators
-        
-        if level >= precedence_levels_binary_op:
-            return parse_factor()
-        else:
-            left = parse_expression(level+1)
-        
-        if peek().text == '(' and isinstance(left, ast.Identifier):
-            left = parse_function_call(left)
-        
-        #if assignment:
-        if peek().text == '=':
-            return parse_assignment(left)
-        
-        while peek().text in left_associative_binary_operators[level]:
-            operator_token = consume()
-            operator = operator_token.text
+    def parse_expression(min_level: int = 0) -> Step[ast.Expression]:
+        # Precedence climbing: after an operand, the binding power of the
+        # next operator decides directly which level it belongs to, instead
+        # of descending through every level for every operand. Operators
+        # waiting for their right operand are kept on `pending` rather than
+        # in recursive calls.
+        pending: list[tuple[ast.Expression, str, int, int]] = []
+        while True:
+            nested_parser = nested_factor_parsers.get(peek().text)
+            if nested_parser is not None:
+                left = yield nested_parser()
+            else:
+                left = parse_simple_factor()
             
-            right = parse_expression(level+1)
-            left = ast.BinaryOp(
-                left=left,
-                op=operator,
-                right=right,
-                location=left.location
-            )
-
-        return left
+            if peek().text == '(' and isinstance(left, ast.Identifier):
+                left = yield parse_function_call(left)
+            
+            # An assignment takes everything accumulated on the left at the
+            # highest level that has not yet consumed an operator.
+            assignment_level = precedence_levels_binary_op - 1
+            while True:
+                operator = peek().text
+                level = binding_powers.get(operator)
+                if level is not None and level >= min_level:
+                    consume()
+                    pending.append((left, operator, level, min_level))
+                    min_level = level + 1
+                    break
+                
+                if operator == '=' and assignment_level >= min_level:
+                    left = yield parse_assignment(left)
+                if not pending:
+                    return left
+                
+                # The right operand is complete.
+                operand_left, operator, level, min_level = pending.pop()
+                left = ast.BinaryOp(
+                    left=operand_left,
+                    op=operator,
+                    right=left,
+                    location=operand_left.location
+                )
+                assignment_level = level - 1
     
-    def parse_block() -> ast.Expression:
+    def parse_statement() -> Step[ast.Expression]:
+        step = parse_var_declaration() if peek().text == 'var' else parse_expression()
+        # Without diagnostics, the statement is not wrapped in another step.
+        return step if diagnostics is None else recovering(step)
+
+    def recovering(step: Step[ast.Expression]) -> Step[ast.Expression]:
+        try:
+            return (yield step)
+        except CompileError as error:
+            return recover(error)
+
+    def parse_block() -> Step[ast.Expression]:
+        nonlocal open_blocks
         expressions: list[ast.Expression] = []
         start_token = consume('{')
-        if peek().text == 'var':
-            expr = parse_var_declaration()
-        elif peek().text != '}':
-            expr = parse_expression()
+        open_blocks += 1
+        if peek().text != '}':
+            expr = yield parse_statement()
         else:
             expr = ast.Literal(value=None, location=None)
 
-        while (peek().text == ';' or (lookback().text == '}' and (peek().text not in [';','}']))):
-
-            expressions.append(expr)
-            if peek().text == ';':
-                consume(';')
-            if peek().text == '}':
-                expr = ast.Literal(value=None, location=None)
-            else:
-                if peek().text == 'var':
-                    expr = parse_var_declaration()
+        while True:
+            # At the end of input, a block ending in `}` leaves the loop, so a
+            # missing `}` is reported once below.
+            if peek().text == ';' or (lookback().text == '}' and peek().text not in [';','}'] and peek().type != 'end'):
+                expressions.append(expr)
+                if peek().text == ';':
+                    consume(';')
+                if peek().text == '}':
+                    expr = ast.Literal(value=None, location=None)
                 else:
-                    expr = parse_expression()
+                    expr = yield parse_statement()
+            elif diagnostics is not None and peek().text != '}' and peek().type != 'end':
+                # A missing `;`: the rest of the statement is skipped.
+                expressions.append(expr)
+                expr = recover(CompileError(peek().loc, f'expected ";" or "}}", got {peek().text}'))
+            else:
+                break
 
         #result should not be var declaration?
-        if isinstance(expr, ast.VarDec):
-            raise Exception(f'{expr.location}: Result should not be a variable declaration.')
-        consume('}')
+        if isinstance(expr, ast.VarDec) and (diagnostics is None or peek().type != 'end'):
+            recover(CompileError(expr.location, 'Result should not be a variable declaration.'))
+        open_blocks -= 1
+        try:
+            consume('}')
+        except CompileError as error:
+            # Only the end of the input is left.
+            recover(error)
         return ast.Block(expressions=expressions, result=expr, location=start_token.loc)
             
     
-    def parse_top_level() -> ast.Expression:
+    def parse_top_level() -> Step[ast.Expression]:
         expressions: list[ast.Expression] = []
         while True:
             if peek().type == 'end':
                 break
             if lookback().text not in [';','}'] and lookback().type!='start' and peek().type != 'end':
                 break
-            if peek().text == 'var':
-                expr = parse_var_declaration()
-            else:
-                expr = parse_expression()
-            if lookback().text != '}':
-                consume(';')
+            start = consumed
+            expr = yield parse_statement()
+            if recovered_at == consumed:
+                # A recovery stopped at the `;` that ends the statement, even
+                # if a `}` was skipped before it, or at the end.
+                if peek().text == ';':
+                    consume(';')
+            elif lookback().text != '}':
+                try:
+                    consume(';')
+                except CompileError as error:
+                    expressions.append(expr)
+                    expr = recover(error)
+                    if peek().text == ';':
+                        consume(';')
             expressions.append(expr)
+            if item_spans is not None:
+                item_spans.append((start, consumed))
 
         if len(expressions)>0:
-            start = expressions[0].location
+            start_location = expressions[0].location
         else:
-            start = None
+            start_location = None
         
         if len(expressions) == 1:
             return expressions[0]
         else:
-            return ast.Block(expressions=expressions, result=ast.Literal(None,None), location=start)
+            return ast.Block(expressions=expressions, result=ast.Literal(None,None), location=start_location)
     
-    def parse_and_handle_entire_expression() -> ast.Expression:
-        expr = parse_top_level()
+    def parse_and_handle_entire_expression() -> Step[ast.Expression]:
+        expr = yield parse_top_level()
         #if leftover tokens, raise excpetion
         if peek().type != 'end':
-            raise Exception(f'{peek().loc}: Unexpected token. Could not parse: {peek().type} "{peek().text}".')
+            raise CompileError(peek().loc, f'Unexpected token. Could not parse: {peek().type} "{peek().text}".')
         return expr
     
-    return parse_and_handle_entire_expression()
+    # Keywords and punctuation take precedence over the token type, so that
+    # e.g. "if" is not parsed as an identifier.
+    nested_factor_parsers: dict[str, Callable[[], Step[ast.Expression]]] = {
+        '(': parse_parenthesized,
+        '{': parse_block,
+        '-': parse_unary,
+        'not': parse_unary,
+        'if': parse_control,
+        'while': parse_loop,
+    }
+    factor_parsers_by_type: dict[str, Callable[[], ast.Expression]] = {
+        'int_literal': parse_int_literal,
+        'bool_literal': parse_bool_literal,
+        'identifier': parse_identifier,
+    }
+    
+    return run(parse_and_handle_entire_expression())
 
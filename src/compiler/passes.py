@@ -0,0 +1,119 @@
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Callable, TypeAlias
+
+from compiler.ir import IRVar, Instruction, Label, LoadIntConst, LoadBoolConst, Copy, Call, Jump, CondJump
+
+# A pass takes the instructions of a program and returns the optimized ones.
+# Passes must not modify the instructions they are given.
+IRPass: TypeAlias = Callable[[list[Instruction]], list[Instruction]]
+
+@dataclass
+class PassStats:
+    name: str
+    seconds: float
+    instructions_before: int
+    instructions_after: int
+
+class PassManager:
+    """Runs IR passes in order and records how long each took and how many
+    instructions it removed."""
+
+    def __init__(self, passes: list[tuple[str, IRPass]] | None = None) -> None:
+        self.passes: list[tuple[str, IRPass]] = list(passes or [])
+        self.stats: list[PassStats] = []
+
+    def add(self, name: str, ir_pass: IRPass) -> None:
+        self.passes.append((name, ir_pass))
+
+    def run(self, instructions: list[Instruction]) -> list[Instruction]:
+        for name, ir_pass in self.passes:
+            before = len(instructions)
+            start = time.perf_counter()
+            instructions = ir_pass(instructions)
+            self.stats.append(PassStats(name, time.perf_counter() - start, before, len(instructions)))
+        return instructions
+
+    def report(self) -> str:
+        lines = []
+        for stats in self.stats:
+            delta = stats.instructions_after - stats.instructions_before
+            lines.append(f'{stats.name:28s} {stats.seconds * 1000:8.3f} ms '
+                         f'{stats.instructions_before:8d} -> {stats.instructions_after:8d} ({delta:+d})')
+        return '\n'.join(lines)
+
+def _dest_of(insn: Instruction) -> IRVar | None:
+    if isinstance(insn, (LoadIntConst, LoadBoolConst, Copy, Call)):
+        return insn.dest
+    return None
+
+def _uses_of(insn: Instruction) -> list[IRVar]:
+    match insn:
+        case Copy():
+            return [insn.source]
+        case Call():
+            return insn.args
+        case CondJump():
+            return [insn.cond]
+    return []
+
+def remove_unreachable_code(instructions: list[Instruction]) -> list[Instruction]:
+    """Drops instructions between an unconditional jump and the next label."""
+    result: list[Instruction] = []
+    reachable = True
+    for insn in instructions:
+        if isinstance(insn, Label):
+            reachable = True
+        if reachable:
+            result.append(insn)
+        if isinstance(insn, Jump):
+            reachable = False
+    return result
+
+def remove_jumps_to_next_label(instructions: list[Instruction]) -> list[Instruction]:
+    """Drops jumps to the label right after them."""
+    result: list[Instruction] = []
+    for i, insn in enumerate(instructions):
+        next_insn = instructions[i + 1] if i + 1 < len(instructions) else None
+        if isinstance(insn, Jump) and isinstance(next_insn, Label) and insn.label.name == next_insn.name:
+            continue
+        result.append(insn)
+    return result
+
+def remove_unused_labels(instructions: list[Instruction]) -> list[Instruction]:
+    used: set[str] = set()
+    for insn in instructions:
+        if isinstance(insn, Jump):
+            used.add(insn.label.name)
+        elif isinstance(insn, CondJump):
+            used.add(insn.then_label.name)
+            used.add(insn.else_label.name)
+    return [insn for insn in instructions if not isinstance(insn, Label) or insn.name in used]
+
+def coalesce_copies(instructions: list[Instruction]) -> list[Instruction]:
+    """Writes results directly to the destination of the copy that follows.
+
+    `Call(+, [a, b], x1); Copy(x1, c)` becomes `Call(+, [a, b], c)` when x1 is
+    assigned and read nowhere else."""
+    assignments = Counter(dest for insn in instructions if (dest := _dest_of(insn)) is not None)
+    uses = Counter(var for insn in instructions for var in _uses_of(insn))
+    result: list[Instruction] = []
+    for insn in instructions:
+        if (
+            isinstance(insn, Copy) and result
+            and _dest_of(result[-1]) == insn.source
+            and assignments[insn.source] == 1 and uses[insn.source] == 1
+        ):
+            result[-1] = replace(result[-1], dest=insn.dest)  # type: ignore[call-arg]
+            continue
+        result.append(insn)
+    return result
+
+def default_passes() -> PassManager:
+    return PassManager([
+        ('remove_unreachable_code', remove_unreachable_code),
+        ('remove_jumps_to_next_label', remove_jumps_to_next_label),
+        ('remove_unused_labels', remove_unused_labels),
+        ('coalesce_copies', coalesce_copies),
+    ])
@@ -0,0 +1,166 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from compiler import ast
+from compiler.trampoline import Step
+
+# Nodes are told apart by their kind and Location. Nodes without one, like
+# the result of a block that ends in `;`, share (-1, -1). Nodes with the same
+# key are counted together: in `a + b + c` both operations start at `a`. Like
+# cProfile does for recursion, the time of a node that runs inside another
+# with the same key is only in the outer one's `seconds`.
+NodeKey = tuple[int, int, str]
+
+@dataclass
+class NodeStats:
+    row: int
+    column: int
+    kind: str
+    # The operator of a BinaryOp or UnaryOp.
+    op: str | None = None
+    count: int = 0
+    # Time in the node and everything it evaluated, and without the latter.
+    seconds: float = 0.0
+    self_seconds: float = 0.0
+    # How many nodes with this key are being evaluated, while profiling.
+    active: int = field(default=0, repr=False, compare=False)
+
+@dataclass
+class LineStats:
+    row: int
+    count: int = 0
+    self_seconds: float = 0.0
+
+@dataclass
+class LoopStats:
+    loop: NodeStats
+    # The body's node, which counts the iterations.
+    body: NodeStats | None
+
+    @property
+    def iterations(self) -> int:
+        return self.body.count if self.body is not None else 0
+
+@dataclass
+class ExecutionProfile:
+    """How often each node of a program was evaluated and how long it took,
+    as recorded by interpret(..., profile=...) on the tree engine."""
+    nodes: dict[NodeKey, NodeStats] = field(default_factory=dict)
+    # The key of the body of each Loop.
+    loop_bodies: dict[NodeKey, NodeKey] = field(default_factory=dict)
+
+    def lines(self) -> list[LineStats]:
+        """The evaluations and time of each source row, by row."""
+        lines: dict[int, LineStats] = {}
+        for stats in self.nodes.values():
+            line = lines.get(stats.row)
+            if line is None:
+                line = lines[stats.row] = LineStats(stats.row)
+            line.count += stats.count
+            line.self_seconds += stats.self_seconds
+        return [lines[row] for row in sorted(lines)]
+
+    def hottest_loops(self, limit: int = 10) -> list[LoopStats]:
+        loops = [
+            LoopStats(self.nodes[key], self.nodes.get(body))
+            for key, body in self.loop_bodies.items()
+        ]
+        return sorted(loops, key=lambda loop: loop.loop.seconds, reverse=True)[:limit]
+
+    def hottest_binary_ops(self, limit: int = 10) -> list[NodeStats]:
+        ops = [stats for stats in self.nodes.values() if stats.kind == 'BinaryOp']
+        return sorted(ops, key=lambda stats: stats.seconds, reverse=True)[:limit]
+
+    def report(self, limit: int = 10) -> str:
+        total = sum(stats.self_seconds for stats in self.nodes.values()) or float('inf')
+        lines = ['hottest lines:']
+        hottest_lines = sorted(self.lines(), key=lambda line: line.self_seconds, reverse=True)[:limit]
+        for line in hottest_lines:
+            row = f'row {line.row}' if line.row >= 0 else 'no location'
+            lines.append(f'  {row:14s} {line.self_seconds * 1000:10.3f} ms {line.self_seconds / total:6.1%} '
+                         f'{line.count:10d} evaluations')
+        lines.append('hottest loops:')
+        for loop in self.hottest_loops(limit):
+            lines.append(f'  {_where(loop.loop):14s} {loop.loop.seconds * 1000:10.3f} ms {loop.loop.seconds / total:6.1%} '
+                         f'{loop.iterations:10d} iterations')
+        lines.append('hottest binary operations:')
+        for op in self.hottest_binary_ops(limit):
+            lines.append(f'  {_where(op):14s} {op.seconds * 1000:10.3f} ms {op.seconds / total:6.1%} '
+                         f'{op.count:10d} evaluations of "{op.op}"')
+        return '\n'.join(lines)
+
+    def __str__(self) -> str:
+        return self.report()
+
+def _where(stats: NodeStats) -> str:
+    return f'{stats.row}:{stats.column}' if stats.row >= 0 else 'no location'
+
+def _key(node: ast.Expression) -> NodeKey:
+    if node.location is None:
+        return (-1, -1, type(node).__name__)
+    return (node.location.row, node.location.column, type(node).__name__)
+
+def run_profiled(step: Step[Any], profile: ExecutionProfile) -> Any:
+    """Runs a step of the tree interpreter like compiler.trampoline.run, and
+    records the evaluations and time of the node of every step in `profile`.
+
+    The interpreter's steps are not changed for this: the node of a step is
+    its `node` argument. Runs without a profile use the plain trampoline, so
+    they check nothing per node."""
+    nodes = profile.nodes
+    perf_counter = time.perf_counter
+
+    def stats_of(step: Step[Any]) -> NodeStats:
+        node: ast.Expression = step.gi_frame.f_locals['node']  # type: ignore[attr-defined]
+        key = _key(node)
+        stats = nodes.get(key)
+        if stats is None:
+            stats = nodes[key] = NodeStats(key[0], key[1], key[2], getattr(node, 'op', None))
+            if isinstance(node, ast.Loop):
+                profile.loop_bodies[key] = _key(node.do_exp)
+        stats.active += 1
+        return stats
+
+    # For each step on the stack: its stats, when it started, and the time
+    # its children took.
+    stack: list[Step[Any]] = [step]
+    frames: list[tuple[NodeStats, float]] = [(stats_of(step), perf_counter())]
+    child_seconds: list[float] = [0.0]
+    value: Any = None
+    error: Exception | None = None
+
+    def finish() -> None:
+        stack.pop()
+        stats, start = frames.pop()
+        seconds = perf_counter() - start
+        stats.count += 1
+        stats.active -= 1
+        if not stats.active:
+            stats.seconds += seconds
+        stats.self_seconds += seconds - child_seconds.pop()
+        if child_seconds:
+            child_seconds[-1] += seconds
+
+    while True:
+        try:
+            if error is None:
+                child = stack[-1].send(value)
+            else:
+                thrown, error = error, None
+                child = stack[-1].throw(thrown)
+        except StopIteration as stop:
+            finish()
+            if not stack:
+                return stop.value
+            value = stop.value
+        except Exception as e:
+            finish()
+            if not stack:
+                raise
+            error = e
+        else:
+            stack.append(child)
+            frames.append((stats_of(child), perf_counter()))
+            child_seconds.append(0.0)
+            value = None
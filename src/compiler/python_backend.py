@@ -0,0 +1,196 @@
+import re
+from functools import lru_cache
+from types import CodeType
+from typing import Any
+
+from compiler import ast
+from compiler.resolver import resolve
+from compiler.runtime import Value, builtin_functions, int_div, int_rem
+from compiler.trampoline import Step, run
+
+# Operators that map directly to a Python operator. Every generated operation
+# is parenthesized, so Python's own precedence and comparison chaining never
+# come into play.
+python_operators = {
+    '+': '+', '-': '-', '*': '*', '<': '<', '<=': '<=', '>': '>', '>=': '>=',
+    '==': '==', '!=': '!=',
+}
+runtime_functions = {'/': 'int_div', '%': 'int_rem'}
+
+# Names the generated code can refer to as globals.
+python_globals: dict[str, Any] = {'int_div': int_div, 'int_rem': int_rem, **builtin_functions}
+
+# Expressions that can be evaluated at any time with the same result.
+_constant_pattern = re.compile(r'-?[0-9]+|True|False|None')
+
+# Expressions longer than this are stored in a temporary, which keeps the
+# nesting of the generated expressions well below the limits of compile().
+_max_expression_length = 256
+
+def generate_python(node: ast.Expression) -> str:
+    """Translates a typechecked program into the source of a Python module.
+
+    The module defines `program()`, which runs the program and returns its
+    value. Blocks become statement sequences, loops become `while` loops and
+    every declaration gets its own renamed local, so shadowed variables stay
+    apart. Deeply nested blocks become deeply indented statements, which
+    compile() rejects, so such programs should use the VM instead."""
+    temp_count = 0
+    builtin_count = len(builtin_functions)
+    resolve(node)
+
+    def new_temp() -> str:
+        nonlocal temp_count
+        temp_count += 1
+        return f'_t{temp_count}'
+
+
+    def spill(expr: str, lines: list[str], indent: str) -> str:
+        # Stores a result in a temporary, unless it is a constant.
+        if _constant_pattern.fullmatch(expr):
+            return expr
+        temp = new_temp()
+        lines.append(f'{indent}{temp} = {expr}')
+        return temp
+
+    def compile_variable(node: ast.Identifier) -> str:
+        # Every renamed variable ends in `_<slot>`, while temporaries do not.
+        if node.slot is None:
+            raise Exception(f'{node.location}: Variable "{node.name}" not defined.')
+        if node.slot < builtin_count:
+            return node.name
+        return f'{node.name}_{node.slot}'
+
+    def compile_operands(nodes: list[ast.Expression], lines: list[str], indent: str) -> Step[list[str]]:
+        # Operands are evaluated left to right. When an operand needs
+        # statements, the results of the operands before it are stored first,
+        # so the statements cannot change them.
+        exprs: list[str] = []
+        for node in nodes:
+            operand_lines: list[str] = []
+            expr = yield compile_node(node, operand_lines, indent)
+            if operand_lines:
+                exprs = [spill(e, lines, indent) for e in exprs]
+                lines.extend(operand_lines)
+            exprs.append(expr)
+        return exprs
+
+    def compile_branch(node: ast.Expression | None, indent: str) -> Step[tuple[list[str], str]]:
+        if node is None:
+            return [], 'None'
+        lines: list[str] = []
+        expr = yield compile_node(node, lines, indent)
+        return lines, expr
+
+    def compile_node(node: ast.Expression, lines: list[str], indent: str) -> Step[str]:
+        # A step (see compiler.trampoline). Appends the statements the node
+        # needs to `lines` and returns a Python expression for its value.
+        expr = yield compile_node_lower(node, lines, indent)
+        if len(expr) > _max_expression_length:
+            return spill(expr, lines, indent)
+        return expr
+
+    def compile_node_lower(node: ast.Expression, lines: list[str], indent: str) -> Step[str]:
+        match node:
+            case ast.Literal():
+                return repr(node.value)
+
+            case ast.Identifier():
+                return compile_variable(node)
+
+            case ast.BinaryOp():
+                if node.op in ['and', 'or']:
+                    left = yield compile_node(node.left, lines, indent)
+                    right_lines, right = yield compile_branch(node.right, indent + '    ')
+                    if not right_lines:
+                        return f'({left} {node.op} {right})'
+                    temp = new_temp()
+                    lines.append(f'{indent}{temp} = {left}')
+                    lines.append(f'{indent}if {"" if node.op == "and" else "not "}{temp}:')
+                    lines.extend(right_lines)
+                    lines.append(f'{indent}    {temp} = {right}')
+                    return temp
+                left, right = yield compile_operands([node.left, node.right], lines, indent)
+                if node.op in python_operators:
+                    return f'({left} {python_operators[node.op]} {right})'
+                if node.op in runtime_functions:
+                    return f'{runtime_functions[node.op]}({left}, {right})'
+                raise Exception(f'{node.location}: Unknown operator "{node.op}".')
+
+            case ast.UnaryOp():
+                element = yield compile_node(node.element, lines, indent)
+                return f'({node.op} {element})'
+
+            case ast.IfThenElse():
+                condition = yield compile_node(node.condition, lines, indent)
+                then_lines, then_expr = yield compile_branch(node.then_branch, indent + '    ')
+                else_lines, else_expr = yield compile_branch(node.else_branch, indent + '    ')
+                if not then_lines and not else_lines:
+                    return f'({then_expr} if {condition} else {else_expr})'
+                temp = new_temp()
+                lines.append(f'{indent}if {condition}:')
+                lines.extend(then_lines)
+                lines.append(f'{indent}    {temp} = {then_expr}')
+                lines.append(f'{indent}else:')
+                lines.extend(else_lines)
+                lines.append(f'{indent}    {temp} = {else_expr}')
+                return temp
+
+            case ast.VarDec():
+                value = yield compile_node(node.value, lines, indent)
+                name = compile_variable(node.name)
+                lines.append(f'{indent}{name} = {value}')
+                return name
+
+            case ast.Assignment():
+                if not isinstance(node.left, ast.Identifier):
+                    raise Exception(f'{node.location}: Can only assign to a variable.')
+                if node.left.slot is None:
+                    raise Exception(f'{node.location}: "{node.left.name}" has not been declared.')
+                value = yield compile_node(node.right, lines, indent)
+                name = compile_variable(node.left)
+                lines.append(f'{indent}{name} = {value}')
+                return name
+
+            case ast.Block():
+                for exp in node.expressions:
+                    expr = yield compile_node(exp, lines, indent)
+                    # Names and constants have no effects, the rest is kept.
+                    if not expr.isidentifier() and not _constant_pattern.fullmatch(expr):
+                        lines.append(f'{indent}{expr}')
+                return (yield compile_node(node.result, lines, indent))
+
+            case ast.Loop():
+                condition_lines, condition = yield compile_branch(node.while_exp, indent + '    ')
+                body_lines, body = yield compile_branch(node.do_exp, indent + '    ')
+                if condition_lines:
+                    lines.append(f'{indent}while True:')
+                    lines.extend(condition_lines)
+                    lines.append(f'{indent}    if not {condition}:')
+                    lines.append(f'{indent}        break')
+                else:
+                    lines.append(f'{indent}while {condition}:')
+                lines.extend(body_lines)
+                lines.append(f'{indent}    {body}')
+                return 'None'
+
+            case ast.FunctionNode():
+                function, *arguments = yield compile_operands([node.function, *node.arguments], lines, indent)
+                return f'{function}({", ".join(arguments)})'
+
+        raise Exception(f'{node.location}: Unexpected node.')
+
+    lines: list[str] = []
+    result = run(compile_node(node, lines, '    '))
+    return '\n'.join(['def program():', *lines, f'    return {result}', ''])
+
+@lru_cache(maxsize=64)
+def compile_python(source: str) -> CodeType:
+    """Compiles generated source once; later runs reuse the code object."""
+    return compile(source, '<program>', 'exec')
+
+def run_python(node: ast.Expression) -> Value:
+    """Runs a typechecked program by translating it to Python."""
+    namespace = dict(python_globals)
+    exec(compile_python(generate_python(node)), namespace)
+    return namespace['program']()
@@ -0,0 +1,81 @@
+from typing import Iterable
+
+from compiler import ast
+from compiler.runtime import binary_operators, builtin_functions, short_circuit_operators, unary_operators
+from compiler.trampoline import Step, run
+
+def resolve(node: ast.Expression, globals: Iterable[str] = builtin_functions) -> int:
+    """Sets the `slot` of every Identifier to the frame slot of the variable
+    it refers to, and returns the size of the frame.
+
+    The frame starts with the globals, in order, and every declaration gets a
+    slot of its own after them, so shadowed variables never share a slot.
+    Names are looked up here once, and the typechecker and the engines index
+    the frame with the slots. Identifiers of undeclared names get slot None,
+    for their users to report.
+
+    Operators are looked up here once too: every BinaryOp and UnaryOp gets
+    its `function`, and `and` and `or` their `short_circuit`."""
+    bindings: dict[str, list[int]] = {name: [i] for i, name in enumerate(globals)}
+    return resolve_in(node, bindings, len(bindings))
+
+def resolve_in(node: ast.Expression, bindings: dict[str, list[int]], slot_count: int) -> int:
+    """Resolves `node` where `bindings` holds the slots each name refers to,
+    innermost last, and slots from `slot_count` on are free. Declarations
+    outside blocks are left in `bindings`. Returns the new slot count."""
+    # The names declared in each open block. Lookups are a dict access
+    # however deep blocks nest.
+    block_names: list[list[str]] = [[]]
+
+    def declare(node: ast.Identifier) -> None:
+        nonlocal slot_count
+        node.slot = slot_count
+        slot_count += 1
+        bindings.setdefault(node.name, []).append(node.slot)
+        block_names[-1].append(node.name)
+
+    def visit(node: ast.Expression) -> Step[None]:
+        # A step (see compiler.trampoline), so deep programs resolve without
+        # recursion.
+        match node:
+            case ast.Identifier():
+                slots = bindings.get(node.name)
+                node.slot = slots[-1] if slots else None
+            case ast.BinaryOp():
+                node.function = binary_operators.get(node.op)
+                node.short_circuit = short_circuit_operators.get(node.op)
+                yield visit(node.left)
+                yield visit(node.right)
+            case ast.UnaryOp():
+                node.function = unary_operators.get(node.op)
+                yield visit(node.element)
+            case ast.IfThenElse():
+                yield visit(node.condition)
+                yield visit(node.then_branch)
+                if node.else_branch is not None:
+                    yield visit(node.else_branch)
+            case ast.VarDec():
+                # The value is resolved before the name is declared, so that
+                # it refers to any outer variable of the same name.
+                yield visit(node.value)
+                declare(node.name)
+            case ast.Assignment():
+                yield visit(node.left)
+                yield visit(node.right)
+            case ast.Block():
+                block_names.append([])
+                for exp in node.expressions:
+                    yield visit(exp)
+                yield visit(node.result)
+                for name in block_names.pop():
+                    bindings[name].pop()
+            case ast.Loop():
+                yield visit(node.while_exp)
+                yield visit(node.do_exp)
+            case ast.FunctionNode():
+                yield visit(node.function)
+                for argument in node.arguments:
+                    yield visit(argument)
+
+    run(visit(node))
+    return slot_count
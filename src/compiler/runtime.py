@@ -0,0 +1,52 @@
+import operator
+from typing import Any, Callable, TypeAlias
+
+Value: TypeAlias = int | bool | None
+
+def int_div(a: int, b: int) -> int:
+    """Integer division rounding towards zero, like the x86 idiv instruction."""
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+def int_rem(a: int, b: int) -> int:
+    """Remainder of int_div(), with the sign of the dividend."""
+    return a - b * int_div(a, b)
+
+def print_int(value: int) -> None:
+    print(value)
+
+def print_bool(value: bool) -> None:
+    print('true' if value else 'false')
+
+# Binary operators that always evaluate both operands. `and` and `or`
+# short-circuit, so every engine implements them itself.
+binary_operators: dict[str, Callable[[Any, Any], Any]] = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': int_div,
+    '%': int_rem,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# The value of the left operand of `and` and `or` that decides the result,
+# so that the right one is not evaluated.
+short_circuit_operators: dict[str, bool] = {
+    'and': False,
+    'or': True,
+}
+
+unary_operators: dict[str, Callable[[Any], Any]] = {
+    '-': operator.neg,
+    'not': operator.not_,
+}
+
+builtin_functions: dict[str, Callable[..., None]] = {
+    'print_int': print_int,
+    'print_bool': print_bool,
+}
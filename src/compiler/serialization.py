@@ -0,0 +1,370 @@
+import gc
+import mmap
+from typing import Any
+
+from compiler import ast
+from compiler.objs.location import Location
+from compiler.objs.types import Type, Int, Bool, Unit, FunType, Error
+
+# A serialized AST is, after the magic bytes:
+#
+#   strings:    count, then for each its length and UTF-8 bytes
+#   locations:  count, then for each its file (a string index), row, column
+#               and whether it equals all locations
+#   types:      count, then for each a tag and, for function types, the
+#               parameter count, the parameter indices and the result index
+#   nodes:      count, then the nodes in postorder
+#
+# All numbers are unsigned LEB128 varints, and integer literals are zigzag
+# encoded first. A node is its kind, its location index plus one (zero for
+# no location), its type index and then the fields of its kind below. Its
+# children come before it, so a loader builds the tree with a stack.
+MAGIC = b'CAST\x01'
+
+(LITERAL, IDENTIFIER, BINARY_OP, UNARY_OP, IF_THEN_ELSE, FUNCTION_NODE, BLOCK, VAR_DEC, LOOP, ASSIGNMENT,
+ ERROR_EXPRESSION) = range(11)
+
+# Literal values.
+VALUE_NONE, VALUE_FALSE, VALUE_TRUE, VALUE_INT = range(4)
+
+# Types. Error is the type of code with errors (see compiler.diagnostics).
+TYPE_UNIT, TYPE_INT, TYPE_BOOL, TYPE_FUN, TYPE_ERROR = range(5)
+SIMPLE_TYPES: dict[int, Type] = {TYPE_UNIT: Unit, TYPE_INT: Int, TYPE_BOOL: Bool, TYPE_ERROR: Error}
+
+# Declared types of variables, written inline after a VarDec node.
+NO_TYPE_EXPR, SIMPLE_TYPE, TYPE_FUNCTION = range(3)
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def dump_ast(root: ast.Expression) -> bytes:
+    """Serializes an AST, typechecked or not. Identifier slots are not kept;
+    they are set again by compiler.resolver."""
+    nodes = bytearray()
+    strings: dict[str, int] = {}
+    locations: dict[tuple[str, int, int, bool], int] = {}
+    location_list: list[Location] = []
+    types: dict[Type, int] = {}
+    type_list: list[list[int]] = []
+    node_count = 0
+
+    def string(text: str) -> int:
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    def location(loc: Location | None) -> int:
+        if loc is None:
+            return 0
+        key = (loc.file, loc.row, loc.column, loc.equal_to_all)
+        index = locations.get(key)
+        if index is None:
+            string(loc.file)
+            index = locations[key] = len(locations)
+            location_list.append(loc)
+        return index + 1
+
+    def type_index(t: Type) -> int:
+        # Types are interned, so they are keyed by identity.
+        index = types.get(t)
+        if index is None:
+            if isinstance(t, FunType):
+                entry = [TYPE_FUN, len(t.parameters), *[type_index(p) for p in t.parameters], type_index(t.result)]
+            elif t is Int:
+                entry = [TYPE_INT]
+            elif t is Bool:
+                entry = [TYPE_BOOL]
+            elif t is Unit:
+                entry = [TYPE_UNIT]
+            elif t is Error:
+                entry = [TYPE_ERROR]
+            else:
+                raise Exception(f'Unexpected type {t}.')
+            index = types[t] = len(type_list)
+            type_list.append(entry)
+        return index
+
+    def write_type_expr(type_expr: ast.TypeExpr | None) -> None:
+        match type_expr:
+            case None:
+                nodes.append(NO_TYPE_EXPR)
+            case ast.SimpleType():
+                nodes.append(SIMPLE_TYPE)
+                _write_varint(nodes, location(type_expr.location))
+                _write_varint(nodes, string(type_expr.type_name))
+            case ast.TypeFunction():
+                nodes.append(TYPE_FUNCTION)
+                _write_varint(nodes, location(type_expr.location))
+                _write_varint(nodes, len(type_expr.parameters))
+                for parameter in type_expr.parameters:
+                    write_type_expr(parameter)
+                write_type_expr(type_expr.result)
+            case _:
+                raise Exception(f'{type_expr.location}: Unexpected type expression.')
+
+    # Nodes are written when popped the second time, after their children.
+    stack: list[tuple[ast.Expression, bool]] = [(root, False)]
+    while stack:
+        node, children_written = stack.pop()
+        if not children_written:
+            stack.append((node, True))
+            stack += [(child, False) for child in reversed(_children(node))]
+            continue
+        node_count += 1
+        write = nodes.append
+        match node:
+            case ast.Literal():
+                write(LITERAL)
+            case ast.Identifier():
+                write(IDENTIFIER)
+            case ast.BinaryOp():
+                write(BINARY_OP)
+            case ast.UnaryOp():
+                write(UNARY_OP)
+            case ast.IfThenElse():
+                write(IF_THEN_ELSE)
+            case ast.FunctionNode():
+                write(FUNCTION_NODE)
+            case ast.Block():
+                write(BLOCK)
+            case ast.VarDec():
+                write(VAR_DEC)
+            case ast.Loop():
+                write(LOOP)
+            case ast.Assignment():
+                write(ASSIGNMENT)
+            case ast.ErrorExpression():
+                write(ERROR_EXPRESSION)
+            case _:
+                raise Exception(f'{node.location}: Unexpected node.')
+        _write_varint(nodes, location(node.location))
+        _write_varint(nodes, type_index(node.type))
+        match node:
+            case ast.Literal():
+                value = node.value
+                if value is None:
+                    write(VALUE_NONE)
+                elif value is False:
+                    write(VALUE_FALSE)
+                elif value is True:
+                    write(VALUE_TRUE)
+                else:
+                    write(VALUE_INT)
+                    _write_varint(nodes, value * 2 if value >= 0 else -value * 2 - 1)
+            case ast.Identifier():
+                _write_varint(nodes, string(node.name))
+            case ast.BinaryOp() | ast.UnaryOp():
+                _write_varint(nodes, string(node.op))
+            case ast.IfThenElse():
+                write(node.else_branch is not None)
+            case ast.FunctionNode():
+                _write_varint(nodes, len(node.arguments))
+            case ast.Block():
+                _write_varint(nodes, len(node.expressions))
+            case ast.VarDec():
+                write_type_expr(node.dec_type)
+
+    out = bytearray(MAGIC)
+    _write_varint(out, len(strings))
+    for text in strings:
+        encoded = text.encode()
+        _write_varint(out, len(encoded))
+        out += encoded
+    _write_varint(out, len(location_list))
+    for loc in location_list:
+        _write_varint(out, strings[loc.file])
+        _write_varint(out, loc.row)
+        _write_varint(out, loc.column)
+        out.append(loc.equal_to_all)
+    _write_varint(out, len(type_list))
+    for entry in type_list:
+        out.append(entry[0])
+        for number in entry[1:]:
+            _write_varint(out, number)
+    _write_varint(out, node_count)
+    out += nodes
+    return bytes(out)
+
+def _children(node: ast.Expression) -> list[ast.Expression]:
+    # In the order the loader pops them in reverse.
+    match node:
+        case ast.BinaryOp():
+            return [node.left, node.right]
+        case ast.UnaryOp():
+            return [node.element]
+        case ast.IfThenElse():
+            if node.else_branch is None:
+                return [node.condition, node.then_branch]
+            return [node.condition, node.then_branch, node.else_branch]
+        case ast.FunctionNode():
+            return [node.function, *node.arguments]
+        case ast.Block():
+            return [*node.expressions, node.result]
+        case ast.VarDec():
+            return [node.name, node.value]
+        case ast.Loop():
+            return [node.while_exp, node.do_exp]
+        case ast.Assignment():
+            return [node.left, node.right]
+    return []
+
+def load_ast(buffer: bytes | bytearray | memoryview | mmap.mmap) -> ast.Expression:
+    """Builds the AST serialized by dump_ast() straight from a buffer, such
+    as a memory-mapped file, without copying it first."""
+    # The tree has no cycles for the garbage collector to find, and letting
+    # it scan the growing tree over and over doubles the loading time.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # Released before returning, so that a memory map can be closed.
+        with memoryview(buffer) as data:
+            return _load(data)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _load(data: memoryview) -> ast.Expression:
+    if data[:len(MAGIC)] != MAGIC:
+        raise Exception('Not a serialized AST.')
+    pos = len(MAGIC)
+
+    def read_varint() -> int:
+        nonlocal pos
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80:
+            return byte
+        result = byte & 0x7f
+        shift = 7
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    strings = []
+    for _ in range(read_varint()):
+        length = read_varint()
+        strings.append(str(data[pos:pos + length], 'utf-8'))
+        pos += length
+
+    locations: list[Location | None] = [None]
+    for _ in range(read_varint()):
+        file = strings[read_varint()]
+        row = read_varint()
+        column = read_varint()
+        locations.append(Location(file, row, column, bool(data[pos])))
+        pos += 1
+
+    types: list[Type] = []
+    for _ in range(read_varint()):
+        tag = data[pos]
+        pos += 1
+        if tag == TYPE_FUN:
+            parameters = [types[read_varint()] for _ in range(read_varint())]
+            types.append(FunType(parameters, types[read_varint()]))
+        elif tag in SIMPLE_TYPES:
+            types.append(SIMPLE_TYPES[tag])
+        else:
+            raise Exception(f'Unknown type tag {tag} in serialized AST.')
+
+    def read_type_expr(variable: ast.Identifier) -> ast.TypeExpr | None:
+        nonlocal pos
+        tag = data[pos]
+        pos += 1
+        if tag == NO_TYPE_EXPR:
+            return None
+        loc = locations[read_varint()]
+        assert loc is not None
+        if tag == SIMPLE_TYPE:
+            return ast.SimpleType(variable, loc, strings[read_varint()])
+        parameters = [read_type_expr(variable) for _ in range(read_varint())]
+        result = read_type_expr(variable)
+        assert result is not None
+        return ast.TypeFunction(variable, loc, [p for p in parameters if p is not None], result)
+
+    stack: list[Any] = []
+    push = stack.append
+    pop = stack.pop
+    for _ in range(read_varint()):
+        kind = data[pos]
+        # Most locations and types fit in one byte, so that is read inline.
+        byte = data[pos + 1]
+        if byte < 0x80:
+            pos += 2
+            loc = locations[byte]
+        else:
+            pos += 1
+            loc = locations[read_varint()]
+        byte = data[pos]
+        if byte < 0x80:
+            pos += 1
+            node_type = types[byte]
+        else:
+            node_type = types[read_varint()]
+        node: ast.Expression
+        if kind == IDENTIFIER:
+            node = ast.Identifier(loc, strings[read_varint()], type=node_type)
+        elif kind == LITERAL:
+            tag = data[pos]
+            pos += 1
+            if tag == VALUE_INT:
+                number = read_varint()
+                value: int | bool | None = number >> 1 if not number & 1 else -(number >> 1) - 1
+            else:
+                value = None if tag == VALUE_NONE else tag == VALUE_TRUE
+            node = ast.Literal(loc, value, type=node_type)
+        elif kind == BINARY_OP:
+            right = pop()
+            node = ast.BinaryOp(loc, pop(), strings[read_varint()], right, type=node_type)
+        elif kind == UNARY_OP:
+            node = ast.UnaryOp(loc, strings[read_varint()], pop(), type=node_type)
+        elif kind == BLOCK:
+            count = read_varint()
+            result = pop()
+            expressions = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            node = ast.Block(loc, expressions, result, type=node_type)
+        elif kind == VAR_DEC:
+            value_node = pop()
+            name = pop()
+            node = ast.VarDec(loc, name, value_node, read_type_expr(name), type=node_type)
+        elif kind == ASSIGNMENT:
+            right = pop()
+            node = ast.Assignment(loc, pop(), right, type=node_type)
+        elif kind == IF_THEN_ELSE:
+            else_branch = pop() if data[pos] else None
+            pos += 1
+            then_branch = pop()
+            node = ast.IfThenElse(loc, pop(), then_branch, else_branch, type=node_type)
+        elif kind == LOOP:
+            do_exp = pop()
+            node = ast.Loop(loc, pop(), do_exp, type=node_type)
+        elif kind == FUNCTION_NODE:
+            count = read_varint()
+            arguments = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            node = ast.FunctionNode(loc, pop(), arguments, type=node_type)
+        elif kind == ERROR_EXPRESSION:
+            node = ast.ErrorExpression(loc, type=node_type)
+        else:
+            raise Exception(f'Unknown node kind {kind} in serialized AST.')
+        push(node)
+    if len(stack) != 1:
+        raise Exception('Malformed serialized AST.')
+    return stack[0]
+
+def write_ast_file(path: str, root: ast.Expression) -> None:
+    with open(path, 'wb') as f:
+        f.write(dump_ast(root))
+
+def read_ast_file(path: str) -> ast.Expression:
+    """Loads an AST written by write_ast_file() through a memory map."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return load_ast(mapped)
@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from compiler.client import HEADER, encode_message
+
+def handle_request(request: dict[str, Any], main: Callable[[list[str]], int]) -> dict[str, Any]:
+    """Runs `main` on the arguments of a request, with its standard input,
+    and returns the exit status and what was printed."""
+    error = _invalid_request(request)
+    if error is not None:
+        return {'status': 1, 'stdout': '', 'stderr': f'Invalid request: {error}\n'}
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    old_stdin = sys.stdin
+    sys.stdin = io.StringIO(request.get('stdin', ''))
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                status = main(list(request['argv']))
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+                status = 1
+    finally:
+        sys.stdin = old_stdin
+    return {'status': status, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+def _invalid_request(request: Any) -> str | None:
+    """What is wrong with a request, if anything."""
+    if not isinstance(request, dict):
+        return 'not an object'
+    if not isinstance(request.get('argv'), list) or not all(isinstance(arg, str) for arg in request['argv']):
+        return '"argv" must be a list of strings'
+    if not isinstance(request.get('stdin', ''), str):
+        return '"stdin" must be a string'
+    return None
+
+def _init_worker() -> None:
+    # Workers are forked from the server: they stop on SIGTERM, and leave
+    # Ctrl-C to the server.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+async def serve(socket_path: str, main: Callable[[list[str]], int], workers: int | None = None) -> None:
+    """Answers requests of compiler.client on a Unix domain socket until
+    cancelled.
+
+    Any number of clients can connect, and each can send several requests.
+    The requests run in a pool of `workers` processes, by default one per
+    CPU, since they replace the process-wide standard streams, and so that a
+    program that runs long only holds up its own client."""
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker)
+
+    async def run(request: Any) -> dict[str, Any]:
+        nonlocal pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, handle_request, request, main)
+        except BrokenProcessPool:
+            # A worker died, e.g. on a stack overflow. Later requests get
+            # a new pool, unless the server is stopping.
+            if server.is_serving():
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(workers, initializer=_init_worker)
+            return {'status': 1, 'stdout': '', 'stderr': 'The compile server\'s worker process died.\n'}
+
+    async def connected(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    size, = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    request = json.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    break
+                writer.write(encode_message(await run(request)))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    if os.path.exists(socket_path):
+        try:
+            _, writer = await asyncio.open_unix_connection(socket_path)
+        except OSError:
+            # Left behind by a server that did not exit cleanly.
+            os.remove(socket_path)
+        else:
+            writer.close()
+            raise Exception(f'A compile server is already listening on {socket_path}.')
+    server = await asyncio.start_unix_server(connected, socket_path)
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    try:
+        # Not server.serve_forever(), which waits for every connection to
+        # close when it stops, and the clients of programs that never end
+        # would not close theirs.
+        await stop.wait()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        # Workers may be running programs that never end.
+        for process in multiprocessing.active_children():
+            process.terminate()
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,117 @@
+import json
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from types import CodeType
+from typing import Any
+
+@dataclass
+class PhaseTiming:
+    name: str
+    seconds: float = 0.0
+    # Memory blocks the phase left allocated, and the most memory traced
+    # while it ran.
+    allocated_blocks: int = 0
+    peak_bytes: int = 0
+    counters: dict[str, int] = field(default_factory=dict)
+
+class Timings:
+    """Wall time, allocations and counters of each phase of a compilation,
+    for the --timings option.
+
+    Memory is traced with tracemalloc while a phase runs, and calls are
+    counted with a callback, which make it several times slower, so the wall
+    times are best compared with each other."""
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.phases: list[PhaseTiming] = []
+
+    @contextmanager
+    def phase(self, name: str, count: dict[str, list[Callable[..., Any]]] | None = None) -> Iterator[PhaseTiming]:
+        """Times what runs in the `with` block as the phase `name`, counting
+        the calls of the functions in `count` (see CallCounter)."""
+        timing = PhaseTiming(name)
+        self.phases.append(timing)
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        with CallCounter(count or {}) as counter:
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                yield timing
+            finally:
+                timing.seconds = time.perf_counter() - start
+                timing.allocated_blocks = sys.getallocatedblocks() - blocks
+                if tracemalloc.is_tracing():
+                    _, timing.peak_bytes = tracemalloc.get_traced_memory()
+                if tracing:
+                    tracemalloc.stop()
+        timing.counters.update(counter.counts)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'phases': [asdict(phase) for phase in self.phases],
+            'total_seconds': sum(phase.seconds for phase in self.phases),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def __str__(self) -> str:
+        lines = [f'{"phase":12s} {"wall":>12s} {"blocks":>10s} {"peak":>12s}  counters']
+        for phase in self.phases:
+            counters = ' '.join(f'{name}={value}' for name, value in phase.counters.items())
+            lines.append(f'{phase.name:12s} {phase.seconds * 1000:9.3f} ms {phase.allocated_blocks:+10d} '
+                         f'{phase.peak_bytes / 1024:8.0f} KiB  {counters}')
+        total = sum(phase.seconds for phase in self.phases)
+        lines.append(f'{"total":12s} {total * 1000:9.3f} ms')
+        return '\n'.join(lines)
+
+class CallCounter:
+    """Counts how often the given functions start, under the name of each.
+
+    It uses sys.monitoring, which instruments only those functions while
+    counting, so nothing else runs slower and nothing runs slower at all
+    once it is done. A generator counts when it starts, not when it is
+    resumed, so a step of compiler.trampoline counts once per node."""
+
+    def __init__(self, functions: dict[str, list[Callable[..., Any]]]) -> None:
+        self.counts = {name: 0 for name in functions}
+        self._names: dict[CodeType, str] = {
+            function.__code__: name for name, funcs in functions.items() for function in funcs
+        }
+        self._tool: int | None = None
+
+    def _on_start(self, code: CodeType, offset: int) -> None:
+        self.counts[self._names[code]] += 1
+
+    def __enter__(self) -> 'CallCounter':
+        monitoring = sys.monitoring
+        # cProfile (see --profile) and debuggers take their own tool ids.
+        tool = next((i for i in range(6) if monitoring.get_tool(i) is None), None)
+        if tool is None or not self._names:
+            return self
+        monitoring.use_tool_id(tool, 'compiler timings')
+        monitoring.register_callback(tool, monitoring.events.PY_START, self._on_start)
+        for code in self._names:
+            monitoring.set_local_events(tool, code, monitoring.events.PY_START)
+        self._tool = tool
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        tool = self._tool
+        if tool is None:
+            return
+        monitoring = sys.monitoring
+        for code in self._names:
+            monitoring.set_local_events(tool, code, monitoring.events.NO_EVENTS)
+        monitoring.register_callback(tool, monitoring.events.PY_START, None)
+        monitoring.free_tool_id(tool)
+        self._tool = None
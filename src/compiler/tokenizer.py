@@ -1,13 +1,124 @@
 import re
+from sys import intern
+from typing import Iterator, Protocol
 from compiler.objs.tokenclass import Token
+from compiler.objs.tokenbuffer import TokenBuffer, TOKEN_KINDS
 from compiler.objs.location import Location, L
 #from objs.tokenclass import Token
 #from objs.location import Location, L
 
-
+# All token kinds in one alternation, tried left to right at each position.
+# The order of the alternatives matches the priority the tokenizer has always
+# used (comment, whitespace, punctuation, bool, int, operator, identifier), so
+# each token costs a single match instead of one match per token kind. Spaces
+# in front of a token are consumed by the same match.
+token_pattern = re.compile(r'''
+    [ ]*(?:
+    (?P<comment>(?:\#|//).*\n)
+    |(?P<newline>\n[\n ]*)
+    |(?P<punctuation>[(){},;])
+    |(?P<bool_literal>true|false)
+    |(?P<int_literal>[0-9]+)
+    |(?P<operator>==|!=|<=|>=|[<>+-=*/%]|and|or|not)
+    |(?P<identifier>[a-zA-Z_][a-zA-Z0-9_]+|[a-zA-Z])
+    |(?P<skip>.)
+    )
+''', re.VERBOSE)
 
 
 def tokenize(source_code: str) -> list[Token]:
+    tokens, _ = _tokenize_segment(source_code, len(source_code), 0)
+    return tokens
+
+
+class Readable(Protocol):
+    """A file object, or anything else with its read()."""
+    def read(self, size: int, /) -> str: ...
+
+
+def tokenize_stream(source: Readable, chunk_size: int = 1 << 16) -> Iterator[Token]:
+    """Tokenizes a file object lazily, reading it `chunk_size` characters at a time.
+
+    Tokens and comments never continue past a newline, so everything up to the
+    last newline read so far can be tokenized exactly as tokenize() would, and
+    the rest of the line is carried over to the next chunk. Memory use is
+    bounded by the chunk size plus the longest line."""
+    pending = ''
+    line = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            tokens, line = _tokenize_segment(pending, len(pending), line)
+            yield from tokens
+            return
+        text = pending + chunk
+        cut = text.rfind('\n') + 1
+        if cut == 0:
+            pending = text
+            continue
+        tokens, line = _tokenize_segment(text, cut, line)
+        yield from tokens
+        pending = text[cut:]
+
+
+def _tokenize_segment(source_code: str, end: int, line: int) -> tuple[list[Token], int]:
+    """Tokenizes source_code[:end], which starts at the beginning of row `line`.
+
+    Returns the tokens and the row following the segment."""
+    tokens: list[Token] = []
+    append = tokens.append
+    last_newline_i = 0
+    # Every character except trailing spaces is matched by some alternative,
+    # so the matches of finditer() cover the source without gaps.
+    for m in token_pattern.finditer(source_code, 0, end):
+        token_type: str = m.lastgroup # type: ignore[assignment]
+        if token_type == 'newline':
+            start, newline_end = m.span(token_type)
+            line += source_code.count('\n', start, newline_end)
+            last_newline_i = source_code.rindex('\n', start, newline_end) + 1
+        elif token_type == 'comment':
+            #ignore comment
+            line += 1
+            last_newline_i = m.end()
+        elif token_type != 'skip':
+            location = Location(row=line, column=m.start(token_type)-last_newline_i)
+            text = m.group(token_type)
+            if token_type != 'int_literal':
+                # Keywords, operators and identifiers repeat a lot, so every
+                # occurrence shares one string object.
+                text = intern(text)
+            append(Token(text, token_type, location))
+
+    return tokens, line
+
+
+def tokenize_buffer(source_code: str) -> TokenBuffer:
+    """Tokenizes into a TokenBuffer, which stores no per-token objects."""
+    tokens = TokenBuffer(source_code)
+    append = tokens.append
+    kinds = TOKEN_KINDS
+    line = 0
+    last_newline_i = 0
+    for m in token_pattern.finditer(source_code):
+        token_type: str = m.lastgroup # type: ignore[assignment]
+        if token_type == 'newline':
+            start, newline_end = m.span(token_type)
+            line += source_code.count('\n', start, newline_end)
+            last_newline_i = source_code.rindex('\n', start, newline_end) + 1
+        elif token_type == 'comment':
+            line += 1
+            last_newline_i = m.end()
+        elif token_type != 'skip':
+            start, end = m.span(token_type)
+            append(kinds[token_type], start, end, line, start-last_newline_i)
+
+    return tokens
+
+
+def tokenize_legacy(source_code: str) -> list[Token]:
+    """Original tokenizer with one regex match per token kind.
+
+    Kept as a reference for tests and benchmarks of tokenize()."""
     token_r = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]+|[a-zA-Z]')
     wr = re.compile(r'[\n ]+')
     wr_nl = re.compile(r'[\n ]*\n')
@@ -32,22 +143,22 @@ def tokenize(source_code: str) -> list[Token]:
         punctuation_result = punctuation_r.match(source_code, i)
         bool_result = bool_r.match(source_code, i)
 
-        
+
         token_type = None
-        
+
         if comment_result:
             #ignore comment
             line += 1
             last_newline_i = comment_result.end()
             i = comment_result.end()
-        
+
         elif whitespace_result:
             newlines = whitespace_result.group().count('\n')
             if whitespace_until_nl:
                 last_newline_i = whitespace_until_nl.end()
             line += newlines
             i = whitespace_result.end()
-        
+
         elif punctuation_result:
             token_text = punctuation_result.group()
             token_type = 'punctuation'
@@ -60,7 +171,7 @@ def tokenize(source_code: str) -> list[Token]:
             token_text = int_lit_result.group()
             token_type = 'int_literal'
             i = int_lit_result.end()
-        
+
         elif operator_result:
             token_text = operator_result.group()
             token_type = 'operator'
@@ -73,7 +184,7 @@ def tokenize(source_code: str) -> list[Token]:
 
         else:
             i += 1
-        
+
         if token_type:
             loc_col = start-last_newline_i
             location = Location(row=line, column=loc_col)
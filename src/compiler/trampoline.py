@@ -0,0 +1,37 @@
+from typing import Any, Generator, TypeAlias, TypeVar
+
+T = TypeVar('T')
+
+# A recursive step written as a generator: `result = yield child_step` works
+# like `result = child(...)` in a recursive function.
+Step: TypeAlias = Generator[Any, Any, T]
+
+def run(step: Step[T]) -> T:
+    """Runs a step and all the steps it yields on an explicit stack.
+
+    The Python call stack stays flat however deep the recursion goes, so deeply
+    nested programs cannot hit the recursion limit. An exception raised in a
+    step is thrown into the step that yielded it, like in an ordinary call."""
+    stack: list[Step[Any]] = [step]
+    value: Any = None
+    error: Exception | None = None
+    while True:
+        try:
+            if error is None:
+                child = stack[-1].send(value)
+            else:
+                thrown, error = error, None
+                child = stack[-1].throw(thrown)
+        except StopIteration as stop:
+            stack.pop()
+            if not stack:
+                return stop.value
+            value = stop.value
+        except Exception as e:
+            stack.pop()
+            if not stack:
+                raise
+            error = e
+        else:
+            stack.append(child)
+            value = None
@@ -1,57 +1,72 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from compiler.objs.types import Type, Int, Bool, FunType, Unit
+from typing import Any
+from compiler.objs.location import Location
+from compiler.objs.types import Type, Int, Bool, Error, FunType, Unit
 import compiler.ast as ast
+from compiler.diagnostics import CompileError, Diagnostics
+from compiler.resolver import resolve, resolve_in
+from compiler.trampoline import Step, run
 
 @dataclass
 class SymTab:
+    """Types of the global names a program is checked against."""
     locals: dict = field(default_factory=dict)
     parent: SymTab | None = None
-    
-    def get_type(self, var: str) -> Type | None:
-        local_type = self.locals.get(var)
-        if not local_type:
-            if isinstance(self.parent, SymTab):
-                return self.parent.get_type(var)
-            else:
-                return None
-        else:
-            return local_type
-    
-    def get_op_type(self, var:str) -> FunType:
-        local_type = self.locals.get(var)
-        if not local_type:
-            if isinstance(self.parent, SymTab):
-                return self.parent.get_op_type(var)
-            else:
-                raise Exception(f'Could not find type for operator "{var}".')
-            
-        else:
-            return local_type
-    
-    def get_function_type(self, name:str) -> FunType:
-        local_type = self.locals.get(name)
-        if not local_type:
-            if isinstance(self.parent, SymTab):
-                return self.parent.get_function_type(name)
-            else:
-                raise Exception(f'Could not find type for function "{name}".')
-            
-        else:
-            return local_type
-    
-    def set_type(self, var:str, type:Type) -> bool:
-        #for assignment only
-        local_type = self.locals.get(var)
-        if not local_type:
-            if isinstance(self.parent, SymTab):
-                return self.parent.set_type(var, type)
-            else:
-                return False
-        else:
-            self.locals[var] = type
-            return True
 
+    def flatten(self) -> dict[str, Type]:
+        """All names of this table and its parents; inner tables win."""
+        chain = []
+        tab: SymTab | None = self
+        while tab is not None:
+            chain.append(tab)
+            tab = tab.parent
+        types: dict[str, Type] = {}
+        for tab in reversed(chain):
+            types.update(tab.locals)
+        return types
+
+@dataclass
+class TypeEnv:
+    """Types of the variables by frame slot (see compiler.resolver), and of
+    the operators by name."""
+    types: list[Type | None]
+    operators: dict[str, Type]
+    diagnostics: Diagnostics | None = None
+
+    def get_op_type(self, op: str) -> FunType:
+        op_type = self.operators.get(op)
+        if not isinstance(op_type, FunType):
+            raise CompileError(None, f'Could not find type for operator "{op}".')
+        return op_type
+
+    def error(self, node: ast.Expression, message: str, location: Location | None = None) -> Type:
+        """Raises the error, or reports it to the diagnostics and gives
+        `node` the Error type, which is returned."""
+        error = CompileError(location or node.location, message)
+        if self.diagnostics is None:
+            raise error
+        self.diagnostics.report(error)
+        node.type = Error
+        return Error
+
+
+# The types of the operators and builtin functions.
+builtin_types: dict[str, Type] = {
+    '+': FunType([Int, Int],Int),
+    '-': FunType([Int, Int],Int),
+    '*': FunType([Int, Int],Int),
+    '/': FunType([Int, Int],Int),
+    '%': FunType([Int, Int],Int),
+    '<': FunType([Int, Int],Bool),
+    '>': FunType([Int, Int],Bool),
+    '<=': FunType([Int, Int],Bool),
+    '>=': FunType([Int, Int],Bool),
+    'or': FunType([Bool, Bool],Bool),
+    'and': FunType([Bool, Bool],Bool),
+    'print_int': FunType([Int], Unit),
+    'print_bool': FunType([Bool], Unit)
+}
 
 def construct_type_exp(type_exp: ast.TypeExpr) -> Type:
     if isinstance(type_exp, ast.SimpleType):
@@ -67,9 +82,13 @@ def construct_type_exp(type_exp: ast.TypeExpr) -> Type:
             params.append(construct_type_exp(param))
         result = construct_type_exp(type_exp.result)
         return FunType(params, result)
-    raise Exception(f'{type_exp.location}: Unrecognized type "{type_exp}".')
+    raise CompileError(type_exp.location, f'Unrecognized type "{type_exp}".')
 
-def typecheck_lower(node: ast.Expression, tab:SymTab) -> Type:
+def typecheck_lower(node: ast.Expression, env: TypeEnv) -> Step[Type]:
+    # A step (see compiler.trampoline): subexpressions are checked with
+    # `yield typecheck_lower(...)` so deep nesting does not recurse.
+    # Errors go through env.error(). When they are collected, an operand of
+    # the Error type is accepted anywhere, so that errors do not cascade.
     match node:
         case ast.Literal():
             if type(node.value) == int:
@@ -82,146 +101,284 @@ def typecheck_lower(node: ast.Expression, tab:SymTab) -> Type:
                 node.type = Unit
                 return Unit
             else:
-                raise Exception(f'{node.location}: Unexpected type. Expected Bool, Int or Unit.')
+                return env.error(node, 'Unexpected type. Expected Bool, Int or Unit.')
             
 
         case ast.Identifier():
-            tab_type = tab.get_type(node.name)
+            tab_type = None if node.slot is None else env.types[node.slot]
             if tab_type is None:
-                raise Exception(f'{node.location}: Variable not defined.')
+                return env.error(node, 'Variable not defined.')
             else:
                 #node should already have been assigned a type via declaration or assignment
                 return tab_type
         
         case ast.VarDec():
-            name = node.name.name
-            
             #if tab.locals.get(name) is not None:
             #    raise Exception(f'{node.location}: Variable has already been declared.')
-            value_type = typecheck(node.value, tab)
+            value_type = yield typecheck_lower(node.value, env)
             if node.dec_type is None:
                 node_type = value_type
             else:
                 node_type = construct_type_exp(node.dec_type)
             #only supports var x:Int/Bool/Unit = ...; declarations
-            if value_type == node_type:
-                tab.locals[name] = node_type
-                node.name.type = node_type
-                node.type = node_type
-                return node_type
-            else:
-                raise Exception(f'{node.location}: Incompatible types: {value_type} and {node_type}.')
+            if value_type is not node_type and value_type is not Error:
+                env.error(node, f'Incompatible types: {value_type} and {node_type}.')
+            # The variable is declared with its type even if the value is
+            # wrong, so that its uses are checked against that.
+            assert node.name.slot is not None
+            env.types[node.name.slot] = node_type
+            node.name.type = node_type
+            node.type = node_type
+            return node_type
         
         case ast.Block():
-            child_tab = SymTab({}, tab)
+            # Scopes were resolved into slots already.
             for exp in node.expressions:
                 #check the expressions are ok
-                typecheck(exp, child_tab)
-            node_type = typecheck(node.result, child_tab)
+                yield typecheck_lower(exp, env)
+            node_type = yield typecheck_lower(node.result, env)
             node.type = node_type
             return node_type
         
         case ast.FunctionNode():
-            func_type = tab.get_function_type(node.function.name)
-            if typecheck(node.arguments[0], tab) == func_type.parameters[0]:
-                node.type = func_type.result
-                return func_type.result
-            else:
-                raise Exception(f'{node.location}: Function "{node.function}" not defined.')
+            argument_types = []
+            for argument in node.arguments:
+                argument_types.append((yield typecheck_lower(argument, env)))
+            name = node.function.name
+            func_type = None if node.function.slot is None else env.types[node.function.slot]
+            if func_type is Error:
+                node.type = Error
+                return Error
+            if not isinstance(func_type, FunType):
+                return env.error(node, f'Could not find type for function "{name}".')
+            if len(argument_types) != len(func_type.parameters):
+                return env.error(node, f'Wrong number of arguments to "{name}": expected '
+                                       f'{len(func_type.parameters)}, got {len(argument_types)}.')
+            node.type = func_type.result
+            for argument, argument_type, parameter in zip(node.arguments, argument_types, func_type.parameters):
+                if argument_type is not parameter and argument_type is not Error:
+                    env.error(node, f'Expected {parameter} as an argument of "{name}", got {argument_type}.',
+                              argument.location)
+            return node.type
             
         
         case ast.UnaryOp():
-            element_type = typecheck(node.element, tab)
+            element_type = yield typecheck_lower(node.element, env)
             if node.op == '-':
-                if element_type == Int:
+                if element_type is Int or element_type is Error:
                     node.type = Int
                     return Int
                 else:
-                    raise Exception(f'{node.location}: Incompatible type {element_type} with operator "-". Expected Int.')
+                    return env.error(node, f'Incompatible type {element_type} with operator "-". Expected Int.')
             elif node.op == 'not':
-                if element_type == Bool:
+                if element_type is Bool or element_type is Error:
                     node.type = Bool
                     return Bool
                 else:
-                    raise Exception(f'{node.location}: Incompatible type {element_type} with operator "not". Expected Bool.')
+                    return env.error(node, f'Incompatible type {element_type} with operator "not". Expected Bool.')
 
         
         case ast.Assignment():
-            t1 = typecheck(node.left, tab)
-            t2 = typecheck(node.right, tab)
+            t1 = yield typecheck_lower(node.left, env)
+            t2 = yield typecheck_lower(node.right, env)
 
-            if t1 != t2:
-                raise Exception(f'{node.location}: Expected two of the same type, got different types: {t1}, {t2}')
+            if t1 is not t2 and t1 is not Error and t2 is not Error:
+                return env.error(node, f'Expected two of the same type, got different types: {t1}, {t2}')
             else:
+                node_type = t2 if t1 is Error else t1
                 if isinstance(node.left, ast.Identifier):
-                    type_updated = tab.set_type(node.left.name, t2)
-                    if type_updated:
-                        node.type = t1
-                        return t1
+                    if node.left.slot is not None or t1 is Error:
+                        node.type = node_type
+                        return node_type
                     else:
-                        raise Exception(f'{node.location}: "{node.left.name}" has not been declared.')
-                node.type = t1
-                return t1
+                        return env.error(node, f'"{node.left.name}" has not been declared.')
+                node.type = node_type
+                return node_type
 
         case ast.BinaryOp():
-            t1 = typecheck(node.left, tab)
-            t2 = typecheck(node.right, tab)
+            t1 = yield typecheck_lower(node.left, env)
+            t2 = yield typecheck_lower(node.right, env)
             
             if node.op in ['==','!=']:
-                if t1 == t2:
+                if t1 is t2 or t1 is Error or t2 is Error:
                     node.type = Bool
                     return Bool
                 else:
-                    raise Exception(f'{node.location}: Expected two of the same types, got {t1} and {t2}.')
+                    return env.error(node, f'Expected two of the same types, got {t1} and {t2}.')
             
-            op_type = tab.get_op_type(node.op)
+            op_type = env.get_op_type(node.op)
 
-            if t1 != op_type.parameters[0] or t2 != op_type.parameters[1]:
-                raise Exception(f'{node.location}: Expected {op_type.parameters[0]} and {op_type.parameters[1]}.')
+            if (t1 is not op_type.parameters[0] and t1 is not Error) or (t2 is not op_type.parameters[1] and t2 is not Error):
+                return env.error(node, f'Expected {op_type.parameters[0]} and {op_type.parameters[1]}.')
             else:
                 node.type = op_type.result
                 return op_type.result
 
         case ast.IfThenElse():
-            t1 = typecheck(node.condition, tab)
-            if t1 is not Bool:
-                raise Exception(f'{node.location}: Expected a bool as the if condition.')
-            t2 = typecheck(node.then_branch, tab)
+            t1 = yield typecheck_lower(node.condition, env)
+            if t1 is not Bool and t1 is not Error:
+                env.error(node, 'Expected a bool as the if condition.')
+            t2 = yield typecheck_lower(node.then_branch, env)
             if node.else_branch is not None:
-                t3 = typecheck(node.else_branch, tab)
-                if t2 != t3:
-                    raise Exception(f'{node.location}: Expected two of the same type, got {t2} and {t3}.')
+                t3 = yield typecheck_lower(node.else_branch, env)
+                if t2 is not t3 and t2 is not Error and t3 is not Error:
+                    return env.error(node, f'Expected two of the same type, got {t2} and {t3}.')
+                if t2 is Error:
+                    t2 = t3
             node.type = t2
             return t2
 
         case ast.Loop():
-            t1 = typecheck(node.while_exp, tab)
-            if t1 != Bool:
-                raise Exception(f'{node.while_exp.location}: Expected Bool, got {t1}.')
-            typecheck(node.do_exp, tab)
+            t1 = yield typecheck_lower(node.while_exp, env)
+            if t1 is not Bool and t1 is not Error:
+                env.error(node, f'Expected Bool, got {t1}.', node.while_exp.location)
+            yield typecheck_lower(node.do_exp, env)
             node.type = Unit
             return Unit
+
+        case ast.ErrorExpression():
+            # The parser reported the error.
+            node.type = Error
+            return Error
             
     
-    raise Exception(f'{node.location}: Unexpected node.')
-
-def typecheck(node: ast.Expression, tab: SymTab | None = None) -> Type:
-    if tab is not None:
-        global_tab = tab
-    else:
-        global_tab = SymTab(locals={
-            '+': FunType([Int, Int],Int),
-            '-': FunType([Int, Int],Int),
-            '*': FunType([Int, Int],Int),
-            '/': FunType([Int, Int],Int),
-            '%': FunType([Int, Int],Int),
-            '<': FunType([Int, Int],Bool),
-            '>': FunType([Int, Int],Bool),
-            '<=': FunType([Int, Int],Bool),
-            '>=': FunType([Int, Int],Bool),
-            'or': FunType([Bool, Bool],Bool),
-            'and': FunType([Bool, Bool],Bool),
-            'print_int': FunType([Int], Unit),
-            'print_bool': FunType([Bool], Unit)
-        })
-    return typecheck_lower(node, global_tab)
\ No newline at end of file
+    raise CompileError(node.location, 'Unexpected node.')
+
+@dataclass
+class _Checked:
+    """What TypecheckSession remembers of a top level expression."""
+    node: ast.Expression
+    type: Type
+    # The slot the session gave a declaration. The slots in the nodes may be
+    # from resolving the program elsewhere since.
+    slot: int | None
+    # The top level names the expression reads, and the declaration (None
+    # for globals) and type each referred to.
+    reads: dict[str, tuple[ast.VarDec | None, Type]]
+
+@dataclass
+class TypecheckSession:
+    """Lets typecheck() skip the top level expressions of a program that
+    were checked before, in a previous version of it.
+
+    An expression is checked again when it is a different object (see
+    compiler.incremental, which reuses unchanged ones), or when a top level
+    name it reads now refers to another declaration or type. Only the
+    expressions checked again are resolved: they get new slots, and the
+    others keep theirs. The engines resolve the program again themselves."""
+    checked: dict[int, _Checked] = field(default_factory=dict)
+    # The types of the slots in use, and the globals they start with.
+    types: list[Type | None] = field(default_factory=list)
+    global_types: dict[str, Type] = field(default_factory=dict)
+    # Counts of the last typecheck().
+    checked_expressions: int = 0
+    reused_expressions: int = 0
+    checked_nodes: int = 0
+
+    def check(self, node: ast.Expression, global_types: dict[str, Type],
+              diagnostics: Diagnostics | None = None) -> Type:
+        items = [*node.expressions, node.result] if isinstance(node, ast.Block) else [node]
+        self.checked_expressions = self.reused_expressions = self.checked_nodes = 0
+        # Slots of replaced expressions are not reused, so all slots are
+        # given out again once most of them are unused.
+        if global_types != self.global_types or len(self.types) > 4 * len(self.checked) + 1024:
+            self.checked = {}
+            self.types = [*global_types.values()]
+            self.global_types = dict(global_types)
+        env = TypeEnv(self.types, global_types, diagnostics)
+        bindings: dict[str, list[int]] = {name: [i] for i, name in enumerate(global_types)}
+        visible: dict[str, tuple[ast.VarDec | None, Type]] = {
+            name: (None, t) for name, t in global_types.items()
+        }
+        top_slots = {slot: name for slot, name in enumerate(global_types)}
+        checked: dict[int, _Checked] = {}
+        item_type: Type = Unit
+        for item in items:
+            entry = self.checked.get(id(item))
+            if entry is None or entry.node is not item or not all(
+                name in visible and visible[name][0] is decl and visible[name][1] is t
+                for name, (decl, t) in entry.reads.items()
+            ):
+                slot_count = resolve_in(item, bindings, len(self.types))
+                self.types += [None] * (slot_count - len(self.types))
+                reported = len(diagnostics.errors) if diagnostics is not None else 0
+                item_type = run(typecheck_lower(item, env))
+                reads, count = _top_level_reads(item, top_slots, visible)
+                entry = _Checked(item, item_type, item.name.slot if isinstance(item, ast.VarDec) else None, reads)
+                self.checked_expressions += 1
+                self.checked_nodes += count
+                # Expressions with errors are checked again next time, so that
+                # their errors are reported again.
+                remember = diagnostics is None or len(diagnostics.errors) == reported
+            else:
+                item_type = entry.type
+                if entry.slot is not None:
+                    bindings.setdefault(entry.node.name.name, []).append(entry.slot)  # type: ignore
+                self.reused_expressions += 1
+                remember = True
+            if remember:
+                checked[id(item)] = entry
+            if isinstance(item, ast.VarDec):
+                assert entry.slot is not None
+                visible[item.name.name] = (item, item_type)
+                top_slots[entry.slot] = item.name.name
+        # Expressions that are gone are forgotten.
+        self.checked = checked
+        node.type = item_type
+        return item_type
+
+def _top_level_reads(
+    node: ast.Expression,
+    top_slots: dict[int, str],
+    visible: dict[str, tuple[ast.VarDec | None, Type]],
+) -> tuple[dict[str, tuple[ast.VarDec | None, Type]], int]:
+    """The top level names `node` reads, with what they refer to, and the
+    number of nodes in it."""
+    reads = {}
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        match node:
+            case ast.Identifier():
+                name = top_slots.get(node.slot) if node.slot is not None else None
+                if name is not None:
+                    reads[name] = visible[name]
+            case ast.BinaryOp() | ast.Assignment():
+                stack += [node.left, node.right]
+            case ast.UnaryOp():
+                stack.append(node.element)
+            case ast.IfThenElse():
+                stack += [node.condition, node.then_branch]
+                if node.else_branch is not None:
+                    stack.append(node.else_branch)
+            case ast.VarDec():
+                stack += [node.name, node.value]
+            case ast.Block():
+                stack += node.expressions
+                stack.append(node.result)
+            case ast.Loop():
+                stack += [node.while_exp, node.do_exp]
+            case ast.FunctionNode():
+                stack.append(node.function)
+                stack += node.arguments
+    return reads, count
+
+def typecheck(
+    node: ast.Expression,
+    tab: SymTab | None = None,
+    session: TypecheckSession | None = None,
+    diagnostics: Diagnostics | None = None,
+) -> Type:
+    """Sets the type of the nodes of a program and returns its type. With a
+    session, the top level expressions it checked before are skipped. With
+    diagnostics, type errors are reported to it instead of raised, and the
+    expressions with errors get the Error type."""
+    global_types = tab.flatten() if tab is not None else dict(builtin_types)
+    if session is not None:
+        return session.check(node, global_types, diagnostics)
+    slot_count = resolve(node, global_types)
+    types: list[Type | None] = [*global_types.values()]
+    types += [None] * (slot_count - len(types))
+    return run(typecheck_lower(node, TypeEnv(types, global_types, diagnostics)))
\ No newline at end of file
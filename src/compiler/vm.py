@@ -0,0 +1,113 @@
+from typing import Any
+
+from compiler.bytecode import (
+    Bytecode, LOAD_CONST, LOAD_LOCAL, STORE_LOCAL, DUP, POP, ADD, SUB, MUL,
+    LT, LE, GT, GE, EQ, NE, BINARY, NEG, NOT, JUMP, JUMP_IF_FALSE,
+    JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP, CALL, RETURN, binary_functions,
+)
+from compiler.runtime import Value
+
+def run_vm(program: Bytecode) -> Value:
+    """Runs bytecode from compile_bytecode() and returns the program's value."""
+    # The code is stored compactly as an array but read from a list, which
+    # avoids boxing every word again on each read.
+    code = program.code.tolist()
+    constants = program.constants
+    local_slots: list[Any] = [None] * program.local_count
+    stack: list[Any] = []
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+    # The opcodes are tested roughly in order of how often loops execute them.
+    while True:
+        opcode = code[pc]
+        if opcode == LOAD_LOCAL:
+            push(local_slots[code[pc+1]])
+            pc += 2
+        elif opcode == LOAD_CONST:
+            push(constants[code[pc+1]])
+            pc += 2
+        elif opcode == STORE_LOCAL:
+            local_slots[code[pc+1]] = pop()
+            pc += 2
+        elif opcode == DUP:
+            push(stack[-1])
+            pc += 1
+        elif opcode == POP:
+            pop()
+            pc += 1
+        elif opcode == JUMP_IF_FALSE:
+            if pop():
+                pc += 2
+            else:
+                pc = code[pc+1]
+        elif opcode == JUMP:
+            pc = code[pc+1]
+        elif opcode == ADD:
+            b = pop()
+            stack[-1] += b
+            pc += 1
+        elif opcode == LT:
+            b = pop()
+            stack[-1] = stack[-1] < b
+            pc += 1
+        elif opcode == SUB:
+            b = pop()
+            stack[-1] -= b
+            pc += 1
+        elif opcode == MUL:
+            b = pop()
+            stack[-1] *= b
+            pc += 1
+        elif opcode == LE:
+            b = pop()
+            stack[-1] = stack[-1] <= b
+            pc += 1
+        elif opcode == GT:
+            b = pop()
+            stack[-1] = stack[-1] > b
+            pc += 1
+        elif opcode == GE:
+            b = pop()
+            stack[-1] = stack[-1] >= b
+            pc += 1
+        elif opcode == EQ:
+            b = pop()
+            stack[-1] = stack[-1] == b
+            pc += 1
+        elif opcode == NE:
+            b = pop()
+            stack[-1] = stack[-1] != b
+            pc += 1
+        elif opcode == BINARY:
+            b = pop()
+            stack[-1] = binary_functions[code[pc+1]](stack[-1], b)
+            pc += 2
+        elif opcode == NEG:
+            stack[-1] = -stack[-1]
+            pc += 1
+        elif opcode == NOT:
+            stack[-1] = not stack[-1]
+            pc += 1
+        elif opcode == JUMP_IF_FALSE_OR_POP:
+            if stack[-1]:
+                pop()
+                pc += 2
+            else:
+                pc = code[pc+1]
+        elif opcode == JUMP_IF_TRUE_OR_POP:
+            if stack[-1]:
+                pc = code[pc+1]
+            else:
+                pop()
+                pc += 2
+        elif opcode == CALL:
+            argument_count = code[pc+1]
+            arguments = stack[len(stack)-argument_count:]
+            del stack[len(stack)-argument_count:]
+            stack[-1] = stack[-1](*arguments)
+            pc += 2
+        elif opcode == RETURN:
+            return pop()
+        else:
+            raise Exception(f'Unknown opcode {opcode} at {pc}.')
@@ -0,0 +1,55 @@
+from compiler.assembler import assemble
+from compiler.assembly_generator import generate_assembly
+from compiler.closures import compile_closures
+from compiler.ir_generator import generate_ir
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+
+@unittest.skipIf(shutil.which('as') is None or shutil.which('ld') is None, 'needs the as and ld programs')
+class AssemblerTest(unittest.TestCase):
+    def run_native(self, source: str) -> str:
+        expr = parse(tokenize(source))
+        typecheck(expr)
+        with tempfile.TemporaryDirectory() as workdir:
+            executable = os.path.join(workdir, 'program')
+            assemble(generate_assembly(generate_ir(expr)), executable)
+            return subprocess.run([executable], capture_output=True, text=True, check=True).stdout
+
+    def run_closures(self, source: str) -> str:
+        expr = parse(tokenize(source))
+        typecheck(expr)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            compile_closures(expr)()
+        return output.getvalue()
+
+    def test_same_output_as_closures(self) -> None:
+        programs = [
+            'print_int(2 + 3 * 4);',
+            '{ var x = 0 - 7; print_int(x / 2); print_int(x % 2); print_int(7 / (0 - 2)); print_int(7 % (0 - 2)); }',
+            'print_bool(1 <= 1 and 2 >= 3 or 1 != 2);',
+            'print_bool(not (1 > 2)); print_bool(1 == 2);',
+            'print_int(- 5); print_int(0); print_int(1234567890123);',
+            'print_int(if 1 < 2 then 10 else 20);',
+            'var y = if 1 < 2 then 5; print_int(y);',
+            '{ var x = 1; { var x = 2; x = x + 1; print_int(x); } print_int(x); }',
+            'var i = 0; var s = 0; while i < 10 do { i = i + 1; s = s + i; } print_int(s);',
+            '{ var x = 1; print_int(x + (x = 2)); print_int(x); }',
+            '{ var x = 0; (x < 1 or { x = 7; true }) and { print_int(x); false }; }',
+        ]
+        for program in programs:
+            assert(self.run_native(program) == self.run_closures(program))
+
+    def test_and_or_short_circuit(self) -> None:
+        assert(self.run_native('(false and { print_bool(true); true });') == '')
+        assert(self.run_native('(true or { print_bool(true); true });') == '')
+        assert(self.run_native('(true and { print_bool(true); false });') == 'true\n')
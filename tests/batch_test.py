@@ -0,0 +1,45 @@
+from compiler.batch import check_file, check_files, expand_paths
+import os
+import tempfile
+import unittest
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, name: str, source: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(source)
+        return path
+
+    def test_reports_errors_per_file(self) -> None:
+        good = self.write('good.src', 'var x = 1;\nprint_int(x + 1);\n')
+        bad = self.write('bad.src', 'var x = 1;\nx = true;\n')
+        result = check_file(good, run=True)
+        assert(result.error is None and result.output == '2\n' and result.lines == 3)
+        result = check_file(bad)
+        assert(result.error is not None and result.path == bad)
+        assert(check_file(os.path.join(self.directory.name, 'missing')).error is not None)
+
+    def test_expands_directories_and_globs(self) -> None:
+        a = self.write('a.src', '1;')
+        b = self.write('sub/b.src', '2;')
+        c = self.write('sub/c.txt', '3;')
+        assert(expand_paths([self.directory.name]) == [a, b, c])
+        assert(expand_paths([os.path.join(self.directory.name, '**', '*.src')]) == [a, b])
+        assert(expand_paths([c, a]) == [c, a])
+
+    def test_checks_files_in_parallel_in_order(self) -> None:
+        paths = [self.write(f'{i}.src', f'print_int({i});' if i != 5 else 'x;') for i in range(20)]
+        report = check_files(paths, workers=2, run=True)
+        assert([result.path for result in report.results] == paths)
+        assert([result.path for result in report.failed] == [paths[5]])
+        assert(report.results[7].output == '7\n')
+        assert(report.workers == 2)
+        assert('20 files, 1 failed' in str(report))
@@ -0,0 +1,142 @@
+from compiler.__main__ import main
+from compiler.cache import TEMP_PREFIX, CompileCache
+from compiler.objs.types import Int
+from compiler.parser import parse
+from compiler.server import handle_request
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import io
+import os
+import tempfile
+import threading
+import time
+from typing import Any
+import unittest
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = CompileCache(self.directory.name)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_keys_depend_on_source_and_options(self) -> None:
+        key = self.cache.key('1 + 2;', 'optimize=False')
+        assert(key == self.cache.key('1 + 2;', 'optimize=False'))
+        assert(key != self.cache.key('1 + 3;', 'optimize=False'))
+        assert(key != self.cache.key('1 + 2;', 'optimize=True'))
+
+    def test_keys_of_streamed_sources(self) -> None:
+        source = 'var x = 1;\n' * 1000
+        assert(self.cache.key_of_file(io.StringIO(source), 'a', chunk_size=7) == self.cache.key(source, 'a'))
+        reader = self.cache.reader(io.StringIO(source), 'a')
+        assert(reader.read(10) + reader.read(-1) == source)
+        assert(reader.key() == self.cache.key(source, 'a'))
+
+    def test_stores_typechecked_programs(self) -> None:
+        expr = parse(tokenize('{ var x = 1; x + 2 }'))
+        typecheck(expr)
+        key = self.cache.key('program')
+        assert(self.cache.load(key) is None)
+        self.cache.store(key, expr)
+        loaded = self.cache.load(key)
+
+        assert(loaded == expr)
+        # Types are compared by identity.
+        assert(loaded.type is Int)
+        assert((self.cache.stats.hits, self.cache.stats.misses, self.cache.stats.stores) == (1, 1, 1))
+
+    def test_corrupt_entries_are_misses(self) -> None:
+        key = self.cache.key('program')
+        self.cache.store(key, [1, 2, 3])
+        with open(os.path.join(self.directory.name, key[:2], key[2:]), 'wb') as f:
+            f.write(b'garbage')
+        assert(self.cache.load(key) is None)
+
+    def test_evicts_least_recently_used_entries(self) -> None:
+        value = list(range(2000))
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.store(key, value)
+            # Spread the modification times, which order the entries.
+            past = time.time() - 100 + i
+            os.utime(os.path.join(self.directory.name, key[:2], key[2:]), (past, past))
+        size = os.path.getsize(os.path.join(self.directory.name, keys[0][:2], keys[0][2:]))
+        self.cache.load(keys[0])
+
+        self.cache.max_bytes = 2 * size
+        self.cache.evict()
+        assert(self.cache.load(keys[1]) is None)
+        assert(self.cache.load(keys[0]) == value)
+        assert(self.cache.load(keys[2]) == value)
+        assert(self.cache.stats.evictions == 1)
+
+    def test_eviction_skips_files_being_written_and_vanished_entries(self) -> None:
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for key in keys:
+            self.cache.store(key, list(range(2000)))
+        writing = os.path.join(self.directory.name, keys[0][:2], TEMP_PREFIX + 'entry')
+        with open(writing, 'wb') as f:
+            f.write(b'x' * 100_000)
+        entries = self.cache._entries()
+        assert(writing not in [entry.path for entry in entries])
+        # Another run evicts an entry after it was listed.
+        os.remove(entries[0].path)
+        self.cache._entries = lambda: entries  # type: ignore[method-assign]
+        self.cache.max_bytes = 0
+        self.cache.evict()
+        assert(os.path.exists(writing) and self.cache.stats.evictions == 2)
+
+    def test_entries_are_listed_only_when_they_may_not_fit(self) -> None:
+        listings = 0
+        entries = self.cache._entries
+
+        def counted() -> list[os.DirEntry]:
+            nonlocal listings
+            listings += 1
+            return entries()
+        self.cache._entries = counted  # type: ignore[method-assign]
+        for i in range(10):
+            self.cache.store(self.cache.key(str(i)), list(range(2000)))
+        # Once to learn the size of the entries.
+        assert(listings == 1)
+        self.cache.max_bytes = 1
+        self.cache.store(self.cache.key('more'), [1])
+        assert(listings == 2 and self.cache.stats.evictions == 11)
+
+    def test_stats_accumulate_across_runs(self) -> None:
+        self.cache.load(self.cache.key('missing'))
+        self.cache.save_stats()
+        other = CompileCache(self.directory.name)
+        other.load(other.key('missing'))
+        other.save_stats()
+        assert(other.total_stats().misses == 2)
+
+    def test_concurrent_stats_are_not_lost(self) -> None:
+        def run() -> None:
+            cache = CompileCache(self.directory.name)
+            for _ in range(20):
+                cache.stats.hits += 1
+                cache.save_stats()
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert(self.cache.total_stats().hits == 160)
+
+    def test_cli_caches_files(self) -> None:
+        path = os.path.join(self.directory.name, 'program.src')
+        with open(path, 'w') as f:
+            f.write('var x = 1;\nprint_int(x + 1);\n')
+        argv = ['interpret', f'--cache-dir={self.directory.name}']
+        requests: list[dict[str, Any]] = [{'argv': argv + [path]}, {'argv': argv + [path]},
+                                          {'argv': argv, 'stdin': 'var x = 1;\nprint_int(x + 1);\n'}]
+        for request in requests:
+            response = handle_request(request, main)
+            assert(response['status'] == 0 and response['stdout'] == '2\n')
+        stats = self.cache.total_stats()
+        # Standard input is not cached.
+        assert((stats.hits, stats.misses, stats.stores) == (1, 1, 1))
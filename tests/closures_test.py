@@ -0,0 +1,72 @@
+from compiler.closures import compile_closures
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import contextlib
+import io
+import unittest
+
+
+def run_closures(source: str) -> tuple[object, str]:
+    expr = parse(tokenize(source))
+    typecheck(expr)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = compile_closures(expr)()
+    return result, output.getvalue()
+
+
+class ClosuresTest(unittest.TestCase):
+    def test_same_results_as_tree_interpreter(self) -> None:
+        programs = [
+            '2 + 3;',
+            '1 + 2 < 4;',
+            'if 1 < 2 then 10 else 20;',
+            'if 2 < 1 then 10;',
+            '{ var x = 1; { var x = 2; x = x + 1; } x }',
+            'var i = 0; var s = 0; while i < 10 do { i = i + 1; s = s + i; } print_int(s);',
+            '{ var a = 1; var b = a = 5; a + b }',
+        ]
+        for program in programs:
+            expr = parse(tokenize(program))
+            typecheck(expr)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                expected = interpret(expr)
+            assert(run_closures(program) == (expected, output.getvalue()))
+    
+    def test_all_operators(self) -> None:
+        assert(run_closures('7 - 2 * 3;') == (1, ''))
+        assert(run_closures('{ var x = 7; x % 3 + x / 2 }') == (4, ''))
+        assert(run_closures('1 <= 1 and 2 >= 3 or 1 != 2;') == (True, ''))
+        assert(run_closures('(- 5) == 0 - 5;') == (True, ''))
+        assert(run_closures('not (1 > 2);') == (True, ''))
+    
+    def test_division_rounds_towards_zero(self) -> None:
+        assert(run_closures('0 - 7 / 2;') == (-3, ''))
+        assert(run_closures('{ var x = 0 - 7; x / 2 }') == (-3, ''))
+        assert(run_closures('{ var x = 0 - 7; x % 2 }') == (-1, ''))
+        assert(run_closures('{ var x = 7; x % (0 - 2) }') == (1, ''))
+    
+    def test_and_or_short_circuit(self) -> None:
+        assert(run_closures('(false and { print_bool(true); true });') == (False, ''))
+        assert(run_closures('(true or { print_bool(true); true });') == (True, ''))
+        assert(run_closures('(true and { print_bool(true); true });') == (True, 'true\n'))
+    
+    def test_program_can_be_run_again(self) -> None:
+        expr = parse(tokenize('var i = 0; while i < 3 do { i = i + 1; print_int(i); }'))
+        typecheck(expr)
+        program = compile_closures(expr)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            program()
+            program()
+        
+        assert(output.getvalue() == '1\n2\n3\n' * 2)
+    
+    def test_interpret_engine_option(self) -> None:
+        expr = parse(tokenize('{ var x = 20; x + 22 }'))
+        typecheck(expr)
+        
+        assert(interpret(expr, engine='closures') == 42)
@@ -0,0 +1,67 @@
+from compiler.ast import Block, IfThenElse, Literal, UnaryOp
+from compiler.interpreter import interpret
+from compiler.objs.location import L
+from compiler.objs.types import Int, Unit
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import unittest
+
+# Far beyond the default recursion limit of 1000.
+DEPTH = 200_000
+
+class DeepNestingTest(unittest.TestCase):
+    def test_long_unary_chain(self) -> None:
+        expr = parse(tokenize('- ' * DEPTH + '1;'))
+        
+        depth = 0
+        node = expr
+        while isinstance(node, UnaryOp):
+            node = node.element
+            depth += 1
+        assert(depth == DEPTH)
+        assert(node == Literal(L, 1))
+        assert(typecheck(expr) == Int)
+    
+    def test_long_else_if_chain(self) -> None:
+        expr = parse(tokenize('if false then 1 else ' * DEPTH + '42;'))
+        
+        depth = 0
+        node = expr
+        while isinstance(node, IfThenElse):
+            assert(node.else_branch is not None)
+            node = node.else_branch
+            depth += 1
+        assert(depth == DEPTH)
+        assert(typecheck(expr) == Int)
+        assert(interpret(expr) == 42)
+    
+    def test_deeply_nested_blocks(self) -> None:
+        expr = parse(tokenize('{ var x = 1; ' + '{ ' * DEPTH + 'x' + ' }' * DEPTH + ' }'))
+        
+        depth = 0
+        node = expr
+        while isinstance(node, Block):
+            node = node.result
+            depth += 1
+        assert(depth == DEPTH + 1)
+        assert(typecheck(expr) == Int)
+    
+    def test_deeply_nested_parentheses(self) -> None:
+        expr = parse(tokenize('(1 + ' * DEPTH + '1' + ')' * DEPTH + ';'))
+        
+        assert(typecheck(expr) == Int)
+        assert(interpret(expr) == DEPTH + 1)
+    
+    def test_deeply_nested_loops(self) -> None:
+        expr = parse(tokenize('while false do ' * DEPTH + '{}'))
+        
+        assert(typecheck(expr) == Unit)
+    
+    def test_error_deep_inside_nesting_is_reported(self) -> None:
+        expr = parse(tokenize('{ ' * DEPTH + '1 + true' + ' }' * DEPTH))
+        
+        with self.assertRaises(Exception):
+            typecheck(expr)
+        with self.assertRaises(Exception):
+            parse(tokenize('(' * DEPTH + '1'))
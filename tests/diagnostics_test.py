@@ -0,0 +1,109 @@
+from compiler import ast
+from compiler.__main__ import main
+from compiler.batch import check_file
+from compiler.diagnostics import CompileError, CompileErrors, Diagnostics
+from compiler.objs.types import Error, Int
+from compiler.parser import parse
+from compiler.server import handle_request
+from compiler.tokenizer import tokenize
+from compiler.typechecker import TypecheckSession, typecheck
+import os
+import tempfile
+import unittest
+
+
+def check(source: str) -> tuple[ast.Expression, list[tuple[int, int, str]]]:
+    diagnostics = Diagnostics()
+    root = parse(tokenize(source), diagnostics=diagnostics)
+    typecheck(root, diagnostics=diagnostics)
+    errors = [(e.location.row, e.location.column, e.message) if e.location is not None else (-1, -1, e.message)
+              for e in diagnostics.sorted_errors()]
+    return root, errors
+
+
+class DiagnosticsTest(unittest.TestCase):
+    def test_strict_mode_raises_the_first_error(self) -> None:
+        with self.assertRaises(CompileError) as context:
+            parse(tokenize('var x = ;\nvar y = ;'))
+        assert(context.exception.location is not None and context.exception.location.row == 0)
+        with self.assertRaises(CompileError):
+            typecheck(parse(tokenize('1 + true;')))
+
+    def test_recovers_at_semicolons(self) -> None:
+        root, errors = check('var x = ;\nprint_int(1 2);\nvar y = 1;\ny + true;\n')
+        assert([(row, column) for row, column, _ in errors] == [(0, 8), (1, 12), (3, 0)])
+        # The statements after the errors are still parsed.
+        assert(isinstance(root, ast.Block) and len(root.expressions) == 4)
+
+    def test_recovers_inside_blocks(self) -> None:
+        _, errors = check('{\n  var a = );\n  a = 1;\n}\nvar b: Int = true;\n')
+        assert([row for row, _, _ in errors] == [1, 4])
+        _, errors = check('{\n  1 +\n}\nprint_int(2);\n')
+        assert([row for row, _, _ in errors] == [2])
+        _, errors = check('{ 1 2 }')
+        assert(len(errors) == 1 and errors[0][2] == 'expected ";" or "}", got 2')
+
+    def test_reports_a_missing_brace_once(self) -> None:
+        _, errors = check('{\n  var a = 1;\n  a = 2;\n')
+        assert(len(errors) == 1)
+        # The last statement is a block itself.
+        for source in ['{ { 2 }', '{ 1; { 2 }', 'while true do {\n var i = 1;\n { print_int(i); }\n']:
+            _, errors = check(source)
+            assert(len(errors) == 1)
+
+    def test_errors_do_not_cascade(self) -> None:
+        # x has no value, so neither the declaration nor its uses are errors.
+        root, errors = check('var x = ;\nvar y = x + 1;\nprint_int(y * x);\nif x then 1;\n')
+        assert(len(errors) == 1 and errors[0][0] == 0)
+        # y is declared with its declared type even though its value is wrong.
+        _, errors = check('var y: Int = true;\nprint_int(y + 1);\nz;\n')
+        assert([row for row, _, _ in errors] == [0, 2])
+
+    def test_checks_every_argument(self) -> None:
+        _, errors = check('print_int();\nprint_int(1, true);\nprint_bool(1);\n1 == print_bool() and print_bool;\n')
+        assert([row for row, _, _ in errors] == [0, 1, 2, 3, 3])
+        assert(errors[2][2] == 'Expected Bool as an argument of "print_bool", got Int.')
+
+    def test_error_nodes_have_the_error_type(self) -> None:
+        root, _ = check('var x = ;\n1 + 2;\n')
+        assert(isinstance(root, ast.Block))
+        declaration = root.expressions[0]
+        assert(isinstance(declaration, ast.VarDec) and isinstance(declaration.value, ast.ErrorExpression))
+        assert(declaration.value.type is Error and root.expressions[1].type is Int)
+
+    def test_session_reports_errors_again(self) -> None:
+        session = TypecheckSession()
+        for _ in range(2):
+            diagnostics = Diagnostics()
+            root = parse(tokenize('var a = 1;\na + true;\n'), diagnostics=diagnostics)
+            typecheck(root, session=session, diagnostics=diagnostics)
+            assert(len(diagnostics.errors) == 1)
+
+    def test_errors_are_sorted(self) -> None:
+        diagnostics = Diagnostics()
+        root = parse(tokenize('1 + true;\nvar x = ;\n'), diagnostics=diagnostics)
+        typecheck(root, diagnostics=diagnostics)
+        # The parse error was reported first but is on the second row.
+        assert([e.location.row for e in diagnostics.errors if e.location] == [1, 0])
+        with self.assertRaises(CompileErrors) as context:
+            diagnostics.raise_errors()
+        assert([e.location.row for e in context.exception.errors if e.location] == [0, 1])
+        assert(str(context.exception).count('\n') == 1)
+        Diagnostics().raise_errors()
+
+    def test_cli_reports_all_errors(self) -> None:
+        response = handle_request({'argv': ['interpret', '--no-cache'],
+                                   'stdin': 'var x = ;\nprint_int(true);\nprint_int(1 2);\n'}, main)
+        assert(response['status'] == 1 and response['stdout'] == '')
+        assert(len(response['stderr'].splitlines()) == 3)
+        response = handle_request({'argv': ['typecheck', '--no-cache'], 'stdin': 'var x = 1;\nx;\n'}, main)
+        assert(response['status'] == 0 and response['stdout'] == 'Unit\n')
+
+    def test_batch_reports_all_errors(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bad.src')
+            with open(path, 'w') as f:
+                f.write('var x = ;\nx = true;\nprint_bool(1);\n')
+            result = check_file(path)
+            assert(result.error is not None and result.error.count('\n') == 1)
+            assert(str(result).startswith(f'{path}: error ('))
@@ -0,0 +1,91 @@
+from compiler import ast
+from compiler.incremental import IncrementalParser
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+import random
+import unittest
+
+
+source = '''var x = 1;
+{ var y = x + 2; print_int(y); }
+if x < 3 then { x = 3 } else { x = 4 }
+// comment
+while x > 0 do x = x - 1;
+print_int(x);
+'''
+
+
+def assert_matches_full_parse(parser: IncrementalParser) -> None:
+    assert([str(t) for t in parser.tokens] == [str(t) for t in tokenize(parser.source)])
+    # The reprs also compare locations exactly.
+    assert(repr(parser.parse()) == repr(parse(tokenize(parser.source))))
+
+
+class IncrementalTest(unittest.TestCase):
+    def test_reparses_only_the_edited_expressions(self) -> None:
+        parser = IncrementalParser(source)
+        root = parser.parse()
+        assert(isinstance(root, ast.Block))
+        # The root's list of expressions is updated in place.
+        before = ast.Block(None, list(root.expressions), root.result)
+        after = parser.edit(source.index('x + 2') + 4, 1, '5')
+        assert_matches_full_parse(parser)
+        assert(isinstance(after, ast.Block))
+        # The edited block and the `if` after it end without a `;`, so the
+        # `while` is parsed again too.
+        assert(after.expressions[0] is before.expressions[0])
+        assert(after.expressions[4] is before.expressions[4])
+        assert(after.expressions[1] is not before.expressions[1])
+        assert(parser.stats.relexed_tokens == 14 and parser.stats.reused_expressions == 2)
+        assert(not parser.stats.full_parse)
+
+    def test_moves_the_rows_of_later_expressions(self) -> None:
+        parser = IncrementalParser(source)
+        last = parser.parse().expressions[-1]  # type: ignore
+        parser.edit(0, 0, 'print_int(0);\n\n')
+        assert_matches_full_parse(parser)
+        comment = parser.source.index('// comment\n')
+        parser.edit(comment, len('// comment\n'), '')
+        assert_matches_full_parse(parser)
+        assert(parser.parse().expressions[-1] is last)  # type: ignore
+        assert(last.location.row == 6)
+
+    def test_expressions_joined_by_an_edit(self) -> None:
+        parser = IncrementalParser(source)
+        parser.parse()
+        else_branch = ' else { x = 4 }'
+        parser.edit(parser.source.index(else_branch), len(else_branch), '')
+        assert_matches_full_parse(parser)
+        # The `if` goes on with an `else` on a later row.
+        parser.edit(parser.source.index('while'), 0, 'else { x = 5 }\n')
+        assert_matches_full_parse(parser)
+        # The `else` block takes a `-` operand.
+        parser.edit(parser.source.index('while'), 0, '- 1;')
+        assert_matches_full_parse(parser)
+
+    def test_recovers_from_parse_errors(self) -> None:
+        parser = IncrementalParser(source)
+        parser.parse()
+        offset = source.index('print_int(x)')
+        with self.assertRaises(Exception):
+            parser.edit(offset, 0, 'var ;')
+        parser.edit(offset, len('var ;'), '')
+        assert(parser.stats.full_parse)
+        assert_matches_full_parse(parser)
+
+    def test_random_edits_match_a_full_parse(self) -> None:
+        rng = random.Random(0)
+        pieces = [';', '}', '{', ' ', '\n', 'x', '1', '+', 'else', 'if true then', '// c\n', 'var y = 2;', '-']
+        for _ in range(30):
+            parser = IncrementalParser(source)
+            parser.parse()
+            for _ in range(10):
+                offset = rng.randrange(len(parser.source) + 1)
+                deleted = rng.randrange(min(4, len(parser.source) - offset) + 1)
+                try:
+                    parser.edit(offset, deleted, rng.choice(pieces))
+                except Exception:
+                    with self.assertRaises(Exception):
+                        parse(tokenize(parser.source))
+                    continue
+                assert_matches_full_parse(parser)
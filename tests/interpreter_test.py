@@ -1,3 +1,5 @@
+import contextlib
+import io
 from compiler.ast import BinaryOp, Identifier, Literal, IfThenElse, FunctionNode, UnaryOp, Block, VarDec, Loop
 from compiler.objs.location import Location, L
 from compiler.interpreter import interpret
@@ -11,4 +13,55 @@ class InterpreterTest(unittest.TestCase):
     def test_interpret_basic_operators(self) -> None:
         result = interpret(parse(tokenize('2+3;')))
     
-        assert(result == 5)
\ No newline at end of file
+        assert(result == 5)
+
+    def test_interpret_variables_and_loops(self) -> None:
+        result = interpret(parse(tokenize('var i = 0; var s = 0; while i < 10 do { i = i + 1; s = s + i; } s;')))
+        shadowed = interpret(parse(tokenize('{ var x = 1; { var x = 2; x = x + 1; } x }')))
+        
+        assert(result is None)
+        assert(shadowed == 1)
+    
+    def test_block_variables_in_loops(self) -> None:
+        # The declaration in the loop body starts over every iteration, and
+        # the inner `i` has a slot of its own.
+        result = interpret(parse(tokenize(
+            '{ var i = 0; var s = 0; while i < 5 do { var t = 0; var i2 = i; { var i = 10; t = t + i; } '
+            's = s + t + i2; i = i + 1; } s }')))
+        assert(result == 5 * 10 + 10)
+        with self.assertRaises(Exception):
+            interpret(parse(tokenize('{ { var x = 1; } x }')))
+
+    def test_interpret_builtin_functions(self) -> None:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            interpret(parse(tokenize('print_int(1 + 2); print_bool(3 < 2);')))
+        
+        assert(output.getvalue() == '3\nfalse\n')
+    
+    def test_unknown_engine_raises_exception(self) -> None:
+        with self.assertRaises(Exception):
+            interpret(parse(tokenize('1;')), engine='unknown')
+    
+    def test_interpret_all_operators(self) -> None:
+        cases = {
+            '7 - 2 * 3;': 1,
+            '(0 - 7) / 2;': -3,
+            '(0 - 7) % 2;': -1,
+            '1 <= 1 and 2 >= 3;': False,
+            '1 > 2 or 1 != 2;': True,
+            '(1 == 1) == true;': True,
+            '- 5;': -5,
+            'not (1 > 2);': True,
+        }
+        for source, expected in cases.items():
+            assert(interpret(parse(tokenize(source))) == expected)
+    
+    def test_and_or_short_circuit(self) -> None:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert(interpret(parse(tokenize('(false and { print_bool(true); true });'))) == False)
+            assert(interpret(parse(tokenize('(true or { print_bool(true); true });'))) == True)
+            assert(interpret(parse(tokenize('(true and { print_bool(true); false });'))) == False)
+        
+        assert(output.getvalue() == 'true\n')
@@ -0,0 +1,53 @@
+from compiler.ir_generator import generate_ir
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import pytest
+
+
+def ir_lines(source: str) -> list[str]:
+    expr = parse(tokenize(source))
+    typecheck(expr)
+    return [str(instruction) for instruction in generate_ir(expr)]
+
+
+def test_arithmetic() -> None:
+    assert ir_lines('1 + 2 * 3;') == [
+        'LoadIntConst(1, x1)',
+        'LoadIntConst(2, x2)',
+        'LoadIntConst(3, x3)',
+        'Call(*, [x2, x3], x4)',
+        'Call(+, [x1, x4], x5)',
+    ]
+
+
+def test_loop() -> None:
+    assert ir_lines('var i = 0; while i < 3 do i = i + 1;') == [
+        'LoadIntConst(0, x1)',
+        'Copy(x1, x2)',
+        'Label(L1)',
+        'LoadIntConst(3, x3)',
+        'Call(<, [x2, x3], x4)',
+        'CondJump(x4, L2, L3)',
+        'Label(L2)',
+        'LoadIntConst(1, x5)',
+        'Call(+, [x2, x5], x6)',
+        'Copy(x6, x2)',
+        'Jump(L1)',
+        'Label(L3)',
+    ]
+
+
+def test_operands_are_read_in_order() -> None:
+    # The left operand is copied before the right one assigns it.
+    assert ir_lines('{ var x = 1; x + (x = 2) }')[2:] == [
+        'Copy(x2, x3)',
+        'LoadIntConst(2, x4)',
+        'Copy(x4, x2)',
+        'Call(+, [x3, x2], x5)',
+    ]
+
+
+def test_function_values_are_rejected() -> None:
+    with pytest.raises(Exception, match='Builtin functions can only be called'):
+        ir_lines('var f = print_int;')
@@ -0,0 +1,85 @@
+from compiler import ast
+from compiler.closures import compile_closures
+from compiler.objs.types import Unit
+from compiler.optimizer import FoldStats, fold_constants
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import contextlib
+import io
+import unittest
+
+
+def fold(source: str) -> tuple[ast.Expression, FoldStats]:
+    expr = parse(tokenize(source))
+    typecheck(expr)
+    stats = FoldStats()
+    return fold_constants(expr, stats), stats
+
+
+def run(expr: ast.Expression) -> tuple[object, str]:
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        value = compile_closures(expr)()
+    return value, output.getvalue()
+
+
+class OptimizerTest(unittest.TestCase):
+    def test_folds_operators(self) -> None:
+        expr, stats = fold('3 + 4 * 2;')
+        assert(isinstance(expr, ast.Literal) and expr.value == 11)
+        assert(stats.folded_operations == 2)
+        assert(stats.nodes_eliminated == 4)
+
+        expr, _ = fold('((0 - 7) / 2 == (- 4)) and not false;')
+        assert(isinstance(expr, ast.Literal) and expr.value == False)
+        expr, _ = fold('(0 - 7) % 2;')
+        assert(isinstance(expr, ast.Literal) and expr.value == -1)
+
+    def test_keeps_division_by_zero(self) -> None:
+        expr, stats = fold('1 / 0;')
+        assert(isinstance(expr, ast.BinaryOp))
+        assert(stats.folded_operations == 0)
+
+    def test_simplifies_identities(self) -> None:
+        expr, stats = fold('{ var x = 5; x * 1 + 0 }')
+        assert(isinstance(expr, ast.Block) and isinstance(expr.result, ast.Identifier))
+        assert(stats.simplified_operations == 2)
+        expr, _ = fold('{ var x = 5; 0 - x }')
+        assert(isinstance(expr, ast.Block) and isinstance(expr.result, ast.BinaryOp))
+
+    def test_prunes_ifs_and_loops(self) -> None:
+        expr, stats = fold('{ if 1 < 2 then print_int(1) else print_int(2); while false do print_int(3); if false then print_int(4); 5 }')
+        assert(isinstance(expr, ast.Block))
+        assert(len(expr.expressions) == 1 and isinstance(expr.expressions[0], ast.FunctionNode))
+        assert((stats.pruned_ifs, stats.removed_loops, stats.removed_statements) == (2, 1, 2))
+
+    def test_untaken_if_without_else_is_unit(self) -> None:
+        expr, _ = fold('var y = if 2 < 1 then 5;')
+        assert(isinstance(expr, ast.VarDec) and isinstance(expr.value, ast.Literal))
+        assert(expr.value.value is None and expr.value.type is Unit)
+
+    def test_same_results_after_folding(self) -> None:
+        programs = [
+            '{ var x = 2; print_int(x * (3 + 4)); x + 0 }',
+            '{ var x = 1; if true then x = 2; x }',
+            'if true then 5;',
+            '{ var x = 1; if true then x = 2 else x = 3; x }',
+            '(false and { print_bool(true); true });',
+            '(true or { print_bool(true); true });',
+            '(true and { print_bool(true); false });',
+            '{ var i = 0; while true and i < 3 do i = i + 1; i }',
+            '{ var b = 1 > 2 or 4 >= 4; print_bool(not b); b }',
+        ]
+        for program in programs:
+            expr = parse(tokenize(program))
+            typecheck(expr)
+            expected = run(expr)
+            expr, _ = fold(program)
+            assert(run(expr) == expected)
+
+    def test_deeply_nested_program(self) -> None:
+        depth = 50_000
+        expr, stats = fold('(1 + ' * depth + '1' + ')' * depth + ';')
+        assert(isinstance(expr, ast.Literal) and expr.value == depth + 1)
+        assert(stats.folded_operations == depth)
@@ -1,5 +1,6 @@
 from compiler.parser import parse
-from compiler.tokenizer import tokenize
+import io
+from compiler.tokenizer import tokenize, tokenize_stream, tokenize_buffer
 from compiler.ast import BinaryOp, Identifier, Literal, IfThenElse, FunctionNode, UnaryOp, Block, VarDec, Loop, Assignment, SimpleType, TypeFunction
 from compiler.objs.location import Location, L
 import unittest
@@ -129,6 +130,18 @@ class ParserTest(unittest.TestCase):
         
         assert(expr == BinaryOp(location=L,left=Identifier(L,'x'), op='or', right=BinaryOp(location=L,left=Identifier(L,'y'), op='and', right=BinaryOp(L,Identifier(L,'c'),'+',Identifier(L,'b')))))
     
+    def test_all_precedence_levels(self) -> None:
+        expr = parse(tokenize('a or b and c == d < e + f * g;'))
+        expr_2 = parse(tokenize('a * b + c < d != e and f or g;'))
+        
+        assert(expr == BinaryOp(L,Identifier(L,'a'),'or',BinaryOp(L,Identifier(L,'b'),'and',BinaryOp(L,Identifier(L,'c'),'==',BinaryOp(L,Identifier(L,'d'),'<',BinaryOp(L,Identifier(L,'e'),'+',BinaryOp(L,Identifier(L,'f'),'*',Identifier(L,'g'))))))))
+        assert(expr_2 == BinaryOp(L,BinaryOp(L,BinaryOp(L,BinaryOp(L,BinaryOp(L,BinaryOp(L,Identifier(L,'a'),'*',Identifier(L,'b')),'+',Identifier(L,'c')),'<',Identifier(L,'d')),'!=',Identifier(L,'e')),'and',Identifier(L,'f')),'or',Identifier(L,'g')))
+    
+    def test_function_call_as_right_operand(self) -> None:
+        expr = parse(tokenize('2 * f(3);'))
+        
+        assert(expr == BinaryOp(L,Literal(L,2),'*',FunctionNode(L,Identifier(L,'f'),[Literal(L,3)])))
+    
     def test_unary_operators(self) -> None:
         expr_simple = parse(tokenize('not a;'))
         expr_chained = parse(tokenize('---5;'))
@@ -297,4 +310,24 @@ class ParserTest(unittest.TestCase):
         expr = parse(tokenize('var x: Int = 5;'))
         expr_2 = parse(tokenize('var x: (Int)=>Int = 5;'))
         assert(expr == VarDec(L,Identifier(L,'x'),Literal(L,5),SimpleType(Identifier(L,'x'),L,'Int')))
-        assert(expr_2 == VarDec(L,Identifier(L,'x'),Literal(L,5),TypeFunction(Identifier(L,'x'),L,[SimpleType(Identifier(L,'x'),L,'Int')],SimpleType(Identifier(L,'x'),L,'Int'))))
\ No newline at end of file
+        assert(expr_2 == VarDec(L,Identifier(L,'x'),Literal(L,5),TypeFunction(Identifier(L,'x'),L,[SimpleType(Identifier(L,'x'),L,'Int')],SimpleType(Identifier(L,'x'),L,'Int'))))
+
+    def test_parse_token_stream(self) -> None:
+        source = r"""
+                 var x = 1;
+                 while x < 10 do {
+                     x = x + 1;
+                 }
+                 """
+        expr = parse(tokenize_stream(io.StringIO(source), chunk_size=4))
+        
+        assert(expr == parse(tokenize(source)))
+        assert(expr == Block(L,[VarDec(L,Identifier(L,'x'),Literal(L,1)),Loop(L,BinaryOp(L,Identifier(L,'x'),'<',Literal(L,10)),Block(L,[Assignment(L,Identifier(L,'x'),BinaryOp(L,Identifier(L,'x'),'+',Literal(L,1)))],Literal(None,None)))],Literal(None,None)))
+        
+        with self.assertRaises(Exception):
+            parse(iter(tokenize('a b;')))
+    
+    def test_parse_token_buffer(self) -> None:
+        source = 'if a then f(1, 2) else { var y: Int = 3; y }'
+        
+        assert(parse(tokenize_buffer(source)) == parse(tokenize(source)))
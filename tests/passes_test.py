@@ -0,0 +1,78 @@
+from compiler.bytecode import compile_ir
+from compiler.closures import compile_closures
+from compiler.ir import IRVar, Label, LoadIntConst, Copy, Call, Jump
+from compiler.ir_generator import generate_ir
+from compiler.ir_interpreter import run_ir
+from compiler.parser import parse
+from compiler.passes import PassManager, coalesce_copies, default_passes, remove_jumps_to_next_label, remove_unreachable_code, remove_unused_labels
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from compiler.vm import run_vm
+import contextlib
+import io
+from typing import Callable
+import unittest
+
+x1, x2, x3 = IRVar('x1'), IRVar('x2'), IRVar('x3')
+l1, l2 = Label(None, 'L1'), Label(None, 'L2')
+
+
+def output_of(run: Callable[[], object]) -> str:
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run()
+    return output.getvalue()
+
+
+class PassesTest(unittest.TestCase):
+    def test_remove_unreachable_code(self) -> None:
+        assert(remove_unreachable_code([Jump(None, l1), LoadIntConst(None, 1, x1), l1, LoadIntConst(None, 2, x1)])
+               == [Jump(None, l1), l1, LoadIntConst(None, 2, x1)])
+
+    def test_remove_jumps_to_next_label(self) -> None:
+        assert(remove_jumps_to_next_label([Jump(None, l1), l1, Jump(None, l1), l2])
+               == [l1, Jump(None, l1), l2])
+
+    def test_remove_unused_labels(self) -> None:
+        assert(remove_unused_labels([l1, l2, Jump(None, l1)]) == [l1, Jump(None, l1)])
+
+    def test_coalesce_copies(self) -> None:
+        instructions = [LoadIntConst(None, 1, x1), Copy(None, x1, x2), Call(None, IRVar('+'), [x2, x2], x3), Copy(None, x3, x2)]
+        assert(coalesce_copies(instructions) == [LoadIntConst(None, 1, x2), Call(None, IRVar('+'), [x2, x2], x2)])
+        # The input is left as it was.
+        assert(instructions[0] == LoadIntConst(None, 1, x1))
+        # x1 is read twice, so it must stay.
+        instructions = [LoadIntConst(None, 1, x1), Copy(None, x1, x2), Copy(None, x1, x3)]
+        assert(coalesce_copies(instructions) == instructions)
+
+    def test_pass_manager_stats(self) -> None:
+        passes = PassManager()
+        passes.add('unreachable', remove_unreachable_code)
+        passes.add('labels', remove_unused_labels)
+        result = passes.run([Jump(None, l1), LoadIntConst(None, 1, x1), l1, l2])
+        assert(result == [Jump(None, l1), l1])
+        assert([(s.name, s.instructions_before, s.instructions_after) for s in passes.stats]
+               == [('unreachable', 4, 3), ('labels', 3, 2)])
+        assert(passes.report().split('\n')[1].startswith('labels'))
+
+    def test_backends_agree_on_optimized_ir(self) -> None:
+        programs = [
+            '{ var x = 0 - 7; print_int(x / 2); print_int(x % 2); print_int(- x); }',
+            'print_bool(1 <= 1 and 2 >= 3 or 1 != 2); print_bool(not (1 > 2));',
+            'print_int(if 1 < 2 then 10 else 20); if 2 < 1 then print_int(1);',
+            'var y = if 1 < 2 then 5; print_int(y);',
+            '{ var x = 1; { var x = 2; x = x + 1; print_int(x); } print_int(x); }',
+            'var i = 0; var s = 0; while i < 10 do { i = i + 1; s = s + i; } print_int(s);',
+            '{ var x = 1; print_int(x + (x = 2)); print_int(x); }',
+            '{ var x = 0; (x < 1 or { x = 7; true }) and { print_int(x); false }; }',
+        ]
+        for program in programs:
+            expr = parse(tokenize(program))
+            typecheck(expr)
+            expected = output_of(compile_closures(expr))
+            instructions = generate_ir(expr)
+            optimized = default_passes().run(instructions)
+            assert(len(optimized) < len(instructions))
+            assert(output_of(lambda: run_ir(instructions)) == expected)
+            assert(output_of(lambda: run_ir(optimized)) == expected)
+            assert(output_of(lambda: run_vm(compile_ir(optimized))) == expected)
@@ -0,0 +1,89 @@
+from compiler.__main__ import main
+from compiler.interpreter import interpret
+from compiler.parser import parse
+from compiler.profiler import ExecutionProfile
+from compiler.server import handle_request
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from compiler import ast
+import unittest
+
+
+def checked(source: str) -> ast.Expression:
+    root = parse(tokenize(source))
+    typecheck(root)
+    return root
+
+
+class ProfilerTest(unittest.TestCase):
+    source = '\n'.join([
+        '{',
+        'var i = 0;',
+        'var total = 0;',
+        'while i < 10 do {',
+        '    var j = 0;',
+        '    while j < 5 do { total = total + j; j = j + 1; }',
+        '    i = i + 1;',
+        '}',
+        'total',
+        '}',
+    ])
+
+    def test_gives_the_same_result(self) -> None:
+        profile = ExecutionProfile()
+        assert(interpret(checked(self.source), profile=profile) == interpret(checked(self.source)) == 100)
+        assert(profile.nodes)
+
+    def test_counts_evaluations_by_location(self) -> None:
+        profile = ExecutionProfile()
+        interpret(checked(self.source), profile=profile)
+        assert(profile.nodes[(5, 10, 'BinaryOp')].count == 60)
+        assert(profile.nodes[(5, 29, 'BinaryOp')].count == 50)
+        assert(profile.nodes[(5, 44, 'BinaryOp')].op == '+')
+        assert(profile.nodes[(3, 0, 'Loop')].count == 1)
+        rows = {line.row: line.count for line in profile.lines()}
+        # The inner loop, its condition, and its body and the two assignments
+        # in it, of 4 nodes each.
+        assert(rows[5] == 10 + 60 * 3 + 50 + 50 * 8)
+        assert(rows[1] == 2)
+
+    def test_ranks_loops_and_operations(self) -> None:
+        profile = ExecutionProfile()
+        interpret(checked(self.source), profile=profile)
+        outer, inner = profile.hottest_loops()
+        assert((outer.loop.row, outer.iterations) == (3, 10))
+        assert((inner.loop.row, inner.iterations) == (5, 50))
+        assert(outer.loop.seconds >= inner.loop.seconds)
+        ops = profile.hottest_binary_ops(3)
+        assert(len(ops) == 3 and all(a.seconds >= b.seconds for a, b in zip(ops, ops[1:])))
+        total = sum(stats.self_seconds for stats in profile.nodes.values())
+        assert(abs(sum(line.self_seconds for line in profile.lines()) - total) < 1e-9)
+        report = profile.report()
+        assert('hottest loops:' in report and '50 iterations' in report)
+
+    def test_chains_of_operations_are_not_counted_twice(self) -> None:
+        profile = ExecutionProfile()
+        interpret(checked('{ var i = 0; var a = 1; while i < 300 do { i = i + 1; a + a + a + a + a + a + a + a; } }'),
+                  profile=profile)
+        total = sum(stats.self_seconds for stats in profile.nodes.values())
+        chain = profile.nodes[(0, 54, 'BinaryOp')]
+        assert(chain.count == 7 * 300)
+        assert(all(stats.seconds <= total for stats in profile.nodes.values()))
+        percentages = [float(word[:-1]) for word in profile.report().split() if word.endswith('%')]
+        assert(percentages and max(percentages) <= 100.0)
+
+    def test_only_the_tree_engine_profiles(self) -> None:
+        with self.assertRaises(Exception):
+            interpret(checked(self.source), 'closures', ExecutionProfile())
+
+    def test_errors_propagate(self) -> None:
+        profile = ExecutionProfile()
+        with self.assertRaises(ZeroDivisionError):
+            interpret(checked('{ var x = 0; 1 / x }'), profile=profile)
+        assert(profile.nodes[(0, 13, 'BinaryOp')].count == 1)
+
+    def test_cli_prints_the_report(self) -> None:
+        response = handle_request({'argv': ['interpret', '--no-cache', '--profile-program'],
+                                   'stdin': 'var x = 0;\nwhile x < 3 do x = x + 1;\nprint_int(x);\n'}, main)
+        assert(response['status'] == 0 and response['stdout'] == '3\n')
+        assert('hottest lines:' in response['stderr'] and '3 iterations' in response['stderr'])
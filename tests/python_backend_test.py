@@ -0,0 +1,78 @@
+from compiler.closures import compile_closures
+from compiler.parser import parse
+from compiler.python_backend import compile_python, generate_python, run_python
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import contextlib
+import io
+import unittest
+
+
+def run_both(source: str) -> tuple[tuple[object, str], tuple[object, str]]:
+    expr = parse(tokenize(source))
+    typecheck(expr)
+    results = []
+    for run in [lambda: run_python(expr), compile_closures(expr)]:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            value = run()
+        results.append((value, output.getvalue()))
+    return results[0], results[1]
+
+
+class PythonBackendTest(unittest.TestCase):
+    def test_same_results_as_closures(self) -> None:
+        programs = [
+            '2 + 3;',
+            '1 < 2 == true;',
+            '7 - 2 * 3;',
+            '{ var x = 0 - 7; print_int(x / 2); print_int(x % 2); x }',
+            '1 <= 1 and 2 >= 3 or 1 != 2;',
+            '(- 5) == 0 - 5;',
+            'not (1 > 2);',
+            'if 1 < 2 then 10 else 20;',
+            'if 2 < 1 then 10;',
+            '{ var x = 1; { var x = 2; x = x + 1; } x }',
+            'var i = 0; var s = 0; while i < 10 do { i = i + 1; s = s + i; } print_int(s);',
+            '{ var a = 1; var b = a = 5; a + b }',
+            '{ var f = print_bool; f(true); 1 }',
+            '{ var x = 1; x + { x = 10; x } }',
+            '{ var x = 1; (x = 2) + { x = 10; x } }',
+            '{ var x = 1; print_int(x + if x < 2 then { x = 5; x } else 0); x }',
+            '{ var i = 0; while { i = i + 1; i < 5 } do print_int(i); i }',
+            '{ var x = 0; (x < 1 or { x = 7; true }) and { print_int(x); false } }',
+        ]
+        for program in programs:
+            python_result, closures_result = run_both(program)
+            assert(python_result == closures_result)
+
+    def test_and_or_short_circuit(self) -> None:
+        assert(run_both('(false and { print_bool(true); true });')[0] == (False, ''))
+        assert(run_both('(true or { print_bool(true); true });')[0] == (True, ''))
+        assert(run_both('(true and { print_bool(true); false });')[0] == (False, 'true\n'))
+
+    def test_generated_source(self) -> None:
+        expr = parse(tokenize('{ var x = 1; { var x = 2; x = x + 1; } while x < 3 do x = x + 1; x }'))
+        typecheck(expr)
+
+        assert(generate_python(expr).split('\n') == [
+            'def program():',
+            '    x_2 = 1',
+            '    x_3 = 2',
+            '    x_3 = (x_3 + 1)',
+            '    while (x_2 < 3):',
+            '        x_2 = (x_2 + 1)',
+            '        x_2',
+            '    return x_2',
+            '',
+        ])
+
+    def test_code_objects_are_cached(self) -> None:
+        source = generate_python(parse(tokenize('1 + 2;')))
+        assert(compile_python(source) is compile_python(source))
+
+    def test_long_expressions(self) -> None:
+        count = 5000
+        expr = parse(tokenize('1' + ' + 1' * count + ';'))
+        typecheck(expr)
+        assert(run_python(expr) == count + 1)
@@ -0,0 +1,60 @@
+from compiler import ast
+from compiler.parser import parse
+from compiler.resolver import resolve
+from compiler.runtime import binary_operators, unary_operators
+from compiler.tokenizer import tokenize
+
+
+def identifiers(node: ast.Expression) -> list[ast.Identifier]:
+    result = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Identifier):
+            result.append(node)
+        children: list[ast.Expression] = []
+        for value in vars(node).values():
+            children += [c for c in (value if isinstance(value, list) else [value]) if isinstance(c, ast.Expression)]
+        stack += reversed(children)
+    return result
+
+
+def slots(source: str, globals: list[str] = []) -> tuple[int, list[tuple[str, int | None]]]:
+    expr = parse(tokenize(source))
+    slot_count = resolve(expr, globals)
+    return slot_count, [(i.name, i.slot) for i in identifiers(expr)]
+
+
+def test_every_declaration_gets_a_slot() -> None:
+    assert slots('{ var x = 1; { var x = x; x = 3; } x }') == (
+        2, [('x', 0), ('x', 1), ('x', 0), ('x', 1), ('x', 0)]
+    )
+
+
+def test_globals_come_first() -> None:
+    assert slots('var y = print_int(x);', ['print_int', 'x']) == (
+        3, [('y', 2), ('print_int', 0), ('x', 1)]
+    )
+
+
+def test_undeclared_names_have_no_slot() -> None:
+    assert slots('{ { var x = 1; } x }') == (1, [('x', 0), ('x', None)])
+
+
+def test_operators_are_looked_up() -> None:
+    expr = parse(tokenize('-1 + 2 and 3 or 4;'))
+    resolve(expr)
+    assert isinstance(expr, ast.UnaryOp) and expr.function is unary_operators['-']
+    or_op = expr.element
+    assert isinstance(or_op, ast.BinaryOp) and or_op.function is None and or_op.short_circuit is True
+    and_op = or_op.left
+    assert isinstance(and_op, ast.BinaryOp) and and_op.function is None and and_op.short_circuit is False
+    plus = and_op.left
+    assert isinstance(plus, ast.BinaryOp) and plus.function is binary_operators['+'] and plus.short_circuit is None
+
+
+def test_deep_nesting() -> None:
+    depth = 20_000
+    slot_count, result = slots('{ var x = 1; ' + '{ ' * depth + 'x' + ' }' * depth + ' }')
+    assert slot_count == 1
+    assert result == [('x', 0), ('x', 0)]
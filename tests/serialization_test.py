@@ -0,0 +1,105 @@
+from compiler import ast
+from compiler.diagnostics import Diagnostics
+from compiler.objs.types import Bool, Error, FunType, Int, Unit, Type
+from compiler.parser import parse
+from compiler.resolver import resolve
+from compiler.serialization import dump_ast, load_ast, read_ast_file, write_ast_file
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import os
+import pickle
+import tempfile
+import unittest
+
+
+def typechecked(source: str) -> ast.Expression:
+    expr = parse(tokenize(source))
+    typecheck(expr)
+    return expr
+
+
+def round_trip(expr: ast.Expression) -> ast.Expression:
+    loaded = load_ast(dump_ast(expr))
+    resolve(expr)
+    resolve(loaded)
+    # The reprs also compare locations exactly, and Identifier slots.
+    assert(repr(loaded) == repr(expr))
+    return loaded
+
+
+class SerializationTest(unittest.TestCase):
+    def test_round_trips_every_node(self) -> None:
+        source = '''
+            var x: Int = -123456789;
+            var f: (Int, Int) => Bool = print_int;
+            var b = true and not false;
+            while x < 10 do { x = x + 1; }
+            if b then print_int(x % 3) else { print_bool(x == 4); }
+            { var y = unit; y }
+        '''
+        round_trip(parse(tokenize(source)))
+
+    def test_keeps_types(self) -> None:
+        expr = typechecked('{ var x = 1; print_int(x + 2); x < 3 }')
+        loaded = round_trip(expr)
+        assert(isinstance(loaded, ast.Block))
+        # Types are compared by identity.
+        assert(loaded.type is Bool)
+        assert(loaded.expressions[1].type is Unit)
+        assert(loaded.result.right.type is Int)  # type: ignore
+
+    def test_keeps_function_types(self) -> None:
+        fun_type = FunType([Int, FunType([Bool], Unit)], Int)
+        expr = ast.Identifier(None, 'f', type=fun_type)
+        loaded = load_ast(dump_ast(expr))
+        assert(loaded.location is None)
+        assert(loaded.type == fun_type)
+
+    def test_keeps_errors(self) -> None:
+        diagnostics = Diagnostics()
+        expr = parse(tokenize('var x = ;\nvar y = x + 1;\n'), diagnostics=diagnostics)
+        typecheck(expr, diagnostics=diagnostics)
+        loaded = round_trip(expr)
+        assert(isinstance(loaded, ast.Block) and isinstance(loaded.expressions[0], ast.VarDec))
+        assert(isinstance(loaded.expressions[0].value, ast.ErrorExpression))
+        assert(loaded.expressions[0].value.type is Error)
+
+    def test_rejects_unknown_types(self) -> None:
+        class Other(Type):
+            pass
+        with self.assertRaises(Exception):
+            dump_ast(ast.Literal(None, 1, type=Other()))
+
+    def test_type_expressions_share_the_variable(self) -> None:
+        expr = parse(tokenize('var f: (Int) => (Bool) => Int = 1;'))
+        loaded = round_trip(expr)
+        assert(isinstance(loaded, ast.VarDec) and isinstance(loaded.dec_type, ast.TypeFunction))
+        assert(loaded.dec_type.variable is loaded.name)
+        assert(loaded.dec_type.result.variable is loaded.name)
+
+    def test_deep_trees(self) -> None:
+        depth = 20000
+        expr = typechecked('1' + ' + 1' * depth + ';')
+        loaded = load_ast(dump_ast(expr))
+        for _ in range(depth):
+            assert(isinstance(loaded, ast.BinaryOp))
+            loaded = loaded.left
+        assert(isinstance(loaded, ast.Literal) and loaded.value == 1 and loaded.type is Int)
+
+    def test_loads_files_through_mmap(self) -> None:
+        expr = typechecked('{ var i = 0; while i < 3 do i = i + 1; i }')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'program.ast')
+            write_ast_file(path, expr)
+            loaded = read_ast_file(path)
+        resolve(expr)
+        resolve(loaded)
+        assert(repr(loaded) == repr(expr))
+
+    def test_smaller_than_pickle(self) -> None:
+        expr = typechecked('var x = 0;' + ' x = x + 1;' * 200)
+        assert(len(dump_ast(expr)) * 4 < len(pickle.dumps(expr, pickle.HIGHEST_PROTOCOL)))
+
+    def test_rejects_other_data(self) -> None:
+        with self.assertRaises(Exception):
+            load_ast(b'not an ast')
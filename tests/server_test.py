@@ -0,0 +1,79 @@
+from compiler.__main__ import main
+from compiler.client import encode_message, request, server_argv
+from compiler.server import handle_request
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Iterator
+import unittest
+
+
+class ServerTest(unittest.TestCase):
+    def test_handles_requests_with_main(self) -> None:
+        response = handle_request({'argv': ['interpret', '--no-cache'], 'stdin': 'print_int(1 + 2);'}, main)
+        assert(response == {'status': 0, 'stdout': '3\n', 'stderr': ''})
+        response = handle_request({'argv': ['typecheck', '--no-cache'], 'stdin': '{ 1 < 2 }'}, main)
+        assert(response['stdout'] == 'Bool\n')
+        response = handle_request({'argv': ['typecheck', '--no-cache'], 'stdin': 'x;'}, main)
+        assert(response['status'] == 1 and 'Variable not defined' in response['stderr'])
+        response = handle_request({'argv': ['--bogus']}, main)
+        assert(response['status'] == 1 and 'Unknown argument' in response['stderr'])
+
+    def test_client_makes_paths_absolute(self) -> None:
+        argv = server_argv(['compile', '--output=a.out', 'prog.src'])
+        assert(argv == ['compile', f'--output={os.path.abspath("a.out")}', os.path.abspath('prog.src')])
+
+    @contextlib.contextmanager
+    def server(self, *args: str) -> Iterator[str]:
+        """Runs a compile server, and yields its socket."""
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, 'server.sock')
+            source_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+            server = subprocess.Popen([sys.executable, '-m', 'compiler', 'serve', f'--socket={socket_path}', *args],
+                                      env={**os.environ, 'PYTHONPATH': source_dir})
+            try:
+                deadline = time.time() + 30
+                while not os.path.exists(socket_path):
+                    assert(time.time() < deadline and server.poll() is None)
+                    time.sleep(0.05)
+                yield socket_path
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            # The server removes its socket when it is stopped.
+            assert(not os.path.exists(socket_path))
+
+    def test_serves_clients_over_a_socket(self) -> None:
+        with self.server() as socket_path:
+            for i in range(3):
+                response = request(['interpret', '--no-cache'], f'print_int({i});', socket_path)
+                assert(response == {'status': 0, 'stdout': f'{i}\n', 'stderr': ''})
+
+    def test_programs_that_never_end_block_only_their_client(self) -> None:
+        with self.server('--jobs=2') as socket_path:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+                sock.sendall(encode_message({'argv': ['interpret', '--no-cache'], 'stdin': 'while true do 1;'}))
+                start = time.time()
+                response = request(['interpret', '--no-cache'], 'print_int(1);', socket_path)
+                assert(response['stdout'] == '1\n' and time.time() - start < 30)
+
+    def test_rejects_invalid_requests(self) -> None:
+        invalid_requests: list[dict[str, Any]] = [{}, {'argv': 'interpret'}, {'argv': ['typecheck'], 'stdin': 1}]
+        for invalid in invalid_requests:
+            response = handle_request(invalid, main)
+            assert(response['status'] == 1 and response['stderr'].startswith('Invalid request'))
+        with self.server() as socket_path:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+                sock.sendall(encode_message({'stdin': '1;'}))
+                sock.settimeout(30)
+                data = b''
+                while len(data) < 4 or len(data) < 4 + int.from_bytes(data[:4], 'big'):
+                    data += sock.recv(4096)
+                assert(json.loads(data[4:])['status'] == 1)
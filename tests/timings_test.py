@@ -0,0 +1,70 @@
+from compiler.__main__ import main
+from compiler.interpreter import interpret, interpret_lower
+from compiler.parser import parse
+from compiler.server import handle_request
+from compiler.timings import CallCounter, Timings
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+import contextlib
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import unittest
+
+
+class TimingsTest(unittest.TestCase):
+    def test_records_phases(self) -> None:
+        timings = Timings()
+        with timings.phase('a') as timing:
+            data = [object() for _ in range(1000)]
+        with timings.phase('b'):
+            pass
+        assert([phase.name for phase in timings.phases] == ['a', 'b'])
+        assert(timing.seconds > 0 and timing.allocated_blocks >= 1000 and timing.peak_bytes > 0)
+        assert(len(data) == 1000)
+        assert('a' in str(timings) and 'total' in str(timings))
+        assert(json.loads(timings.to_json())['phases'][1]['name'] == 'b')
+
+    def test_counts_evaluated_nodes(self) -> None:
+        root = parse(tokenize('{ var x = 0; while x < 100 do x = x + 1; x }'))
+        typecheck(root)
+        timings = Timings(trace_memory=False)
+        with timings.phase('interpret', {'nodes_evaluated': [interpret_lower]}) as timing:
+            assert(interpret(root) == 100)
+        # 101 conditions of 3 nodes, 100 assignments of 4, and the block,
+        # the declaration and its value, the loop and the result.
+        assert(timing.counters == {'nodes_evaluated': 708})
+
+    def test_call_counter_stops_counting(self) -> None:
+        def f() -> None:
+            pass
+        with CallCounter({'f': [f]}) as counter:
+            f()
+            f()
+        f()
+        assert(counter.counts == {'f': 2})
+        assert(all(sys.monitoring.get_tool(i) is None for i in range(6)))
+
+    def test_cli_reports_timings(self) -> None:
+        response = handle_request({'argv': ['interpret', '--no-cache', '--timings=json'],
+                                   'stdin': 'var x = 1;\nprint_int(x + 1);\n'}, main)
+        assert(response['status'] == 0 and response['stdout'] == '2\n')
+        phases = {phase['name']: phase for phase in json.loads(response['stderr'])['phases']}
+        assert(list(phases) == ['tokenize', 'parse', 'typecheck', 'interpret'])
+        assert(phases['tokenize']['counters'] == {'tokens': 12})
+        assert(phases['parse']['counters'] == {'ast_nodes': 9})
+        assert(phases['typecheck']['counters'] == {'nodes_checked': 8, 'symbol_lookups': 2})
+        assert(phases['interpret']['counters'] == {'nodes_evaluated': 8})
+        response = handle_request({'argv': ['typecheck', '--no-cache', '--timings'], 'stdin': '1 + 2;'}, main)
+        assert(response['stdout'] == 'Int\n' and 'nodes_checked=3' in response['stderr'])
+
+    def test_cli_profiles(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile')
+            with contextlib.redirect_stdout(io.StringIO()):
+                assert(main(['interpret', '--no-cache', f'--profile={path}', os.devnull]) == 0)
+            functions = {function for _, _, function in pstats.Stats(path).stats}  # type: ignore
+            assert('interpret' in functions)
@@ -1,4 +1,5 @@
-from compiler.tokenizer import tokenize # type: ignore
+import io
+from compiler.tokenizer import tokenize, tokenize_legacy, tokenize_stream, tokenize_buffer # type: ignore
 from compiler.objs.tokenclass import Token
 from compiler.objs.location import L, Location
 
@@ -130,4 +131,50 @@ def test_and_or_operators_recognized() -> None:
     ]
     
     assert tokenize(test_input) == expected
-    
\ No newline at end of file
+    
+def test_tokenizer_matches_legacy_tokenizer() -> None:
+    test_inputs = [
+        'if trueish then order else note',
+        'var x: (Int) => Bool = a.b;',
+        '# comment without newline',
+        'a // b\n  c\t# c\n\n   d $ e',
+        '{ while x <= 10 do { x = x + 1; print_int(x % 3 != 0) } }\n',
+        '_ __ _a a_ 0x1F 12ab',
+    ]
+    for test_input in test_inputs:
+        assert tokenize(test_input) == tokenize_legacy(test_input)
+        for new, old in zip(tokenize(test_input), tokenize_legacy(test_input)):
+            assert (new.loc.row, new.loc.column) == (old.loc.row, old.loc.column)
+
+def test_stream_tokenizer_matches_tokenizer_across_chunk_boundaries() -> None:
+    test_input = """var long_identifier = 12345 == 67890; // comment that spans chunks
+    # another comment
+        if trueish then {  print_int(x)  }
+    a <= b"""
+    expected = tokenize(test_input)
+    for chunk_size in [1, 2, 3, 7, 16, 1000]:
+        tokens = list(tokenize_stream(io.StringIO(test_input), chunk_size))
+        assert tokens == expected
+        for new, old in zip(tokens, expected):
+            assert (new.loc.row, new.loc.column) == (old.loc.row, old.loc.column)
+
+def test_stream_tokenizer_is_lazy() -> None:
+    source = io.StringIO('a\n' * 1000)
+    tokens = tokenize_stream(source, chunk_size=10)
+    assert next(tokens) == Token('a', 'identifier', Location(row=0, column=0))
+    assert source.tell() < 100
+
+def test_token_buffer_matches_tokenizer() -> None:
+    test_input = """var x = 10; // comment
+    while x >= 0 do { x = x - 1 }
+    """
+    tokens = tokenize_buffer(test_input)
+    expected = tokenize(test_input)
+    assert len(tokens) == len(expected)
+    assert list(tokens) == expected
+    assert tokens[3] == Token('10', 'int_literal', Location(row=0, column=8))
+    assert (tokens.text(6), tokens.type(6), tokens.rows[6], tokens.columns[6]) == ('x', 'identifier', 1, 10)
+
+def test_token_texts_are_interned() -> None:
+    tokens = tokenize('variable_name + variable_name')
+    assert tokens[0].text is tokens[2].text
@@ -0,0 +1,74 @@
+from compiler import ast
+from compiler.incremental import IncrementalParser
+from compiler.objs.types import Bool, Int, Unit
+from compiler.parser import parse
+from compiler.resolver import resolve
+from compiler.tokenizer import tokenize
+from compiler.typechecker import TypecheckSession, typecheck
+import unittest
+
+
+source = '''var x = 1;
+var y = x + 1;
+print_int(y);
+{ var x = true; print_bool(x); }
+var z = 3;
+'''
+
+
+def check(parser: IncrementalParser, session: TypecheckSession) -> ast.Expression:
+    root = parser.parse()
+    typecheck(root, session=session)
+    expected = parse(tokenize(parser.source))
+    typecheck(expected)
+    # The session gives slots of its own; the engines resolve again anyway.
+    resolve(root)
+    resolve(expected)
+    # The reprs also compare the types of every node.
+    assert(repr(root) == repr(expected))
+    return root
+
+
+class TypecheckSessionTest(unittest.TestCase):
+    def test_skips_unchanged_expressions(self) -> None:
+        parser = IncrementalParser(source)
+        session = TypecheckSession()
+        check(parser, session)
+        assert((session.checked_expressions, session.reused_expressions) == (6, 0))
+        check(parser, session)
+        assert((session.checked_expressions, session.reused_expressions) == (0, 6))
+        assert(session.checked_nodes == 0)
+
+        parser.edit(parser.source.index('3'), 1, '4')
+        check(parser, session)
+        # `var z = 4`, and the block before it, which has no `;` after it
+        # and so was parsed again.
+        assert(session.checked_expressions == 2 and session.reused_expressions == 4)
+
+    def test_rechecks_the_readers_of_a_changed_declaration(self) -> None:
+        parser = IncrementalParser(source)
+        session = TypecheckSession()
+        check(parser, session)
+        # `var y` is checked again, and so is `print_int(y)` that reads it,
+        # but not the block, whose `x` is its own.
+        parser.edit(parser.source.index('x + 1'), 5, '2')
+        check(parser, session)
+        assert(session.checked_expressions == 2)
+
+        # Now `y` is a Bool, which `print_int(y)` fails on.
+        parser.edit(parser.source.index('2;'), 1, 'true')
+        with self.assertRaises(Exception):
+            typecheck(parser.parse(), session=session)
+        parser.edit(parser.source.index('print_int(y)'), 9, 'print_bool')
+        root = check(parser, session)
+        assert(root.expressions[1].type is Bool)  # type: ignore
+
+    def test_rechecks_readers_of_a_new_declaration(self) -> None:
+        parser = IncrementalParser(source)
+        session = TypecheckSession()
+        check(parser, session)
+        # `y` now reads a new `x` of the same type.
+        parser.edit(parser.source.index('var y'), 0, 'var x = 5;\n')
+        check(parser, session)
+        assert(session.checked_expressions == 3)
+        assert(parser.parse().type is Unit and parser.parse().expressions[2].type is Int)  # type: ignore
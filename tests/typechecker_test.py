@@ -4,6 +4,8 @@ from compiler.objs.location import Location, L
 from compiler.typechecker import typecheck, SymTab
 from compiler.parser import parse
 from compiler.tokenizer import tokenize
+import copy
+import pickle
 import unittest
 
 global_tab = SymTab(locals={
@@ -107,6 +109,12 @@ class TypeCheckerTest(unittest.TestCase):
         
         assert(i1==Unit)
         assert(i2==Unit)
+        with self.assertRaises(Exception) as context:
+            typecheck(parse(tokenize('print_int(true);')))
+        assert(str(context.exception).endswith('Expected Int as an argument of "print_int", got Bool.'))
+        with self.assertRaises(Exception) as context:
+            typecheck(parse(tokenize('print_int();')))
+        assert(str(context.exception).endswith('Wrong number of arguments to "print_int": expected 1, got 0.'))
     
     def test_blocks(self) -> None:
         i1 = typecheck(parse(tokenize(r'{}')))
@@ -172,4 +180,24 @@ class TypeCheckerTest(unittest.TestCase):
             assert(i2.right.type == Int)
             passed = True
         assert(i2.type == Bool)
-        assert(passed)
\ No newline at end of file
+        assert(passed)
+
+    def test_function_types_are_interned(self) -> None:
+        fun_type = FunType([Int, FunType([Bool], Unit)], Int)
+        assert(fun_type is FunType((Int, FunType([Bool], Unit)), Int))
+        assert(fun_type is not FunType([Int, FunType([Int], Unit)], Int))
+        assert(fun_type.parameters == (Int, FunType([Bool], Unit)))
+        assert(str(fun_type) == '(Int, (Bool) => Unit) => Int')
+        assert(pickle.loads(pickle.dumps(fun_type)) is fun_type)
+        assert(copy.deepcopy(fun_type) is fun_type)
+        with self.assertRaises(AttributeError):
+            fun_type.result = Bool
+
+    def test_function_typed_declarations(self) -> None:
+        expr = parse(tokenize('var f: (Int) => Unit = print_int; var g: (Int) => Unit = f; g(1); f == g;'))
+        typecheck(expr)
+        assert(isinstance(expr, Block) and isinstance(expr.expressions[1], VarDec))
+        assert(expr.expressions[1].type is FunType([Int], Unit))
+        assert(expr.expressions[3].type is Bool)
+        with self.assertRaises(Exception):
+            typecheck(parse(tokenize('var f: (Bool) => Unit = print_int;')))
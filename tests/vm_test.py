@@ -0,0 +1,69 @@
+from compiler.bytecode import compile_bytecode, disassemble
+from compiler.closures import compile_closures
+from compiler.parser import parse
+from compiler.tokenizer import tokenize
+from compiler.typechecker import typecheck
+from compiler.vm import run_vm
+import contextlib
+import io
+import unittest
+
+
+def run_both(source: str) -> tuple[tuple[object, str], tuple[object, str]]:
+    expr = parse(tokenize(source))
+    typecheck(expr)
+    results = []
+    for run in [lambda: run_vm(compile_bytecode(expr)), compile_closures(expr)]:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            value = run()
+        results.append((value, output.getvalue()))
+    return results[0], results[1]
+
+
+class VMTest(unittest.TestCase):
+    def test_same_results_as_closures(self) -> None:
+        programs = [
+            '2 + 3;',
+            '7 - 2 * 3;',
+            '{ var x = 0 - 7; print_int(x / 2); print_int(x % 2); x }',
+            '1 <= 1 and 2 >= 3 or 1 != 2;',
+            '(- 5) == 0 - 5;',
+            'not (1 > 2);',
+            'if 1 < 2 then 10 else 20;',
+            'if 2 < 1 then 10;',
+            '{ var x = 1; { var x = 2; x = x + 1; } x }',
+            'var i = 0; var s = 0; while i < 10 do { i = i + 1; s = s + i; } print_int(s);',
+            '{ var a = 1; var b = a = 5; a + b }',
+            '{ var f = print_bool; f(true); 1 }',
+        ]
+        for program in programs:
+            vm_result, closures_result = run_both(program)
+            assert(vm_result == closures_result)
+    
+    def test_and_or_short_circuit(self) -> None:
+        assert(run_both('(false and { print_bool(true); true });')[0] == (False, ''))
+        assert(run_both('(true or { print_bool(true); true });')[0] == (True, ''))
+        assert(run_both('(true and { print_bool(true); false });')[0] == (False, 'true\n'))
+    
+    def test_bytecode(self) -> None:
+        expr = parse(tokenize('{ var x = 1; x + 2 }'))
+        typecheck(expr)
+        program = compile_bytecode(expr)
+        
+        assert(program.local_count == 1)
+        assert(disassemble(program).split('\n') == [
+            '     0 LOAD_CONST 0 (1)',
+            '     2 STORE_LOCAL 0',
+            '     4 LOAD_LOCAL 0',
+            '     6 LOAD_CONST 1 (2)',
+            '     8 ADD',
+            '     9 RETURN',
+        ])
+    
+    def test_deeply_nested_program(self) -> None:
+        depth = 50_000
+        expr = parse(tokenize('if false then 1 else ' * depth + '(1 + ' * depth + '1' + ')' * depth + ';'))
+        typecheck(expr)
+        
+        assert(run_vm(compile_bytecode(expr)) == depth + 1)